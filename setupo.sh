@@ -14,4 +14,5 @@ sqlite3 patient_db.db "VACUUM;"
 echo "Setting up environment..."
 echo "ENCRYPTION_KEY=$(python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())')" > .env
 
-echo "WeCare AI is ready! Run with: streamlit run src/main.py"
\ No newline at end of file
+echo "WeCare AI is ready! Run with: streamlit run src/main.py"
+echo "and start the report analysis workers with: python src/analysis_queue.py"
\ No newline at end of file
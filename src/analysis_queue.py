@@ -0,0 +1,269 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+
+# Workers report in every HEARTBEAT_INTERVAL seconds; one silent for
+# WORKER_TIMEOUT is presumed dead and its running job goes back to the queue
+HEARTBEAT_INTERVAL = 5
+WORKER_TIMEOUT = 30
+
+
+class AnalysisQueue:
+    """SQLite-backed queue of report analysis jobs shared by the UI and workers"""
+
+    def __init__(self, db_path='patient_db.db'):
+        self.db_path = db_path
+        self._init_table()
+
+    def _connect(self):
+        # Workers and Streamlit sessions contend on the same file
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute("""CREATE TABLE IF NOT EXISTS analysis_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT DEFAULT 'queued',
+            filename TEXT,
+            content_type TEXT,
+            payload BLOB,
+            result TEXT,
+            error TEXT,
+            worker TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            started_at TEXT,
+            finished_at TEXT
+        )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs (status, id)")
+        # Optional link to a patient so extracted lab values land on their timeline
+        try:
+            conn.execute("ALTER TABLE analysis_jobs ADD COLUMN patient_id TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        conn.execute("""CREATE TABLE IF NOT EXISTS analysis_workers (
+            worker TEXT PRIMARY KEY,
+            last_seen REAL NOT NULL
+        )""")
+        conn.commit()
+        conn.close()
+
+    def enqueue(self, payload: bytes, filename="manual_text.txt", content_type="text/plain", patient_id=None):
+        conn = self._connect()
+        cur = conn.execute(
+            "INSERT INTO analysis_jobs (filename, content_type, payload, patient_id) VALUES (?, ?, ?, ?)",
+            (filename, content_type, payload, patient_id)
+        )
+        conn.commit()
+        job_id = cur.lastrowid
+        conn.close()
+        return job_id
+
+    def claim(self, worker_id):
+        """Atomically take the oldest queued job; returns (id, content_type, payload, patient_id) or None"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, content_type, payload, patient_id FROM analysis_jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE analysis_jobs SET status = 'running', worker = ?, started_at = ? WHERE id = ?",
+                    (worker_id, datetime.now().isoformat(timespec="seconds"), row[0])
+                )
+            conn.commit()
+            return row
+        finally:
+            conn.close()
+
+    def complete(self, job_id, result: dict):
+        self._finish(job_id, "done", result=json.dumps(result))
+
+    def fail(self, job_id, error: str):
+        self._finish(job_id, "failed", error=error)
+
+    def _finish(self, job_id, status, result=None, error=None):
+        conn = self._connect()
+        # Payload is no longer needed once analyzed
+        conn.execute(
+            "UPDATE analysis_jobs SET status = ?, result = ?, error = ?, finished_at = ?, payload = NULL WHERE id = ?",
+            (status, result, error, datetime.now().isoformat(timespec="seconds"), job_id)
+        )
+        conn.commit()
+        conn.close()
+
+    def get(self, job_id):
+        """Job status for polling: {'status', 'result', 'error', 'position'}"""
+        conn = self._connect()
+        row = conn.execute("SELECT status, result, error FROM analysis_jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            conn.close()
+            return None
+        job = {"status": row[0], "result": json.loads(row[1]) if row[1] else None, "error": row[2]}
+        if row[0] == "queued":
+            job["position"] = conn.execute(
+                "SELECT COUNT(*) FROM analysis_jobs WHERE status = 'queued' AND id < ?", (job_id,)
+            ).fetchone()[0]
+        conn.close()
+        return job
+
+    def heartbeat(self, worker_id):
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO analysis_workers VALUES (?, ?) ON CONFLICT (worker) DO UPDATE SET last_seen = excluded.last_seen",
+            (worker_id, time.time())
+        )
+        conn.commit()
+        conn.close()
+
+    def live_workers(self, timeout=WORKER_TIMEOUT):
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM analysis_workers WHERE last_seen >= ?",
+                             (time.time() - timeout,)).fetchone()[0]
+        conn.close()
+        return count
+
+    def requeue_stale(self, timeout=WORKER_TIMEOUT):
+        """Return jobs held by workers that stopped heartbeating to the queue"""
+        cutoff = time.time() - timeout
+        conn = self._connect()
+        cur = conn.execute(
+            "UPDATE analysis_jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND "
+            "(worker IS NULL OR worker NOT IN (SELECT worker FROM analysis_workers WHERE last_seen >= ?))",
+            (cutoff,)
+        )
+        conn.execute("DELETE FROM analysis_workers WHERE last_seen < ?", (cutoff,))
+        conn.commit()
+        conn.close()
+        return cur.rowcount
+
+
+def extract_payload_text(payload: bytes, content_type: str):
+    from instrumentation import stage
+    if content_type == "application/pdf":
+        from PyPDF2 import PdfReader
+        with stage("extract_text"):
+            reader = PdfReader(BytesIO(payload))
+            return "".join((page.extract_text() or "") + "\n" for page in reader.pages)
+    return payload.decode("utf-8")
+
+
+def analyze_text(processor, text, parser=None, analyzer=None):
+    """Full report analysis as shown on the Report Analyzer page.
+
+    With an IncrementalAnalyzer only paragraphs not seen before are run
+    through NER and the vitals patterns.
+    """
+    from clinical_insights import ClinicalInsightEngine
+    from dosage_extraction import extract_dosages
+    if not text.strip():
+        return {"text": text, "error": "Empty input text"}
+    try:
+        if analyzer is not None:
+            return analyzer.analyze(text)
+        spans = processor.extract_entity_spans(text)
+    except Exception as e:
+        return {"text": text, "error": str(e)}
+    if parser is not None:
+        spans.assign_sections(parser.section_boundaries(text))
+    return {
+        "text": text,
+        "entities": spans.by_category(),
+        "spans": spans.to_dict(),
+        "dosages": extract_dosages(text, spans),
+        "insights": ClinicalInsightEngine.analyze_vitals(text)
+    }
+
+
+def _heartbeat_loop(queue, worker_id):
+    while True:
+        try:
+            queue.heartbeat(worker_id)
+        except sqlite3.Error:
+            pass  # Retried next interval; only a long outage marks the worker dead
+        time.sleep(HEARTBEAT_INTERVAL)
+
+
+def run_worker(worker_name, db_path='patient_db.db', poll_interval=0.5):
+    """Worker loop: load the NLP model once, then process jobs until killed"""
+    # The pid keeps a restarted worker from inheriting its predecessor's jobs
+    worker_id = f"{worker_name}:{os.getpid()}"
+    queue = AnalysisQueue(db_path)
+    # Heartbeat from a thread so model loading and long jobs count as alive
+    threading.Thread(target=_heartbeat_loop, args=(queue, worker_id), name="analysis-heartbeat", daemon=True).start()
+    from nlp_processor import MedicalNLPProcessor
+    from report_parser import MedicalReportParser
+    processor = MedicalNLPProcessor()
+    from paragraph_cache import IncrementalAnalyzer, ParagraphCache
+    from lab_timeline import LabTimeline
+    from metrics import configure
+    from instrumentation import trace
+    metrics = configure()
+    parser = MedicalReportParser(processor)
+    analyzer = IncrementalAnalyzer(processor, ParagraphCache(db_path), parser)
+    timeline = LabTimeline(db_path)
+    while True:
+        job = queue.claim(worker_id)
+        if not job:
+            time.sleep(poll_interval)
+            continue
+        job_id, content_type, payload, patient_id = job
+        try:
+            with metrics.timer("analysis.job_ms"), trace(f"analysis_job:{job_id}") as job_trace:
+                result = analyze_text(processor, extract_payload_text(payload, content_type), parser, analyzer)
+            result["trace"] = job_trace.to_dict()
+            if "error" in result:
+                metrics.inc("analysis.job_failed")
+                queue.fail(job_id, result["error"])
+            else:
+                result["labs_recorded"] = timeline.record_text(result["text"], patient_id, source=f"analysis_job:{job_id}")
+                queue.complete(job_id, result)
+        except Exception as e:
+            metrics.inc("analysis.job_failed")
+            queue.fail(job_id, str(e))
+
+
+def spawn_worker(index, db_path='patient_db.db'):
+    # Spawn, not fork: callers (Streamlit, the supervisor) are multithreaded,
+    # and a forked child can inherit locks held by threads that do not exist there
+    worker = multiprocessing.get_context("spawn").Process(
+        target=run_worker, args=(f"{platform.node()}-{index}", db_path), daemon=True
+    )
+    worker.start()
+    return worker
+
+
+def start_workers(count, db_path='patient_db.db'):
+    # Jobs left 'running' by a pool that died without heartbeating go back first
+    AnalysisQueue(db_path).requeue_stale()
+    return [spawn_worker(i, db_path) for i in range(count)]
+
+
+def supervise(workers, db_path='patient_db.db', interval=5, log=print):
+    """Restart any worker that dies so the pool stays at full size, and requeue its job"""
+    queue = AnalysisQueue(db_path)
+    while True:
+        for i, worker in enumerate(workers):
+            if not worker.is_alive():
+                log(f"Worker {i} exited ({worker.exitcode}), restarting")
+                workers[i] = spawn_worker(i, db_path)
+        queue.requeue_stale()
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run report analysis workers")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--db", default="patient_db.db")
+    args = parser.parse_args()
+
+    workers = start_workers(args.workers, args.db)
+    print(f"Started {len(workers)} analysis workers")
+    supervise(workers, args.db)
@@ -0,0 +1,246 @@
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+import pandas as pd
+
+# table -> (column holding the partition source, partition kind)
+EXPORT_TABLES = {
+    "patients": ("area", "value"),
+    "medical_history": ("date", "month"),
+    "prescriptions": ("date", "month"),
+    "patient_vitals": ("date", "month"),
+    "appointments": ("date", "month"),
+}
+ENCRYPTED_COLUMNS = {"patients": ["phone"]}
+STATE_FILE = "_export_state.json"
+# Rowids updated since they were exported, filled by AFTER UPDATE triggers
+CHANGES_TABLE = "export_changes"
+# Rowids per "WHERE rowid IN (...)" query when re-reading changed rows
+CHANGED_BATCH = 500
+
+
+class ParquetExporter:
+    """Stream SQLite tables into Hive-partitioned Parquet for offline analysis.
+
+    Reads use a read-only connection and keyset pagination on rowid, so no
+    read lock is held between chunks and clinicians can keep writing while
+    an export runs. Incremental runs pick up rows inserted since the last
+    run (tracked per table by rowid) and rows updated since then (logged
+    by triggers into export_changes). Updated rows are appended again:
+    readers keep the latest _exported_at per _rowid. Deleted rows need a
+    full export.
+    """
+
+    def __init__(self, db_path='patient_db.db', out_dir='data/exports', chunk_size=50000,
+                 pseudonymize=False):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow. Install with: pip install pyarrow")
+        self.db_path = db_path
+        self.out_dir = out_dir
+        self.chunk_size = chunk_size
+        self.pseudonymize = pseudonymize
+        self._crypto = None
+        self.coerced = {}   # table -> values that did not fit their declared type
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _connect(self):
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+
+    def _install_tracking(self, tables):
+        """Create the change log and its update triggers (idempotent, one short write)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute(f"""CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tbl TEXT NOT NULL,
+            row_id INTEGER NOT NULL
+        )""")
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table in tables:
+            if table in existing:
+                conn.execute(f"""CREATE TRIGGER IF NOT EXISTS export_track_{table} AFTER UPDATE ON {table}
+                    BEGIN INSERT INTO {CHANGES_TABLE} (tbl, row_id) VALUES ('{table}', NEW.rowid); END""")
+        conn.commit()
+        conn.close()
+
+    def _prune_changes(self, table, seq):
+        """Drop change log entries this export has covered"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute(f"DELETE FROM {CHANGES_TABLE} WHERE tbl = ? AND seq <= ?", (table, seq))
+        conn.commit()
+        conn.close()
+
+    def _load_state(self):
+        path = os.path.join(self.out_dir, STATE_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        path = os.path.join(self.out_dir, STATE_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _column_types(self, table):
+        """Pandas dtypes from declared SQLite types, so every chunk has one Arrow schema"""
+        conn = self._connect()
+        columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        conn.close()
+        types = {}
+        for _, name, declared, *_ in columns:
+            declared = (declared or "").upper()
+            if "INT" in declared:
+                types[name] = "Int64"
+            elif "REAL" in declared or "FLOA" in declared:
+                types[name] = "float64"
+            else:
+                types[name] = "string"
+        return types
+
+    def _iter_chunks(self, table, after_rowid):
+        """Yield DataFrames of at most chunk_size rows, one short query each"""
+        last_rowid = after_rowid
+        while True:
+            conn = self._connect()
+            chunk = pd.read_sql_query(
+                f"SELECT rowid AS _rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                conn, params=(last_rowid, self.chunk_size)
+            )
+            conn.close()
+            if chunk.empty:
+                return
+            last_rowid = int(chunk["_rowid"].iloc[-1])
+            yield chunk
+
+    def _iter_changed(self, table, row_ids):
+        """Current version of rows updated since the last run"""
+        for i in range(0, len(row_ids), CHANGED_BATCH):
+            batch = row_ids[i:i + CHANGED_BATCH]
+            conn = self._connect()
+            chunk = pd.read_sql_query(
+                f"SELECT rowid AS _rowid, * FROM {table} WHERE rowid IN ({','.join('?' * len(batch))}) ORDER BY rowid",
+                conn, params=batch
+            )
+            conn.close()
+            if not chunk.empty:
+                yield chunk
+
+    def _coerce(self, table, chunk, types):
+        """Apply the declared types; SQLite does not enforce them, so misfits become NA"""
+        for column, dtype in types.items():
+            if column not in chunk.columns:
+                continue
+            values = chunk[column]
+            if dtype == "string":
+                chunk[column] = values.astype("string")
+                continue
+            numeric = pd.to_numeric(values, errors="coerce")
+            if dtype == "Int64":
+                numeric = numeric.where(numeric.isna() | (numeric % 1 == 0))
+            lost = int((numeric.isna() & values.notna()).sum())
+            if lost:
+                self.coerced[table] = self.coerced.get(table, 0) + lost
+            chunk[column] = numeric.astype(dtype)
+        return chunk
+
+    def _partition(self, table, chunk):
+        column, kind = EXPORT_TABLES[table]
+        if kind == "month":
+            month = pd.to_datetime(chunk[column], errors="coerce").dt.strftime("%Y-%m")
+            return chunk.assign(month=month.fillna("unknown")), "month"
+        return chunk.assign(**{f"{column}_part": chunk[column].fillna("unknown")}), f"{column}_part"
+
+    def _protect(self, table, chunk):
+        """Encrypted fields are exported as ciphertext, or as keyed pseudonyms"""
+        columns = [c for c in ENCRYPTED_COLUMNS.get(table, []) if c in chunk.columns]
+        if not self.pseudonymize or not columns:
+            return chunk
+        if self._crypto is None:
+            from crypto_service import get_crypto_service
+            self._crypto = get_crypto_service()
+        for column in columns:
+            index_column = f"{column}_index"
+            if index_column in chunk.columns:
+                # Reuse the stored blind index, decrypting only rows that lack one
+                missing = chunk[index_column].isna() & chunk[column].notna()
+            else:
+                missing = chunk[column].notna()
+                chunk[index_column] = pd.Series(pd.NA, index=chunk.index, dtype="string")
+            if missing.any():
+                plain = self._crypto.decrypt_many(chunk.loc[missing, column].tolist(), skip_invalid=True)
+                chunk.loc[missing, index_column] = self._crypto.blind_index_many(plain)
+            chunk = chunk.drop(columns=[column]).rename(columns={index_column: f"{column}_pseudonym"})
+        return chunk
+
+    def export_table(self, table, incremental=False, state=None):
+        state = state if state is not None else {}
+        previous = state.get(table)
+        # State from before change tracking (a bare rowid) cannot tell which rows were edited
+        incremental = incremental and isinstance(previous, dict)
+        target = os.path.join(self.out_dir, table)
+        if not incremental and os.path.exists(target):
+            shutil.rmtree(target)  # Full export replaces the previous snapshot
+        types = self._column_types(table)
+
+        # Read the change log position before the rows, so an edit made
+        # meanwhile is exported again next run rather than missed
+        conn = self._connect()
+        change_seq = conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {CHANGES_TABLE} WHERE tbl = ?",
+                                  (table,)).fetchone()[0]
+        if incremental:
+            change_seq = max(change_seq, previous["change_seq"])  # Log may have been pruned
+        last_rowid = previous["rowid"] if incremental else 0
+        changed = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT row_id FROM {CHANGES_TABLE} WHERE tbl = ? AND seq > ? AND seq <= ? AND row_id <= ? ORDER BY row_id",
+            (table, previous["change_seq"], change_seq, last_rowid)
+        )] if incremental else []
+        conn.close()
+
+        exported_at = datetime.now().isoformat(timespec="milliseconds")
+        exported = 0
+        for chunk in itertools.chain(self._iter_changed(table, changed), self._iter_chunks(table, last_rowid)):
+            last_rowid = max(last_rowid, int(chunk["_rowid"].max()))
+            chunk = self._coerce(table, chunk, types).assign(_exported_at=exported_at)
+            chunk = self._protect(table, chunk)
+            chunk, partition_column = self._partition(table, chunk)
+            chunk.to_parquet(target, engine="pyarrow", partition_cols=[partition_column], index=False)
+            exported += len(chunk)
+        state[table] = {"rowid": last_rowid, "change_seq": change_seq}
+        return exported
+
+    def export(self, tables=None, incremental=False):
+        """Export the given tables (default: all); returns rows written per table"""
+        tables = tables or list(EXPORT_TABLES)
+        self._install_tracking(tables)
+        state = self._load_state() if incremental else {}
+        counts = {}
+        for table in tables:
+            counts[table] = self.export_table(table, incremental, state)
+            # Persist after every table so an interrupted run resumes cleanly
+            self._save_state(state)
+            self._prune_changes(table, state[table]["change_seq"])
+        return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export patient database tables to Parquet")
+    parser.add_argument("--db", default="patient_db.db")
+    parser.add_argument("--out", default="data/exports")
+    parser.add_argument("--tables", nargs="*", choices=list(EXPORT_TABLES))
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--incremental", action="store_true", help="Only rows added or updated since the last run")
+    parser.add_argument("--pseudonymize", action="store_true", help="Replace encrypted fields with keyed pseudonyms")
+    args = parser.parse_args()
+
+    exporter = ParquetExporter(args.db, args.out, args.chunk_size, args.pseudonymize)
+    for table, count in exporter.export(args.tables, args.incremental).items():
+        print(f"{table}: {count} rows")
+    for table, count in exporter.coerced.items():
+        print(f"{table}: {count} values did not match their declared column type and were exported as null")
@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import json
+import os
+from ner_batcher import MicroBatcher
+from ner_pool import NERWorkerPool
+from instrumentation import get_instrumentation, trace
+from metrics import configure as configure_metrics
+
+MAX_BATCH_SIZE = 64
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class AnalysisAPI:
+    """Minimal ASGI app exposing the NLP, report, interaction and insight engines.
+
+    CPU-bound NER runs in an NERWorkerPool so the event loop only does I/O;
+    a semaphore caps in-flight requests and excess load gets 429 instead
+    of an unbounded backlog.
+    """
+
+    def __init__(self, workers=None, max_concurrency=32, max_pending=256,
+                 batch_size=16, batch_wait_ms=5.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.ner_batcher = None
+        self.max_pending = max_pending
+        self.semaphore = None
+        self.max_concurrency = max_concurrency
+        self.pending = 0
+        self.pool = None
+        self.interaction_engine = None
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+            ("POST", "/v1/entities"): self.entities,
+            ("POST", "/v1/reports/parse"): self.parse_reports,
+            ("POST", "/v1/interactions"): self.interactions,
+            ("POST", "/v1/insights"): self.insights,
+        }
+
+    def start_pool(self):
+        """Load the model and fork the NER workers (idempotent).
+
+        Call before the event loop starts: forking from an executor thread
+        copies whatever locks other threads hold into the workers.
+        """
+        if self.pool is None:
+            self.pool = NERWorkerPool(self.workers)
+        return self.pool
+
+    async def startup(self):
+        from drug_interaction_engine import EnhancedDrugInteractionEngine
+        configure_metrics()
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.interaction_engine = EnhancedDrugInteractionEngine()
+        # Normally built in __main__; under an external ASGI server it is
+        # built here, on the loop thread, before any request is served
+        self.start_pool()
+        # Texts from concurrent requests are coalesced into nlp.pipe batches
+        self.ner_batcher = MicroBatcher(
+            self.pool.submit, max_batch_size=self.batch_size, max_wait_ms=self.batch_wait_ms
+        )
+        # Run one document per worker so the first real request is warm
+        await asyncio.gather(*[asyncio.wrap_future(self.pool.submit(["Warm-up: fever"]))
+                               for _ in range(self.workers)])
+
+    async def shutdown(self):
+        if self.ner_batcher:
+            self.ner_batcher.close()
+        if self.pool:
+            self.pool.close()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                    await send({"type": "lifespan.startup.complete"})
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        handler = self.routes.get((scope["method"], scope["path"]))
+        if handler == self.metrics:
+            await self._send(send, 200, await handler({}), b"text/plain; version=0.0.4")
+            return
+        try:
+            if handler is None:
+                raise HTTPError(404, "Not found")
+            if self.pending >= self.max_pending:
+                raise HTTPError(429, "Server busy, retry later")
+            self.pending += 1
+            try:
+                body = await self._read_json(receive) if scope["method"] == "POST" else {}
+                async with self.semaphore:
+                    # ?trace=1 returns the stage timings of this request
+                    with trace(scope["path"]) as request_trace:
+                        status, payload = 200, await handler(body)
+                    if b"trace=1" in scope.get("query_string", b""):
+                        payload["trace"] = request_trace.to_dict()
+            finally:
+                self.pending -= 1
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+
+        await self._send(send, status, json.dumps(payload), b"application/json")
+
+    @staticmethod
+    async def _send(send, status, text, content_type):
+        data = text.encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(data)).encode())],
+        })
+        await send({"type": "http.response.body", "body": data})
+
+    async def _read_json(self, receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        try:
+            return json.loads(b"".join(chunks) or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Invalid JSON")
+
+    @staticmethod
+    def _batch(body, key):
+        items = body.get(key)
+        if not isinstance(items, list) or not items:
+            raise HTTPError(400, f"'{key}' must be a non-empty list")
+        if len(items) > MAX_BATCH_SIZE:
+            raise HTTPError(413, f"At most {MAX_BATCH_SIZE} items per request")
+        return items
+
+    async def _in_pool(self, items, op):
+        """Split a batch across workers and reassemble results in order"""
+        size = max(1, -(-len(items) // self.workers))
+        parts = [items[i:i + size] for i in range(0, len(items), size)]
+        results = await asyncio.gather(*[asyncio.wrap_future(self.pool.submit(part, op)) for part in parts])
+        return [r for part in results for r in part]
+
+    # Handlers
+    async def health(self, body):
+        pool = self.pool.health() if self.pool else {}
+        status = "ok" if pool and all(w["alive"] for w in pool["workers"]) else "degraded"
+        return {"status": status, "pending_requests": self.pending, "pool": pool}
+
+    async def metrics(self, body):
+        """Stage histograms of this process (NER runs in the pool workers and is not included)"""
+        return get_instrumentation().prometheus_text()
+
+    async def entities(self, body):
+        texts = self._batch(body, "texts")
+        futures = [asyncio.wrap_future(self.ner_batcher.submit(text)) for text in texts]
+        return {"results": [json.loads(r) for r in await asyncio.gather(*futures)]}
+
+    async def parse_reports(self, body):
+        texts = self._batch(body, "texts")
+        return {"results": await self._in_pool(texts, "parse")}
+
+    async def interactions(self, body):
+        requests = self._batch(body, "requests")
+        results = []
+        for request in requests:
+            results.append(self.interaction_engine.predict_interactions(
+                request.get("medications", []), request.get("conditions", [])
+            ))
+        return {"results": results}
+
+    async def insights(self, body):
+        from clinical_insights import ClinicalInsightEngine
+        texts = self._batch(body, "texts")
+        return {"results": [ClinicalInsightEngine.analyze_vitals(text) for text in texts]}
+
+
+app = AnalysisAPI(
+    workers=int(os.getenv("API_WORKERS", "0")) or None,
+    max_concurrency=int(os.getenv("API_MAX_CONCURRENCY", "32")),
+    batch_size=int(os.getenv("API_NER_BATCH_SIZE", "16")),
+    batch_wait_ms=float(os.getenv("API_NER_BATCH_WAIT_MS", "5"))
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Headless JSON API for report analysis")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, help="NLP worker processes (default: CPU count)")
+    args = parser.parse_args()
+    if args.workers:
+        app.workers = args.workers
+    # Model loads once here; workers fork from this process and share it
+    app.start_pool()
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,248 @@
+import sqlite3
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+DEFAULT_DURATION = 15
+# Longest appointment considered when searching for overlaps
+MAX_DURATION = 240
+ACTIVE = "status != 'Cancelled'"
+
+
+class SchedulingConflict(Exception):
+    def __init__(self, start, conflicting_id):
+        super().__init__(f"Slot at {start} overlaps appointment {conflicting_id}")
+        self.start = start
+        self.conflicting_id = conflicting_id
+
+
+def _fmt(dt):
+    return dt.strftime(TIME_FORMAT)
+
+
+class SlotIndex:
+    """Booked intervals of one doctor/hospital, sorted by start.
+
+    Legacy rows (migrated with no doctor, double-booked by the old form)
+    can overlap, so ends are not sorted; max_ends holds the running
+    maximum end instead. The first booking whose running max passes a
+    time is also the one that reaches it, so an overlap check is still
+    two bisects.
+    """
+
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals)
+        self.starts = [i[0] for i in intervals]
+        self.ends = [i[1] for i in intervals]
+        self.ids = [i[2] for i in intervals]
+        self.max_ends = []
+        self._update_max_ends(0)
+
+    def _update_max_ends(self, i):
+        del self.max_ends[i:]
+        running = self.max_ends[-1] if self.max_ends else None
+        for end in self.ends[i:]:
+            running = end if running is None or end > running else running
+            self.max_ends.append(running)
+
+    def conflict(self, start, end):
+        """Id of a booking overlapping [start, end), or None"""
+        i = bisect_right(self.max_ends, start)   # First booking ending after start
+        if i < len(self.starts) and self.starts[i] < end:
+            return self.ids[i]
+        return None
+
+    def add(self, start, end, appointment_id):
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, appointment_id)
+        self._update_max_ends(i)
+
+    def gaps(self, window_start, window_end):
+        """Free [start, end) intervals inside the window"""
+        free = []
+        cursor = window_start
+        i = bisect_right(self.max_ends, window_start)
+        while i < len(self.starts) and self.starts[i] < window_end:
+            if self.starts[i] > cursor:
+                free.append((cursor, self.starts[i]))
+            cursor = max(cursor, self.ends[i])
+            i += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+        return free
+
+
+class AppointmentScheduler:
+    """Conflict-checked booking and availability search per doctor and hospital.
+
+    Checks and inserts happen inside one BEGIN IMMEDIATE transaction, so
+    concurrent Streamlit sessions cannot double-book. The overlap lookup
+    uses the (hospital, doctor, start_at) index.
+    """
+
+    def __init__(self, db_path='patient_db.db'):
+        self.db_path = db_path
+        self._init_schema()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_schema(self):
+        conn = self._connect()
+        # Same base table as main.py creates, for databases the app has not set up
+        conn.execute("""CREATE TABLE IF NOT EXISTS appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            purpose TEXT,
+            status TEXT DEFAULT 'Scheduled',
+            FOREIGN KEY (patient_id) REFERENCES patients (id)
+        )""")
+        for column in ("doctor TEXT DEFAULT ''", "hospital TEXT DEFAULT ''", "start_at TEXT", "end_at TEXT"):
+            try:
+                conn.execute(f"ALTER TABLE appointments ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+        # Rows from before slot scheduling: start at their date, default length
+        conn.execute(
+            f"""UPDATE appointments SET start_at = substr(date || ' 00:00', 1, 16),
+                end_at = strftime('%Y-%m-%d %H:%M', substr(date || ' 00:00', 1, 16), '+{DEFAULT_DURATION} minutes')
+                WHERE start_at IS NULL"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_slot ON appointments (hospital, doctor, start_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_start ON appointments (start_at)")
+        conn.commit()
+        conn.close()
+
+    def _load_index(self, conn, hospital, doctor, window_start, window_end, exclude_id=None):
+        earliest = _fmt(datetime.strptime(window_start, TIME_FORMAT) - timedelta(minutes=MAX_DURATION))
+        rows = conn.execute(
+            f"""SELECT start_at, end_at, id FROM appointments
+                WHERE hospital = ? AND doctor = ? AND start_at >= ? AND start_at < ? AND {ACTIVE} AND id IS NOT ?""",
+            (hospital, doctor, earliest, window_end, exclude_id)
+        ).fetchall()
+        return SlotIndex(rows)
+
+    def book(self, patient_id, start, duration=DEFAULT_DURATION, hospital="", doctor="", purpose=None):
+        """Book one slot; raises SchedulingConflict if it overlaps an active booking"""
+        return self.book_many([(patient_id, start, purpose)], duration, hospital, doctor)[0]
+
+    def book_many(self, requests, duration=DEFAULT_DURATION, hospital="", doctor="", skip_conflicts=False):
+        """Book [(patient_id, start datetime, purpose)] for one doctor/hospital in one transaction.
+
+        Existing bookings in the covered range are loaded once into a
+        SlotIndex and every request is checked in memory. Returns the new
+        ids in request order (None for skipped conflicts); without
+        skip_conflicts the first conflict aborts the whole batch.
+        """
+        if not requests:
+            return []
+        duration = min(duration, MAX_DURATION)
+        slots = []
+        for patient_id, start, purpose in requests:
+            slots.append((patient_id, _fmt(start), _fmt(start + timedelta(minutes=duration)), purpose))
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            index = self._load_index(conn, hospital, doctor,
+                                     min(s[1] for s in slots), max(s[2] for s in slots))
+            ids = []
+            for patient_id, start_at, end_at, purpose in slots:
+                conflicting = index.conflict(start_at, end_at)
+                if conflicting is not None:
+                    if not skip_conflicts:
+                        raise SchedulingConflict(start_at, conflicting)
+                    ids.append(None)
+                    continue
+                cur = conn.execute(
+                    """INSERT INTO appointments (patient_id, date, purpose, doctor, hospital, start_at, end_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    (patient_id, start_at, purpose, doctor, hospital, start_at, end_at)
+                )
+                index.add(start_at, end_at, cur.lastrowid)
+                ids.append(cur.lastrowid)
+            conn.commit()
+            return ids
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def reschedule(self, appointment_id, start, purpose, status, duration=None):
+        """Move or update a booking, keeping its doctor/hospital slot conflict-free.
+
+        Without a duration the booking keeps its current length.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT hospital, doctor, start_at, end_at FROM appointments WHERE id = ?", (appointment_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Appointment {appointment_id} not found")
+            hospital, doctor, old_start, old_end = row
+            if duration is None:
+                length = datetime.strptime(old_end, TIME_FORMAT) - datetime.strptime(old_start, TIME_FORMAT)
+            else:
+                length = timedelta(minutes=min(duration, MAX_DURATION))
+            start_at, end_at = _fmt(start), _fmt(start + length)
+            if status != "Cancelled":
+                # The booking being moved must not hide overlaps with others
+                index = self._load_index(conn, hospital, doctor, start_at, end_at, exclude_id=appointment_id)
+                conflicting = index.conflict(start_at, end_at)
+                if conflicting is not None:
+                    raise SchedulingConflict(start_at, conflicting)
+            conn.execute(
+                "UPDATE appointments SET date = ?, start_at = ?, end_at = ?, purpose = ?, status = ? WHERE id = ?",
+                (start_at, start_at, end_at, purpose, status, appointment_id)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def available_slots(self, day, hospital="", doctor="", slot_minutes=DEFAULT_DURATION,
+                        opens="09:00", closes="17:00"):
+        """Free slot start times for a doctor/hospital on a date (from now on, if today)"""
+        window_start = f"{day.strftime('%Y-%m-%d')} {opens}"
+        window_end = f"{day.strftime('%Y-%m-%d')} {closes}"
+        now = datetime.now()
+        opening = datetime.strptime(window_start, TIME_FORMAT)
+        if now > opening:
+            # Next slot boundary after now, counted from opening time
+            elapsed = (now - opening).total_seconds() / 60
+            window_start = _fmt(opening + timedelta(minutes=-(-elapsed // slot_minutes) * slot_minutes))
+            if window_start >= window_end:
+                return []
+        conn = self._connect()
+        index = self._load_index(conn, hospital, doctor, window_start, window_end)
+        conn.close()
+        slots = []
+        step = timedelta(minutes=slot_minutes)
+        for gap_start, gap_end in index.gaps(window_start, window_end):
+            cursor, end = datetime.strptime(gap_start, TIME_FORMAT), datetime.strptime(gap_end, TIME_FORMAT)
+            while cursor + step <= end:
+                slots.append(cursor)
+                cursor += step
+        return slots
+
+    def upcoming(self, start, end):
+        """Appointments starting in [start, end) with patient names"""
+        conn = self._connect()
+        rows = conn.execute(
+            """SELECT a.id, p.name, a.start_at, a.purpose, a.status, a.hospital, a.doctor
+                FROM appointments a
+                JOIN patients p ON a.patient_id = p.id
+                WHERE a.start_at >= ? AND a.start_at < ?
+                ORDER BY a.start_at""",
+            (_fmt(start), _fmt(end))
+        ).fetchall()
+        conn.close()
+        return rows
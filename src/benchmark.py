@@ -0,0 +1,216 @@
+import argparse
+import gc
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+from synthetic_data import MEDICATIONS, CONDITIONS, FIRST_NAMES, build_database, generate_reports, write_reports
+
+# Same statement as the Search Records tab
+PATIENT_SEARCH_SQL = """SELECT id, name, age, gender, phone, address, area, preferred_hospital, insurance
+                        FROM patients WHERE name LIKE ? OR id LIKE ? OR phone_index = ?"""
+# Memory is measured on a separate, shorter pass: tracemalloc slows every allocation
+MEMORY_SAMPLE = 20
+
+
+class Skipped(Exception):
+    """A benchmark that cannot run here (e.g. the spaCy model is not installed)"""
+
+
+def measure(name, func, items, warmup=3):
+    """Call func on each item; latency percentiles, throughput and peak traced memory"""
+    for item in items[:warmup]:
+        func(item)
+    gc.collect()
+    latencies = []
+    started = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter_ns()
+        func(item)
+        latencies.append((time.perf_counter_ns() - t0) / 1e6)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for item in items[:MEMORY_SAMPLE]:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "benchmark": name,
+        "ops": len(items),
+        "ops_per_sec": len(items) / elapsed if elapsed else float("inf"),
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "max_ms": max(latencies),
+        "peak_mem_kb": peak / 1024,
+    }
+
+
+class BenchmarkSuite:
+    """Reproducible benchmarks over a synthetic corpus built from one seed.
+
+    Reports, patients, prescriptions and vitals are generated into a
+    temporary directory; every benchmark reads only from there, so runs
+    on the same seed and scale are comparable across commits.
+    """
+
+    def __init__(self, workdir, reports=200, patients=5000, vitals_per_patient=10, seed=0):
+        self.workdir = workdir
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.db_path = os.path.join(workdir, "bench.db")
+        self.patients = build_database(self.db_path, patients, vitals_per_patient=vitals_per_patient, seed=seed)
+        self.reports = list(generate_reports(reports, seed, self.patients))
+        self.report_paths = write_reports(os.path.join(workdir, "reports"), min(reports, 100), seed)
+        self._processor = None
+
+    @property
+    def processor(self):
+        if self._processor is None:
+            try:
+                from nlp_processor import MedicalNLPProcessor
+                self._processor = MedicalNLPProcessor()
+            except (ImportError, RuntimeError) as e:
+                raise Skipped(f"NLP model unavailable: {e}")
+        return self._processor
+
+    def _medication_lists(self, n):
+        return [[drug for drug, _, _ in self.rng.sample(MEDICATIONS, self.rng.randint(2, 6))] for _ in range(n)]
+
+    # Benchmarks: each returns (function, items)
+    def bench_extract_entities(self):
+        return self.processor.extract_entities, self.reports
+
+    def bench_parse_report(self):
+        from report_parser import MedicalReportParser
+        parser = MedicalReportParser(self.processor)
+        return parser.parse_report, self.report_paths
+
+    def bench_vitals_insights(self):
+        from clinical_insights import ClinicalInsightEngine
+        return ClinicalInsightEngine.analyze_vitals, self.reports
+
+    def bench_predict_interactions(self):
+        from drug_interaction_engine import EnhancedDrugInteractionEngine
+        engine = EnhancedDrugInteractionEngine()
+        conditions = [self.rng.sample(CONDITIONS, 2) for _ in range(500)]
+        return (lambda item: engine.predict_interactions(*item)), list(zip(self._medication_lists(500), conditions))
+
+    def bench_check_interactions(self):
+        from drug_interaction_db import check_interactions
+        return check_interactions, [[m.lower() for m in meds] for meds in self._medication_lists(2000)]
+
+    def bench_patient_search(self):
+        from crypto_service import get_crypto_service, normalize_phone
+        crypto = get_crypto_service()
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        sample = self.rng.sample(self.patients, min(100, len(self.patients)))
+        # Mix of the three ways clinicians search: name, ID prefix, phone
+        terms = [self.rng.choice(FIRST_NAMES) for _ in range(100)] + [p["id"][:10] for p in sample] + [p["phone"] for p in sample]
+
+        def search(term):
+            rows = conn.execute(PATIENT_SEARCH_SQL, (f"%{term}%", f"%{term}%", crypto.blind_index(term, normalize_phone))).fetchall()
+            return crypto.decrypt_many([row[4] for row in rows])
+        return search, terms
+
+    def bench_vitals_query(self):
+        from vitals_analytics import VitalsAnalytics
+        analytics = VitalsAnalytics(self.db_path)
+
+        def load(patient_id):
+            analytics.invalidate(patient_id)  # Measure the query, not the cache
+            return analytics.get(patient_id)
+        return load, [p["id"] for p in self.rng.sample(self.patients, min(500, len(self.patients)))]
+
+    def bench_population_vitals(self):
+        from population_vitals import PopulationVitalsAggregator
+        aggregator = PopulationVitalsAggregator(self.db_path)
+        aggregator.rebuild()
+        return (lambda _: (aggregator.hypertension_by_area(), aggregator.monthly_trends())), list(range(50))
+
+    def names(self):
+        return [name[len("bench_"):] for name in dir(self) if name.startswith("bench_")]
+
+    def run(self, only=None):
+        results = []
+        for name in self.names():
+            if only and name not in only:
+                continue
+            # Per-benchmark stream, so --only selections see the same inputs
+            self.rng = random.Random(f"{self.seed}:{name}")
+            try:
+                func, items = getattr(self, f"bench_{name}")()
+                results.append(measure(name, func, items))
+            except Skipped as e:
+                results.append({"benchmark": name, "skipped": str(e)})
+            except ImportError as e:
+                results.append({"benchmark": name, "skipped": f"Missing dependency: {e.name}"})
+        return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Benchmarks whose p95 grew more than tolerance over the baseline run"""
+    previous = {r["benchmark"]: r for r in baseline if "skipped" not in r}
+    regressions = []
+    for r in results:
+        old = previous.get(r["benchmark"])
+        if old and "skipped" not in r and r["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append((r["benchmark"], old["p95_ms"], r["p95_ms"]))
+    return regressions
+
+
+def format_table(results):
+    header = f"{'benchmark':<22}{'ops':>7}{'ops/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KB':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        if "skipped" in r:
+            lines.append(f"{r['benchmark']:<22}  skipped: {r['skipped']}")
+        else:
+            lines.append(f"{r['benchmark']:<22}{r['ops']:>7}{r['ops_per_sec']:>11.1f}{r['p50_ms']:>10.3f}"
+                         f"{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['peak_mem_kb']:>10.0f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the NLP, interaction and database hot paths")
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--vitals-per-patient", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="Benchmarks to run (default: all)")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run; exit 1 on p95 regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    # Synthetic data only: a throwaway key if none is configured
+    if not os.getenv("ENCRYPTION_KEY"):
+        from cryptography.fernet import Fernet
+        os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+    with tempfile.TemporaryDirectory(prefix="medai-bench-") as workdir:
+        started = time.perf_counter()
+        suite = BenchmarkSuite(workdir, args.reports, args.patients, args.vitals_per_patient, args.seed)
+        print(f"Synthetic corpus ready in {time.perf_counter() - started:.1f}s "
+              f"({args.reports} reports, {args.patients} patients, seed {args.seed})\n")
+        results = suite.run(args.only)
+    print(format_table(results))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seed": args.seed, "reports": args.reports, "patients": args.patients, "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: p95 {old:.3f} ms -> {new:.3f} ms")
+        if regressions:
+            raise SystemExit(1)
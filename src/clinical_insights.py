@@ -1,43 +1,75 @@
 import re
+from guideline_rules import get_guideline_engine
+from instrumentation import timed
+
+# Alert levels in the compiled guidelines (data/indian_guidelines.py)
+HYPERTENSION_ALERT = "Stage 2"
+DIABETES_ALERT = "Diabetes"
 
 class ClinicalInsightEngine:
+    BP_PATTERN = re.compile(r'BP:\s*(\d+)/(\d+)\s*mmHg', re.IGNORECASE)
+    GLUCOSE_PATTERN = re.compile(r'(?:fasting glucose|blood sugar):?\s*(\d+)\s*mg/dL', re.IGNORECASE)
+    A1C_PATTERN = re.compile(r'HbA1c:\s*(\d+\.?\d*)%', re.IGNORECASE)
+    CHOL_PATTERN = re.compile(r'Cholesterol:\s*(\d+)\s*mg/dL', re.IGNORECASE)
+
     @staticmethod
-    def analyze_vitals(text):
-        """Analyze vital signs and lab results with clinical insights"""
-        insights = []
+    @timed("vitals.extract")
+    def extract_readings(text):
+        """First BP/glucose/HbA1c/cholesterol value found in the text (None if absent)"""
+        cls = ClinicalInsightEngine
+        bp_match = cls.BP_PATTERN.search(text)
+        glucose_match = cls.GLUCOSE_PATTERN.search(text)
+        a1c_match = cls.A1C_PATTERN.search(text)
+        chol_match = cls.CHOL_PATTERN.search(text)
+        return {
+            "bp": [int(bp_match.group(1)), int(bp_match.group(2))] if bp_match else None,
+            "glucose": int(glucose_match.group(1)) if glucose_match else None,
+            "a1c": float(a1c_match.group(1)) if a1c_match else None,
+            "cholesterol": int(chol_match.group(1)) if chol_match else None
+        }
+
+    @staticmethod
+    def merge_readings(parts):
+        """Combine per-paragraph readings in text order; the first value wins"""
+        merged = {"bp": None, "glucose": None, "a1c": None, "cholesterol": None}
+        for readings in parts:
+            for key, value in readings.items():
+                if merged.get(key) is None:
+                    merged[key] = value
+        return merged
+
+    @staticmethod
+    @timed("vitals.insights")
+    def insights_from_readings(readings):
+        """Flags and recommendations for readings from extract_readings"""
         flags = []
         recommendations = []
+        rules = get_guideline_engine()
         
         # Blood pressure analysis
-        bp_pattern = r'BP:\s*(\d+)/(\d+)\s*mmHg'
-        bp_match = re.search(bp_pattern, text, re.IGNORECASE)
-        if bp_match:
-            systolic = int(bp_match.group(1))
-            diastolic = int(bp_match.group(2))
+        if readings.get("bp"):
+            systolic, diastolic = readings["bp"]
             
-            if systolic >= 140 or diastolic >= 90:
-                stage = "Stage 1" if systolic < 160 and diastolic < 100 else "Stage 2"
+            if (systolic >= rules.threshold("hypertension", "systolic", HYPERTENSION_ALERT)
+                    or diastolic >= rules.threshold("hypertension", "diastolic", HYPERTENSION_ALERT)):
+                stage = rules.classify({"systolic": systolic, "diastolic": diastolic})["hypertension"]
                 flags.append(f"🩸 **Hypertension Alert**: Indicates {stage} hypertension (BP: {systolic}/{diastolic} mmHg)")
                 recommendations.append("→ Lifestyle modification: Reduce salt intake (<5g/day), DASH diet")
                 recommendations.append("→ Consider antihypertensive: Amlodipine 5mg OD or Telmisartan 40mg OD")
                 recommendations.append("→ Monitor BP weekly for 4 weeks")
         
         # Glucose analysis
-        glucose_pattern = r'(?:fasting glucose|blood sugar):?\s*(\d+)\s*mg/dL'
-        glucose_match = re.search(glucose_pattern, text, re.IGNORECASE)
-        if glucose_match:
-            glucose = int(glucose_match.group(1))
-            if glucose > 125:
+        glucose = readings.get("glucose")
+        if glucose is not None:
+            if glucose >= rules.threshold("diabetes", "glucose", DIABETES_ALERT):
                 flags.append(f"🩺 **Diabetes Alert**: Fasting glucose elevated ({glucose} mg/dL) - suggests possible type 2 diabetes")
                 recommendations.append("→ Confirm with HbA1c test and post-prandial glucose")
                 recommendations.append("→ Initial management: Metformin 500mg BD with meals")
         
         # HbA1c analysis
-        a1c_pattern = r'HbA1c:\s*(\d+\.?\d*)%'
-        a1c_match = re.search(a1c_pattern, text, re.IGNORECASE)
-        if a1c_match:
-            a1c = float(a1c_match.group(1))
-            if a1c >= 6.5:
+        a1c = readings.get("a1c")
+        if a1c is not None:
+            if a1c >= rules.threshold("diabetes", "hba1c", DIABETES_ALERT):
                 flags.append(f"⚠️ **Diabetes Confirmed**: HbA1c level ({a1c}%) indicates diabetes")
                 recommendations.append("→ Initiate pharmacotherapy: Metformin 500mg BD")
                 recommendations.append("→ Schedule screenings: Retinal exam, foot examination, renal function test")
@@ -46,10 +78,8 @@ class ClinicalInsightEngine:
                 recommendations.append("→ Intensive lifestyle intervention: 7% weight loss, 150 min/week exercise")
         
         # Lipid profile analysis
-        chol_pattern = r'Cholesterol:\s*(\d+)\s*mg/dL'
-        chol_match = re.search(chol_pattern, text, re.IGNORECASE)
-        if chol_match:
-            cholesterol = int(chol_match.group(1))
+        cholesterol = readings.get("cholesterol")
+        if cholesterol is not None:
             if cholesterol > 200:
                 flags.append(f"🫀 **Hyperlipidemia Alert**: Elevated cholesterol ({cholesterol} mg/dL)")
                 recommendations.append("→ Initiate statin therapy: Atorvastatin 10mg OD")
@@ -61,6 +91,11 @@ class ClinicalInsightEngine:
             "recommendations": recommendations
         }
 
+    @staticmethod
+    def analyze_vitals(text):
+        """Analyze vital signs and lab results with clinical insights"""
+        return ClinicalInsightEngine.insights_from_readings(ClinicalInsightEngine.extract_readings(text))
+
     @staticmethod
     def generate_clinical_summary(entities, text):
         """Generate comprehensive clinical summary"""
@@ -1,21 +1,21 @@
 import re
+import sqlite3
+import numpy as np
+import pandas as pd
+from guideline_rules import BASELINE_LABEL, get_guideline_engine
 
 # Existing ClinicalReasoningEngine...
 class ClinicalReasoningEngine:
+    # Thresholds come from the compiled guidelines (self.rules); these are the follow-up actions
     DIAGNOSTIC_CRITERIA = {
         "hypertension": {
-            "stages": [
-                ("Stage 1", (130, 139), (80, 89)),
-                ("Stage 2", (140, 180), (90, 120))
-            ],
             "actions": {
                 "Stage 1": "Lifestyle modifications + 3-month follow-up",
                 "Stage 2": "Pharmacotherapy + monthly monitoring"
             }
         },
         "diabetes": {
-            "fasting_glucose": (126, "mg/dL"),
-            "hba1c": (6.5, "%"),
+            "confirmed": "Diabetes",
             "actions": [
                 "Confirm with repeat testing",
                 "Initiate metformin if HbA1c >7%",
@@ -24,20 +24,79 @@ class ClinicalReasoningEngine:
         }
     }
 
+    # patient_vitals / report field names -> classify_vitals columns
+    VITALS_ALIASES = {"bp_systolic": "systolic", "bp_diastolic": "diastolic", "fasting_glucose": "glucose"}
+
+    def __init__(self, rules=None):
+        self.rules = rules or get_guideline_engine()
+
     def analyze_vitals(self, report_text: str):
-        findings = []
-        
         # Extract clinical data
         data = self._extract_clinical_data(report_text)
         
         # Apply diagnostic criteria
-        if 'bp' in data:
-            findings.extend(self._assess_hypertension(data['bp']))
-        
-        if 'glucose' in data or 'hba1c' in data:
-            findings.extend(self._assess_diabetes(data.get('glucose'), data.get('hba1c')))
-        
-        return self._format_insights(findings)
+        systolic, diastolic = data.get('bp', (None, None))
+        row = self.classify_vitals({
+            "systolic": [systolic], "diastolic": [diastolic],
+            "glucose": [data.get('glucose')], "hba1c": [data.get('hba1c')]
+        }).iloc[0]
+        return self._format_insights(self._findings(row))
+
+    def classify_vitals(self, measurements, formatted=False):
+        """Stage/category columns for structured measurements, computed with NumPy.
+
+        Accepts a DataFrame or dict of arrays with systolic, diastolic,
+        glucose and hba1c columns (patient_vitals names bp_systolic and
+        bp_diastolic also work); missing columns or values give no
+        finding. With formatted=True an 'insights' column holds the
+        markdown that analyze_vitals would produce for each row.
+        """
+        df = pd.DataFrame(measurements).rename(columns=self.VITALS_ALIASES)
+        n = len(df)
+
+        def column(name):
+            return df[name].to_numpy(dtype=float) if name in df else np.full(n, np.nan)
+
+        out = pd.DataFrame({name: column(name) for name in ("systolic", "diastolic", "glucose", "hba1c")},
+                           index=df.index)
+        systolic, diastolic = out["systolic"].to_numpy(), out["diastolic"].to_numpy()
+
+        # Staged on the worse of systolic and diastolic; both readings are required
+        stages = self.rules.classify_frame(out[["systolic", "diastolic"]])["hypertension"].to_numpy()
+        staged = ~np.isnan(systolic) & ~np.isnan(diastolic) & (stages != BASELINE_LABEL)
+        out["hypertension_stage"] = np.where(staged, stages, None)
+        out["hypertension_action"] = out["hypertension_stage"].map(self.DIAGNOSTIC_CRITERIA['hypertension']['actions'])
+
+        diabetes = self.rules.conditions['diabetes']
+        confirmed = diabetes.labels.index(self.DIAGNOSTIC_CRITERIA['diabetes']['confirmed'])
+        out["glucose_alert"] = diabetes.tables['glucose'].rank_many(out["glucose"]) >= confirmed
+        out["hba1c_confirmed"] = diabetes.tables['hba1c'].rank_many(out["hba1c"]) >= confirmed
+        category = np.select([out["hba1c_confirmed"], out["glucose_alert"]], ["Confirmed", "Alert"], default="")
+        out["diabetes_category"] = np.where(category == "", None, category)
+
+        if formatted:
+            out["insights"] = [self._format_insights(self._findings(row)) for _, row in out.iterrows()]
+        return out
+
+    def classify_patient_vitals(self, db_path='patient_db.db'):
+        """classify_vitals over every patient_vitals row"""
+        conn = sqlite3.connect(db_path)
+        df = pd.read_sql_query(
+            "SELECT id, patient_id, date, bp_systolic, bp_diastolic FROM patient_vitals", conn
+        )
+        conn.close()
+        classified = self.classify_vitals(df[["bp_systolic", "bp_diastolic"]])
+        return pd.concat([df[["id", "patient_id", "date"]], classified], axis=1)
+
+    def _findings(self, row):
+        """Markdown findings for one classified row (view layer over classify_vitals)"""
+        findings = []
+        if row["hypertension_stage"]:
+            findings.extend(self._assess_hypertension((int(row["systolic"]), int(row["diastolic"])), row["hypertension_stage"]))
+        if row["glucose_alert"] or row["hba1c_confirmed"]:
+            findings.extend(self._assess_diabetes(row["glucose"] if row["glucose_alert"] else None,
+                                                  row["hba1c"] if row["hba1c_confirmed"] else None))
+        return findings
     
     def _extract_clinical_data(self, text):
         """Extract structured data from text report"""
@@ -60,28 +119,26 @@ class ClinicalReasoningEngine:
         
         return data
     
-    def _assess_hypertension(self, bp):
+    def _assess_hypertension(self, bp, stage):
         systolic, diastolic = bp
         criteria = self.DIAGNOSTIC_CRITERIA['hypertension']
-        
-        for stage, (s_range, d_range) in criteria['stages']:
-            if (s_range[0] <= systolic <= s_range[1]) and (d_range[0] <= diastolic <= d_range[1]):
-                return [
-                    f"🩺 **Hypertension**: {stage} (BP: {systolic}/{diastolic} mmHg)",
-                    f"📋 **Management**: {criteria['actions'][stage]}",
-                    "🔍 **Next Steps**: Check for end-organ damage (retinopathy, proteinuria)"
-                ]
-        return []
+        return [
+            f"🩺 **Hypertension**: {stage} (BP: {systolic}/{diastolic} mmHg)",
+            f"📋 **Management**: {criteria['actions'][stage]}",
+            "🔍 **Next Steps**: Check for end-organ damage (retinopathy, proteinuria)"
+        ]
     
     def _assess_diabetes(self, glucose=None, hba1c=None):
         criteria = self.DIAGNOSTIC_CRITERIA['diabetes']
         findings = []
         
-        if glucose and glucose >= criteria['fasting_glucose'][0]:
-            findings.append(f"🩸 **Diabetes Alert**: Fasting glucose {glucose} mg/dL (Threshold: {criteria['fasting_glucose'][0]})")
+        if glucose:
+            threshold = self.rules.threshold('diabetes', 'glucose', criteria['confirmed'])
+            findings.append(f"🩸 **Diabetes Alert**: Fasting glucose {glucose} mg/dL (Threshold: {threshold:g})")
         
-        if hba1c and hba1c >= criteria['hba1c'][0]:
-            findings.append(f"🧪 **Diabetes Confirmed**: HbA1c {hba1c}% (Diagnostic: ≥{criteria['hba1c'][0]})")
+        if hba1c:
+            threshold = self.rules.threshold('diabetes', 'hba1c', criteria['confirmed'])
+            findings.append(f"🧪 **Diabetes Confirmed**: HbA1c {hba1c}% (Diagnostic: ≥{threshold:g})")
         
         if findings:
             findings.extend([
@@ -106,10 +163,19 @@ class ClinicalReasoningEngine:
 # --- ChennaiClinicalReasoner below ---
 
 from data.indian_guidelines import INDIAN_CLINICAL_GUIDELINES
-from data.tamil_medical_terms import TAMIL_MEDICAL_TERMS
+from red_flag_engine import get_red_flag_detector
+from term_matcher import get_tamil_matcher
 
 class ChennaiClinicalReasoner:
+    def __init__(self, rules=None):
+        # Thresholds come from INDIAN_CLINICAL_GUIDELINES via the shared rule engine
+        self.rules = rules or get_guideline_engine()
+
     def analyze_report(self, text: str):
+        return self._format_report(self.assess(text))
+
+    def assess(self, text: str):
+        """Structured findings (dicts with type, value, action, ...) for a report"""
         # Extract numerical values
         values = self._extract_values(text)
         
@@ -122,7 +188,7 @@ class ChennaiClinicalReasoner:
         findings.extend(self._assess_hypertension(values))
         findings.extend(self._check_red_flags(translated_text))
         
-        return self._format_report(findings)
+        return findings
     
     def _extract_values(self, text: str):
         values = {}
@@ -137,15 +203,12 @@ class ChennaiClinicalReasoner:
         return values
 
     def _translate_tamil(self, text: str):
-        for tamil, english in TAMIL_MEDICAL_TERMS['conditions'].items():
-            text = text.replace(tamil, english)
-        return text
+        return get_tamil_matcher().translate(text, ('conditions',))
     
     def _assess_diabetes(self, values):
-        criteria = INDIAN_CLINICAL_GUIDELINES['diabetes']['diagnosis']
         findings = []
         
-        if 'glucose' in values and values['glucose'] >= criteria['criteria'][0]['threshold']:
+        if 'glucose' in values and self.rules.classify({'glucose': values['glucose']})['diabetes'] == "Diabetes":
             findings.append({
                 "type": "diabetes",
                 "value": f"Fasting glucose: {values['glucose']} mg/dL",
@@ -160,8 +223,8 @@ class ChennaiClinicalReasoner:
         findings = []
         if 'bp' in values:
             sys, dia = values['bp']
-            # Example: Use Indian guidelines for hypertension
-            if sys >= 140 or dia >= 90:
+            # Stage 2 per the Indian guideline staging (≥140/90)
+            if self.rules.classify({'systolic': sys, 'diastolic': dia})['hypertension'] == "Stage 2":
                 findings.append({
                     "type": "hypertension",
                     "value": f"BP: {sys}/{dia} mmHg",
@@ -172,21 +235,16 @@ class ChennaiClinicalReasoner:
         return findings
 
     def _check_red_flags(self, text):
-        red_flags = {
-            "dengue": ["platelet <100,000", "fever >4 days"],
-            "mi": ["chest pain", "st elevation"]
-        }
-        
         findings = []
-        for condition, flags in red_flags.items():
-            if any(f in text for f in flags):
-                findings.append({
-                    "type": "red_flag",
-                    "condition": condition,
-                    "urgency": "emergency" if condition == "mi" else "urgent",
-                    "action": f"Refer to {'cardiology' if condition == 'mi' else 'general medicine'} immediately"
-                })
-        
+        for hit in get_red_flag_detector().detect(text):
+            findings.append({
+                "type": "red_flag",
+                "condition": hit["condition"],
+                "value": hit["evidence"],
+                "interpretation": f"{hit['urgency'].title()} red flag ({hit['condition'].replace('_', ' ')})",
+                "urgency": hit["urgency"],
+                "action": hit["action"]
+            })
         return findings
 
     def _format_report(self, findings):
@@ -0,0 +1,160 @@
+import hashlib
+import hmac
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+# Values below this count are processed inline; thread start-up costs more
+# than the crypto itself for small listings.
+PARALLEL_THRESHOLD = 2000
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class CryptoService:
+    """Fernet encryption with key rotation and bulk helpers for patient fields"""
+
+    def __init__(self, primary_key, old_keys: Sequence = (), max_workers: Optional[int] = None,
+                 index_key=None):
+        keys = [primary_key] + [k for k in old_keys if k]
+        # First key encrypts, all keys are tried for decryption
+        self.fernet = MultiFernet([Fernet(self._as_bytes(k)) for k in keys])
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1))
+        # Blind indexes must survive Fernet key rotation, so prefer a dedicated key
+        if index_key:
+            self.index_key = self._as_bytes(index_key)
+        else:
+            self.index_key = hmac.new(self._as_bytes(primary_key), b"blind-index", hashlib.sha256).digest()
+
+    @staticmethod
+    def _as_bytes(key):
+        return key if isinstance(key, bytes) else key.strip().encode()
+
+    @classmethod
+    def from_env(cls):
+        """Build the service from ENCRYPTION_KEY (+ ENCRYPTION_OLD_KEYS, comma separated)"""
+        primary = os.getenv("ENCRYPTION_KEY")
+        if not primary:
+            raise RuntimeError("ENCRYPTION_KEY not set in environment")
+        old_keys = [k for k in os.getenv("ENCRYPTION_OLD_KEYS", "").split(",") if k.strip()]
+        return cls(primary, old_keys, index_key=os.getenv("BLIND_INDEX_KEY"))
+
+    # Single values
+    def encrypt(self, value):
+        if value is None:
+            return None
+        return self.fernet.encrypt(str(value).encode()).decode()
+
+    def decrypt(self, token):
+        if token is None:
+            return None
+        if isinstance(token, str):
+            token = token.encode()
+        return self.fernet.decrypt(token).decode()
+
+    def rotate(self, token):
+        """Re-encrypt a token under the primary key"""
+        if token is None:
+            return None
+        if isinstance(token, str):
+            token = token.encode()
+        return self.fernet.rotate(token).decode()
+
+    # Bulk values
+    def encrypt_many(self, values: Iterable, parallel: Optional[bool] = None) -> List:
+        return self._map(self.encrypt, list(values), parallel)
+
+    def decrypt_many(self, tokens: Iterable, parallel: Optional[bool] = None, skip_invalid: bool = False) -> List:
+        """Decrypt in bulk; with skip_invalid, undecryptable tokens become None"""
+        return self._map(self._decrypt_or_none if skip_invalid else self.decrypt, list(tokens), parallel)
+
+    def _decrypt_or_none(self, token):
+        try:
+            return self.decrypt(token)
+        except InvalidToken:
+            return None
+
+    def rotate_many(self, tokens: Iterable, parallel: Optional[bool] = None) -> List:
+        return self._map(self.rotate, list(tokens), parallel)
+
+    def _map(self, func, items: List, parallel: Optional[bool]) -> List:
+        if parallel is None:
+            parallel = len(items) >= PARALLEL_THRESHOLD
+        if not parallel or self.max_workers <= 1:
+            return [func(item) for item in items]
+
+        # Chunk so each task amortizes executor overhead over many values
+        chunks = [items[i:i + DEFAULT_CHUNK_SIZE] for i in range(0, len(items), DEFAULT_CHUNK_SIZE)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda chunk: [func(item) for item in chunk], chunks)
+            return [value for chunk in results for value in chunk]
+
+    # Blind indexes (deterministic, equality search only)
+    def blind_index(self, value, normalizer=None):
+        if value is None:
+            return None
+        value = normalizer(value) if normalizer else str(value)
+        return hmac.new(self.index_key, value.encode(), hashlib.sha256).hexdigest()
+
+    def blind_index_many(self, values: Iterable, normalizer=None) -> List:
+        return [self.blind_index(v, normalizer) for v in values]
+
+    def decrypt_columns(self, df, columns: Sequence[str], parallel: Optional[bool] = None):
+        """Return a copy of a DataFrame with only the given columns decrypted"""
+        df = df.copy()
+        for column in columns:
+            df[column] = self.decrypt_many(df[column].tolist(), parallel)
+        return df
+
+    def lazy_column(self, tokens: Iterable):
+        return LazyDecryptedColumn(self, tokens)
+
+
+def normalize_phone(phone) -> str:
+    """Canonical +91 form, mirroring PatientDB.create_patient"""
+    phone = re.sub(r"[\s\-().]", "", str(phone))
+    if phone.startswith("+91"):
+        return phone
+    if phone.startswith("0091"):
+        return "+" + phone[2:]
+    if len(phone) == 12 and phone.startswith("91"):
+        return "+" + phone
+    # Drop the domestic trunk prefix (09876543210 -> +919876543210)
+    return "+91" + phone.lstrip("0")
+
+
+class LazyDecryptedColumn:
+    """Encrypted column that only decrypts the values that are actually read"""
+
+    def __init__(self, service: CryptoService, tokens: Iterable):
+        self.service = service
+        self.tokens = list(tokens)
+        self._plain = {}
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __getitem__(self, index):
+        if index not in self._plain:
+            self._plain[index] = self.service.decrypt(self.tokens[index])
+        return self._plain[index]
+
+    def __iter__(self):
+        for i in range(len(self.tokens)):
+            yield self[i]
+
+    def materialize(self, parallel: Optional[bool] = None) -> List:
+        """Decrypt every remaining value in bulk"""
+        missing = [i for i in range(len(self.tokens)) if i not in self._plain]
+        for i, value in zip(missing, self.service.decrypt_many([self.tokens[i] for i in missing], parallel)):
+            self._plain[i] = value
+        return [self._plain[i] for i in range(len(self.tokens))]
+
+
+@lru_cache(maxsize=1)
+def get_crypto_service() -> CryptoService:
+    """Process-wide service; keys are read from the environment once"""
+    return CryptoService.from_env()
@@ -0,0 +1,73 @@
+# Literal phrases match case-insensitively; numeric patterns put the reading
+# where {value} is and flag it above/below the given bounds. A written
+# comparator counts too, e.g. "platelets <100,000" or "fever >4 days".
+# A rule whose pattern has {unit} lists the units it accepts with the factor
+# converting them to the unit of its bounds; "unitless" scales bare readings
+# by magnitude (Indian reports often write platelets as "1.5" meaning lakhs).
+# Phrases are ignored when negated earlier in the clause ("denies chest pain").
+RED_FLAG_CATALOGUE = [
+    {
+        "condition": "mi",
+        "urgency": "emergency",
+        "action": "Refer to cardiology immediately",
+        "phrases": ["chest pain", "st elevation", "st-elevation", "stemi", "crushing chest pain"],
+        "numeric": [
+            {"measure": "Troponin I", "pattern": r"troponin(?:\s*i)?\s*[:=]?\s*{value}", "above": 0.04}
+        ]
+    },
+    {
+        "condition": "stroke",
+        "urgency": "emergency",
+        "action": "Activate stroke pathway; CT brain within 25 minutes",
+        "phrases": ["facial droop", "slurred speech", "sudden weakness", "hemiparesis"],
+        "numeric": []
+    },
+    {
+        "condition": "hypertensive_crisis",
+        "urgency": "emergency",
+        "action": "Refer to emergency for IV antihypertensives",
+        "phrases": ["hypertensive emergency"],
+        "numeric": [
+            {"measure": "Systolic BP", "pattern": r"BP\s*[:=]?\s*{value}\s*/\s*\d+", "above": 179}
+        ]
+    },
+    {
+        "condition": "hypoxia",
+        "urgency": "emergency",
+        "action": "Start oxygen and refer to emergency",
+        "phrases": [],
+        "numeric": [
+            {"measure": "SpO2", "pattern": r"(?:SpO2|oxygen saturation|sats?)\s*[:=]?\s*{value}\s*%", "below": 90}
+        ]
+    },
+    {
+        "condition": "dengue",
+        "urgency": "urgent",
+        "action": "Refer to general medicine immediately",
+        "phrases": ["bleeding gums", "petechiae"],
+        "numeric": [
+            {
+                "measure": "Platelets (/µL)",
+                "pattern": r"platelets?(?:\s*count)?\s*(?:of|[:=])?\s*{value}{unit}",
+                "below": 100000,
+                "units": [
+                    {"pattern": r"lakhs?|lacs?", "factor": 100000},
+                    {"pattern": r"[x×*]\s*10\s*\^?\s*3(?:\s*/\s*(?:[uµ]l|mm3|cumm))?", "factor": 1000},
+                    {"pattern": r"[x×*]\s*10\s*\^?\s*9\s*/\s*l\b", "factor": 1000},
+                    {"pattern": r"/\s*(?:cumm|mm3|[uµ]l)\b", "factor": 1}
+                ],
+                "unitless": [{"below": 20, "factor": 100000}, {"below": 1000, "factor": 1000}]
+            },
+            {"measure": "Fever duration (days)", "pattern": r"fever\s*(?:for|since|x)?\s*{value}\s*days?", "above": 4}
+        ]
+    },
+    {
+        "condition": "diabetic_emergency",
+        "urgency": "urgent",
+        "action": "Check ketones and refer to emergency",
+        "phrases": ["ketoacidosis", "dka"],
+        "numeric": [
+            {"measure": "Blood glucose", "pattern": r"(?:glucose|sugar)\s*[:=]?\s*{value}\s*mg/dL", "above": 400, "below": 54}
+        ]
+    }
+]
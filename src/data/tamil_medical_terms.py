@@ -12,5 +12,10 @@ TAMIL_MEDICAL_TERMS = {
     "symptoms": {
         "தலைவலி": "headache",
         "காய்ச்சல்": "fever"
+    },
+    "body_parts": {
+        "இதயம்": "heart",
+        "கல்லீரல்": "liver",
+        "சிறுநீரகம்": "kidney"
     }
 }
\ No newline at end of file
@@ -0,0 +1,120 @@
+import re
+import sqlite3
+from bisect import bisect_left
+import pandas as pd
+
+UNIT_PATTERN = r"mg|g|ml|mcg|IU|tablets?|drops|puffs|doses?"
+# Concentrations and rates ("126 mg/dL", "5 ml/hr") are lab values, not doses
+NOT_PER_UNIT = r"(?!\s*/\s*\w)"
+DOSAGE_PATTERN = re.compile(rf"\b(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>{UNIT_PATTERN})\b{NOT_PER_UNIT}", re.IGNORECASE)
+# "Metformin 500mg", "Amlodipine 5 mg OD" as stored in prescriptions
+PRESCRIPTION_PATTERN = rf"^\s*(?P<medication>[^\d]*?)\s*(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>{UNIT_PATTERN})\b{NOT_PER_UNIT}"
+
+# unit -> (canonical unit, factor)
+UNITS = {
+    "mcg": ("mg", 0.001),
+    "mg": ("mg", 1.0),
+    "g": ("mg", 1000.0),
+    "ml": ("ml", 1.0),
+    "iu": ("IU", 1.0),
+    "tablet": ("tablet", 1.0),
+    "tablets": ("tablet", 1.0),
+    "drops": ("drop", 1.0),
+    "puffs": ("puff", 1.0),
+    "dose": ("dose", 1.0),
+    "doses": ("dose", 1.0),
+}
+# Dose mentions further than this from any medication stay unassigned
+MAX_MEDICATION_DISTANCE = 80
+
+
+def canonicalize(value, unit):
+    """(canonical_value, canonical_unit) for a parsed amount, e.g. (0.5, 'g') -> (500.0, 'mg')"""
+    canonical_unit, factor = UNITS[unit.lower()]
+    return value * factor, canonical_unit
+
+
+def _nearest_medication(start, end, med_starts, med_ends, med_texts):
+    """Closest medication mention, preferring one just before the dose"""
+    best, best_gap = None, MAX_MEDICATION_DISTANCE + 1
+    i = bisect_left(med_starts, start)
+    if i > 0 and start - med_ends[i - 1] < best_gap:
+        best, best_gap = med_texts[i - 1], start - med_ends[i - 1]
+    if i < len(med_starts) and med_starts[i] - end < best_gap:
+        best = med_texts[i]
+    return best
+
+
+def extract_dosages(text, spans=None):
+    """Structured dose records found in free text.
+
+    Each record has the mention offsets, parsed value and unit, the value in
+    canonical units (mg, ml, IU or a count) and, when EntitySpans are given,
+    the nearest medication mention.
+    """
+    meds = [(s, e, t) for s, e, c, t in zip(spans.start, spans.end, spans.category, spans.text)
+            if c == "MEDICATIONS"] if spans is not None else []
+    med_starts = [m[0] for m in meds]
+    med_ends = [m[1] for m in meds]
+    med_texts = [m[2] for m in meds]
+
+    records = []
+    for match in DOSAGE_PATTERN.finditer(text):
+        value = float(match.group("value"))
+        canonical_value, canonical_unit = canonicalize(value, match.group("unit"))
+        records.append({
+            "start": match.start(),
+            "end": match.end(),
+            "text": match.group(),
+            "value": value,
+            "unit": match.group("unit"),
+            "canonical_value": canonical_value,
+            "canonical_unit": canonical_unit,
+            "medication": _nearest_medication(match.start(), match.end(), med_starts, med_ends, med_texts)
+        })
+    return records
+
+
+def extract_dosages_batch(texts, spans_list=None):
+    spans_list = spans_list or [None] * len(texts)
+    return [extract_dosages(text, spans) for text, spans in zip(texts, spans_list)]
+
+
+def parse_dosage_lines(lines):
+    """Vectorized parse of "<medication> <amount><unit>" lines.
+
+    Takes a Series (or list) of prescription strings and returns a
+    DataFrame aligned to its index with medication, value, unit,
+    canonical_value and canonical_unit; unparseable lines are NaN.
+    """
+    lines = pd.Series(lines, dtype="string")
+    parsed = lines.str.extract(PRESCRIPTION_PATTERN, flags=re.IGNORECASE)
+    parsed["medication"] = parsed["medication"].str.strip().replace("", pd.NA)
+    parsed["value"] = pd.to_numeric(parsed["value"])
+    unit_key = parsed["unit"].str.lower()
+    factors = pd.Series({unit: factor for unit, (_, factor) in UNITS.items()})
+    canonical = pd.Series({unit: name for unit, (name, _) in UNITS.items()})
+    parsed["canonical_value"] = parsed["value"] * unit_key.map(factors)
+    parsed["canonical_unit"] = unit_key.map(canonical)
+    return parsed
+
+
+def prescription_doses(db_path='patient_db.db', chunk_size=100000):
+    """Yield parsed prescription dose frames for reconciliation, one chunk at a time"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        last_rowid = 0
+        while True:
+            chunk = pd.read_sql_query(
+                "SELECT rowid AS row_id, patient_id, medication, dosage FROM prescriptions WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                conn, params=(last_rowid, chunk_size)
+            )
+            if chunk.empty:
+                return
+            last_rowid = int(chunk["row_id"].iloc[-1])
+            # The dosage column holds the amount ("500mg"); the name comes from its own column
+            doses = parse_dosage_lines(chunk["dosage"].fillna(""))
+            doses["medication"] = chunk["medication"]
+            yield pd.concat([chunk[["patient_id", "dosage"]], doses], axis=1)
+    finally:
+        conn.close()
@@ -4,11 +4,8 @@ from datetime import datetime, timedelta
 import uuid
 import json
 import pandas as pd
-from cryptography.fernet import Fernet
-
-# Initialize encryption
-ENCRYPTION_KEY = Fernet.generate_key()  # In production, store this securely
-cipher_suite = Fernet(ENCRYPTION_KEY)
+from crypto_service import get_crypto_service
+from instrumentation import timed
 
 # Comprehensive medication database
 DRUG_DATABASE = {
@@ -169,17 +166,18 @@ def init_db():
     conn.commit()
     conn.close()
 
-# Encrypt sensitive data
+# Encrypt sensitive data (shared key with patient_database)
 def encrypt_data(data):
-    return cipher_suite.encrypt(data.encode()).decode()
+    return get_crypto_service().encrypt(data)
 
 # Decrypt data
 def decrypt_data(encrypted_data):
-    return cipher_suite.decrypt(encrypted_data.encode()).decode()
+    return get_crypto_service().decrypt(encrypted_data)
 
 # Initialize database on import
 init_db()
 
+@timed("interactions.check")
 def check_interactions(medications):
     """Check for interactions with detailed risk information"""
     interactions_found = []
@@ -2,6 +2,7 @@ import re
 import json
 import os # Added import for os module
 from typing import List, Dict
+from instrumentation import timed
 
 class DrugInteractionEngine:
     def __init__(self):
@@ -45,6 +46,7 @@ class DrugInteractionEngine:
             }
         ]
     
+    @timed("interactions.predict")
     def predict_interactions(self, drugs: List[str], patient_conditions: List[str] = []):
         """Predict interactions based on pharmacological principles"""
         results = []
@@ -110,15 +112,20 @@ class EnhancedDrugInteractionEngine:
     def _load_tamil_terms(self):
         from data.tamil_medical_terms import TAMIL_MEDICAL_TERMS
         return TAMIL_MEDICAL_TERMS
+
+    @property
+    def tamil_matcher(self):
+        from term_matcher import get_tamil_matcher
+        return get_tamil_matcher()
     
     def normalize_drug_name(self, name: str) -> str:
         """Convert brand/Tamil names to generic names"""
         name = name.lower()
         
         # Check Tamil terms first
-        for tamil, english in self.tamil_terms['medications'].items():
-            if tamil in name:
-                return english
+        tamil = self.tamil_matcher.first(name, 'medications')
+        if tamil:
+            return tamil
         
         # Check brand names
         for drug in self.drug_db.values():
@@ -127,6 +134,7 @@ class EnhancedDrugInteractionEngine:
         
         return name
     
+    @timed("interactions.predict")
     def predict_interactions(self, drugs: List[str], patient_conditions: List[str] = []):
         normalized_drugs = [self.normalize_drug_name(d) for d in drugs]
         valid_drugs = [d for d in normalized_drugs if d in self.drug_db]
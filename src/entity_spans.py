@@ -0,0 +1,121 @@
+import html
+import re
+from bisect import bisect_right
+from collections import Counter
+
+# Model/ruler labels -> result categories used across the app
+LABEL_CATEGORIES = {
+    "DISEASE": "CONDITIONS",
+    "CHEMICAL": "MEDICATIONS",
+    "DOSAGE": "DOSAGES",
+    "BODY_PART": "BODY_PARTS",
+    "PROCEDURE": "PROCEDURES",
+}
+CATEGORIES = ["CONDITIONS", "MEDICATIONS", "DOSAGES", "BODY_PARTS", "PROCEDURES"]
+COLUMNS = ["start", "end", "category", "text", "norm", "section"]
+
+
+def normalize_term(term):
+    return re.sub(r"\s+", " ", term).strip().lower()
+
+
+class EntitySpans:
+    """Columnar entity mentions with character offsets into the source text.
+
+    Every mention is kept, in text order; dedup and frequency are computed
+    on demand, so callers can highlight, attribute to sections or diff
+    against a previous analysis without rescanning the text.
+    """
+
+    def __init__(self, start=None, end=None, category=None, text=None, norm=None, section=None):
+        self.start = list(start or [])
+        self.end = list(end or [])
+        self.category = list(category or [])
+        self.text = list(text or [])
+        self.norm = list(norm or [])
+        self.section = list(section or [None] * len(self.start))
+
+    @classmethod
+    def from_tuples(cls, mentions):
+        """Build from (start, end, label, text) tuples; unknown labels are dropped"""
+        rows = sorted(
+            (start, end, LABEL_CATEGORIES[label], text)
+            for start, end, label, text in mentions if label in LABEL_CATEGORIES
+        )
+        spans = cls()
+        for start, end, category, text in rows:
+            spans.start.append(start)
+            spans.end.append(end)
+            spans.category.append(category)
+            spans.text.append(text)
+            spans.norm.append(normalize_term(text))
+            spans.section.append(None)
+        return spans
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(data.get(column) for column in COLUMNS))
+
+    def to_dict(self):
+        return {column: getattr(self, column) for column in COLUMNS}
+
+    def __len__(self):
+        return len(self.start)
+
+    def rows(self):
+        return zip(self.start, self.end, self.category, self.text, self.norm, self.section)
+
+    def shifted(self, offset):
+        """Copy with all offsets moved by `offset` (for re-assembling pieces)"""
+        return EntitySpans([s + offset for s in self.start], [e + offset for e in self.end],
+                           self.category, self.text, self.norm, self.section)
+
+    @classmethod
+    def concat(cls, parts):
+        merged = cls()
+        for part in parts:
+            for column in COLUMNS:
+                getattr(merged, column).extend(getattr(part, column))
+        return merged
+
+    # On-demand views
+    def unique(self, category):
+        """Distinct surface forms of a category in first-seen order"""
+        seen = {}
+        for cat, text, norm in zip(self.category, self.text, self.norm):
+            if cat == category and norm not in seen:
+                seen[norm] = text
+        return list(seen.values())
+
+    def by_category(self):
+        """Legacy {CATEGORY: [unique terms]} view used by extract_entities"""
+        return {category: self.unique(category) for category in CATEGORIES}
+
+    def counts(self):
+        """{(category, norm): occurrences}"""
+        return Counter(zip(self.category, self.norm))
+
+    def assign_sections(self, boundaries):
+        """Label each mention with its section from sorted [(offset, name)] boundaries"""
+        offsets = [offset for offset, _ in boundaries]
+        self.section = []
+        for start in self.start:
+            i = bisect_right(offsets, start)
+            self.section.append(boundaries[i - 1][1] if i else None)
+        return self
+
+    def highlight_html(self, source, color_map):
+        """Single pass over the text wrapping each mention in a coloured span"""
+        out = []
+        cursor = 0
+        for start, end, category in zip(self.start, self.end, self.category):
+            if start < cursor:
+                continue  # Overlaps a mention already highlighted
+            out.append(html.escape(source[cursor:start]))
+            out.append(
+                f"<span style='background-color: {color_map.get(category, '#DDDDDD')}; padding: 2px; "
+                f"border-radius: 4px; font-weight: bold'>{html.escape(source[start:end])}</span>"
+            )
+            cursor = end
+        out.append(html.escape(source[cursor:]))
+        return "".join(out)
@@ -0,0 +1,181 @@
+import re
+import sqlite3
+from bisect import bisect_right
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from data.indian_guidelines import INDIAN_CLINICAL_GUIDELINES
+
+# Guideline test names -> measure columns
+TEST_MEASURES = {
+    "fasting glucose": "glucose",
+    "glucose": "glucose",
+    "hba1c": "hba1c",
+    "systolic": "systolic",
+    "diastolic": "diastolic",
+}
+BASELINE_LABEL = "Normal"
+
+
+class ThresholdTable:
+    """Sorted lower bounds for one measure; a value's rank is the last bound it reaches"""
+
+    def __init__(self, measure, bounds):
+        # bounds: [(threshold, rank, source)]
+        bounds = sorted(bounds, key=lambda b: b[0])
+        self.measure = measure
+        self.thresholds = [b[0] for b in bounds]
+        self.ranks = [0] + [b[1] for b in bounds]
+        self.sources = [None] + [b[2] for b in bounds]
+        self._thresholds = np.asarray(self.thresholds, dtype=float)
+        self._ranks = np.asarray(self.ranks)
+
+    def rank(self, value):
+        if value is None or value != value:
+            return -1
+        return self.ranks[bisect_right(self.thresholds, value)]
+
+    def rank_many(self, values):
+        """Vectorized rank; -1 where the value is missing"""
+        values = np.asarray(values, dtype=float)
+        ranks = self._ranks[np.searchsorted(self._thresholds, values, side="right")]
+        return np.where(np.isnan(values), -1, ranks)
+
+
+class ConditionRules:
+    """Ordered severity labels for a condition plus a threshold table per measure"""
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.tables = {}
+
+    def label_index(self, label):
+        if label not in self.labels:
+            self.labels.append(label)
+        return self.labels.index(label)
+
+
+def _hypertension_bounds(staging):
+    """'130-139/80-89 mmHg' style staging -> systolic and diastolic lower bounds"""
+    bounds = {"systolic": [], "diastolic": []}
+    for key, value in staging.items():
+        match = re.search(r"(\d+)(?:-\d+)?/(\d+)", value)
+        if match:
+            label = re.sub(r"stage\s*(\d+)", r"Stage \1", key, flags=re.I)
+            bounds["systolic"].append((float(match.group(1)), label))
+            bounds["diastolic"].append((float(match.group(2)), label))
+    return bounds
+
+
+def compile_guidelines(guidelines):
+    """{condition: ConditionRules} from guideline dicts.
+
+    Understands the diagnosis criteria and staging strings used in
+    data/indian_guidelines.py, and a generic form for new files:
+    {"thresholds": {measure: [{"min": 5.7, "label": "Pre-diabetes", "source": ...}]}}
+    Labels rank by severity in the order their thresholds rise.
+    """
+    conditions = {}
+    for name, guideline in guidelines.items():
+        rules = ConditionRules(name, [BASELINE_LABEL])
+        bounds = {}
+        for criterion in guideline.get("diagnosis", {}).get("criteria", []):
+            measure = TEST_MEASURES.get(criterion["test"].lower())
+            if measure:
+                bounds.setdefault(measure, []).append(
+                    (float(criterion["threshold"]), name.title(), criterion.get("source"))
+                )
+        for measure, entries in _hypertension_bounds(guideline.get("staging", {})).items():
+            if entries:
+                bounds.setdefault(measure, []).extend((value, label, None) for value, label in entries)
+        for measure, entries in guideline.get("thresholds", {}).items():
+            bounds.setdefault(measure, []).extend(
+                (float(e["min"]), e["label"], e.get("source")) for e in entries
+            )
+        for _, label, _ in sorted((b for entries in bounds.values() for b in entries), key=lambda b: b[0]):
+            rules.label_index(label)
+        for measure, entries in bounds.items():
+            rules.tables[measure] = ThresholdTable(
+                measure, [(value, rules.label_index(label), source) for value, label, source in entries]
+            )
+        if rules.tables:
+            conditions[name] = rules
+    return conditions
+
+
+class GuidelineRuleEngine:
+    """Classifies lab values and vitals against compiled guideline thresholds.
+
+    A condition's category is the most severe one reached by any of its
+    measures (e.g. hypertension stage from systolic or diastolic).
+    """
+
+    def __init__(self, guidelines=None):
+        self.guidelines = dict(guidelines or INDIAN_CLINICAL_GUIDELINES)
+        self.conditions = compile_guidelines(self.guidelines)
+
+    def add_guidelines(self, guidelines):
+        """Merge another guideline file; its conditions replace same-named ones"""
+        self.guidelines.update(guidelines)
+        self.conditions = compile_guidelines(self.guidelines)
+
+    def measures(self):
+        return sorted({m for rules in self.conditions.values() for m in rules.tables})
+
+    def threshold(self, condition, measure, label):
+        """Lowest value of a measure that reaches label (or worse); None if no guideline sets one"""
+        rules = self.conditions.get(condition)
+        table = rules.tables.get(measure) if rules else None
+        if table is None or label not in rules.labels:
+            return None
+        rank = rules.labels.index(label)
+        return min((t for t, r in zip(table.thresholds, table.ranks[1:]) if r >= rank), default=None)
+
+    def classify(self, values):
+        """{condition: label or None} for one set of measurements"""
+        results = {}
+        for name, rules in self.conditions.items():
+            rank = max((table.rank(values.get(measure)) for measure, table in rules.tables.items()), default=-1)
+            results[name] = rules.labels[rank] if rank >= 0 else None
+        return results
+
+    def classify_frame(self, df):
+        """Category column per condition for a DataFrame of measure columns"""
+        out = pd.DataFrame(index=df.index)
+        for name, rules in self.conditions.items():
+            rank = np.full(len(df), -1)
+            for measure, table in rules.tables.items():
+                if measure in df:
+                    rank = np.maximum(rank, table.rank_many(df[measure]))
+            labels = np.asarray(rules.labels + [None], dtype=object)
+            # -1 picks the trailing None; object dtype keeps it None (not NaN) like classify
+            out[name] = pd.Series(labels[rank], index=df.index, dtype=object)
+        return out
+
+
+@lru_cache(maxsize=1)
+def get_guideline_engine():
+    """Shared engine over the bundled Indian guidelines"""
+    return GuidelineRuleEngine()
+
+
+def latest_vitals(db_path='patient_db.db'):
+    """Most recent BP reading per patient, as measure columns for classify_frame"""
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query(
+        """SELECT v.patient_id, v.date, v.bp_systolic AS systolic, v.bp_diastolic AS diastolic
+           FROM patient_vitals v
+           JOIN (SELECT patient_id, MAX(date) AS date FROM patient_vitals GROUP BY patient_id) latest
+             ON latest.patient_id = v.patient_id AND latest.date = v.date""",
+        conn
+    )
+    conn.close()
+    return df.drop_duplicates("patient_id", keep="last").reset_index(drop=True)
+
+
+def audit_latest(db_path='patient_db.db', engine=None):
+    """Re-classify every patient's latest readings against the current guidelines"""
+    engine = engine or get_guideline_engine()
+    df = latest_vitals(db_path)
+    return pd.concat([df, engine.classify_frame(df)], axis=1)
@@ -0,0 +1,193 @@
+import functools
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from metrics import LATENCY_BUCKETS_MS, get_collector
+
+# Fraction of traces (or untraced calls) that are timed; the rest run bare
+SAMPLE_RATE = float(os.getenv("INSTRUMENTATION_SAMPLE_RATE", "1.0"))
+PROMETHEUS_METRIC = "medai_stage_duration_seconds"
+_SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+NOT\s+EXISTS)?)\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+
+# Trace of the current request (contextvars keep asyncio requests apart)
+_current_trace = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Stages timed during one request, in start order with nesting depth"""
+
+    def __init__(self, name, sampled=True):
+        self.name = name
+        self.sampled = sampled
+        self.start_ns = time.perf_counter_ns()
+        self.depth = 0
+        self.stages = []   # [name, start offset ms, duration ms, depth]
+        self.total_ms = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "total_ms": self.total_ms,
+            "stages": [{"stage": name, "start_ms": round(start, 3), "duration_ms": round(duration, 3), "depth": depth}
+                       for name, start, duration, depth in self.stages]
+        }
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "total_ns")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ns = 0
+
+
+class Instrumentation:
+    """Monotonic per-stage timers with cumulative histograms and request traces.
+
+    Each timed stage updates an in-process histogram (exported as
+    Prometheus text), forwards the duration to the metrics collector for
+    the monitoring dashboard, and is appended to the active Trace if one
+    is open. Until metrics.configure() is called only traces are
+    recorded; stages outside a trace cost a ContextVar lookup. With
+    sample_rate < 1 only that fraction of traces (or of calls outside a
+    trace) pay for timing.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, collector=None):
+        self.sample_rate = sample_rate
+        self.collector = collector
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _sampled(self):
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def _record(self, name, elapsed_ns, collector):
+        elapsed_ms = elapsed_ns / 1e6
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram()
+            histogram.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            histogram.count += 1
+            histogram.total_ns += elapsed_ns
+        collector.observe(f"stage.{name}_ms", elapsed_ms)
+
+    @contextmanager
+    def stage(self, name):
+        trace = _current_trace.get()
+        collector = self.collector or get_collector()
+        if not (trace.sampled if trace is not None else collector.enabled and self._sampled()):
+            yield
+            return
+        if trace is not None:
+            trace.depth += 1
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            if collector.enabled:
+                self._record(name, elapsed, collector)
+            if trace is not None:
+                trace.depth -= 1
+                trace.stages.append([name, (start - trace.start_ns) / 1e6, elapsed / 1e6, trace.depth])
+
+    @contextmanager
+    def trace(self, name):
+        """Collect the stages run inside this block; yields the Trace"""
+        trace = Trace(name, self._sampled())
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.total_ms = round((time.perf_counter_ns() - trace.start_ns) / 1e6, 3)
+            trace.stages.sort(key=lambda s: s[1])
+
+    def prometheus_text(self):
+        """Cumulative stage histograms in the Prometheus text exposition format"""
+        with self._lock:
+            snapshot = {name: (list(h.buckets), h.count, h.total_ns) for name, h in self._histograms.items()}
+        lines = [f"# HELP {PROMETHEUS_METRIC} Time spent in each processing stage",
+                 f"# TYPE {PROMETHEUS_METRIC} histogram"]
+        for name in sorted(snapshot):
+            buckets, count, total_ns = snapshot[name]
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS_MS, buckets):
+                cumulative += n
+                lines.append(f'{PROMETHEUS_METRIC}_bucket{{stage="{name}",le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'{PROMETHEUS_METRIC}_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{PROMETHEUS_METRIC}_sum{{stage="{name}"}} {total_ns / 1e9:.6f}')
+            lines.append(f'{PROMETHEUS_METRIC}_count{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=1)
+def get_instrumentation():
+    return Instrumentation()
+
+
+def stage(name):
+    """Context manager timing a block as the given stage"""
+    return get_instrumentation().stage(name)
+
+
+def trace(name):
+    return get_instrumentation().trace(name)
+
+
+def timed(name):
+    """Decorator timing every call of a function as the given stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_instrumentation().stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# SQLite
+@lru_cache(maxsize=512)
+def query_stage(sql):
+    """Stage name for a statement: db.<verb>.<first table>, e.g. db.select.patients"""
+    words = sql.split(None, 1)
+    verb = words[0].lower() if words else "query"
+    match = _SQL_TABLE.search(sql)
+    return f"db.{verb}.{match.group(1).lower()}" if match else f"db.{verb}"
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        with stage(query_stage(sql)):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        with stage(query_stage(sql)):
+            return super().executemany(sql, seq_of_parameters)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose statements are timed per query stage (pandas read_sql included)"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def timed_connect(db_path, **kwargs):
+    return sqlite3.connect(db_path, factory=TimedConnection, **kwargs)
@@ -0,0 +1,204 @@
+import re
+import sqlite3
+from datetime import date
+import pandas as pd
+from clinical_insights import ClinicalInsightEngine
+
+# Test -> (unit, yearly rise worth flagging)
+LAB_TESTS = {
+    "glucose": ("mg/dL", 10.0),
+    "hba1c": ("%", 0.3),
+    "cholesterol": ("mg/dL", 15.0),
+    "systolic": ("mmHg", 5.0),
+    "diastolic": ("mmHg", 5.0),
+}
+TEST_LABELS = {"glucose": "Fasting glucose", "hba1c": "HbA1c", "cholesterol": "Cholesterol",
+               "systolic": "Systolic BP", "diastolic": "Diastolic BP"}
+PATIENT_ID_PATTERN = re.compile(r"\b(?:CHN-\d{6}-[0-9a-fA-F]{8}|CLN-\d{4}-\d{4})\b")
+REPORT_DATE_PATTERN = re.compile(r"Dated?:\s*(\d{2})/(\d{2})/(\d{4})", re.IGNORECASE)
+# Regression x axis: days since this date (keeps the running sums small)
+EPOCH = date(2000, 1, 1)
+
+
+def find_patient_id(text):
+    match = PATIENT_ID_PATTERN.search(text)
+    return match.group() if match else None
+
+
+def report_date(text, default=None):
+    """'Dated: dd/mm/yyyy' from the report header, else default (today)"""
+    match = REPORT_DATE_PATTERN.search(text)
+    if match:
+        try:
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1))).isoformat()
+        except ValueError:
+            pass
+    return default or date.today().isoformat()
+
+
+def readings_to_tests(readings):
+    """ClinicalInsightEngine.extract_readings output -> {test: value}"""
+    values = {"glucose": readings.get("glucose"), "hba1c": readings.get("a1c"),
+              "cholesterol": readings.get("cholesterol")}
+    if readings.get("bp"):
+        values["systolic"], values["diastolic"] = readings["bp"]
+    return {test: float(value) for test, value in values.items() if value is not None}
+
+
+class LabTimeline:
+    """Lab values per patient and test, with an incrementally maintained summary.
+
+    Each insert updates the patient/test summary row in the same
+    transaction: count, latest, min/max and the least-squares running sums,
+    so the trend slope is read without scanning history. One value is
+    kept per test per day; a corrected value replaces the old one.
+    """
+
+    def __init__(self, db_path='patient_db.db'):
+        self.db_path = db_path
+        self._init_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_tables(self):
+        conn = self._connect()
+        conn.execute("""CREATE TABLE IF NOT EXISTS lab_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id TEXT NOT NULL,
+            test TEXT NOT NULL,
+            value REAL NOT NULL,
+            unit TEXT,
+            measured_at TEXT NOT NULL,
+            source TEXT,
+            UNIQUE (patient_id, test, measured_at)
+        )""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS lab_summary (
+            patient_id TEXT NOT NULL,
+            test TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            latest_value REAL,
+            latest_at TEXT,
+            min_value REAL,
+            max_value REAL,
+            sum_x REAL, sum_y REAL, sum_xx REAL, sum_xy REAL,
+            PRIMARY KEY (patient_id, test)
+        )""")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _day(measured_at):
+        return (date.fromisoformat(measured_at[:10]) - EPOCH).days
+
+    def record(self, patient_id, values, measured_at=None, source=None):
+        """Store {test: value} for a patient; returns the number of values stored"""
+        measured_at = (measured_at or date.today().isoformat())[:10]
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            stored = 0
+            for test, value in values.items():
+                if test not in LAB_TESTS:
+                    continue
+                old = conn.execute(
+                    "SELECT value FROM lab_results WHERE patient_id = ? AND test = ? AND measured_at = ?",
+                    (patient_id, test, measured_at)
+                ).fetchone()
+                if old and old[0] == value:
+                    continue
+                if old:
+                    conn.execute(
+                        "UPDATE lab_results SET value = ?, source = ? WHERE patient_id = ? AND test = ? AND measured_at = ?",
+                        (value, source, patient_id, test, measured_at)
+                    )
+                else:
+                    conn.execute(
+                        "INSERT INTO lab_results (patient_id, test, value, unit, measured_at, source) VALUES (?, ?, ?, ?, ?, ?)",
+                        (patient_id, test, value, LAB_TESTS[test][0], measured_at, source)
+                    )
+                self._update_summary(conn, patient_id, test, measured_at, value, old[0] if old else None)
+                stored += 1
+            conn.commit()
+            return stored
+        finally:
+            conn.close()
+
+    def _update_summary(self, conn, patient_id, test, measured_at, value, old_value):
+        x = self._day(measured_at)
+        row = conn.execute(
+            "SELECT n, latest_value, latest_at, min_value, max_value, sum_x, sum_y, sum_xx, sum_xy "
+            "FROM lab_summary WHERE patient_id = ? AND test = ?", (patient_id, test)
+        ).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO lab_summary VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (patient_id, test, value, measured_at, value, value, x, value, x * x, x * value)
+            )
+            return
+
+        n, latest_value, latest_at, min_value, max_value, sx, sy, sxx, sxy = row
+        if old_value is None:
+            n, sx, sxx = n + 1, sx + x, sxx + x * x
+            sy, sxy = sy + value, sxy + x * value
+            min_value, max_value = min(min_value, value), max(max_value, value)
+        else:
+            # Correction of an existing point: swap its contribution
+            sy, sxy = sy - old_value + value, sxy + x * (value - old_value)
+            min_value, max_value = conn.execute(
+                "SELECT MIN(value), MAX(value) FROM lab_results WHERE patient_id = ? AND test = ?",
+                (patient_id, test)
+            ).fetchone()
+        if measured_at >= latest_at:
+            latest_value, latest_at = value, measured_at
+        conn.execute(
+            """UPDATE lab_summary SET n = ?, latest_value = ?, latest_at = ?, min_value = ?, max_value = ?,
+               sum_x = ?, sum_y = ?, sum_xx = ?, sum_xy = ? WHERE patient_id = ? AND test = ?""",
+            (n, latest_value, latest_at, min_value, max_value, sx, sy, sxx, sxy, patient_id, test)
+        )
+
+    def record_text(self, text, patient_id=None, measured_at=None, source=None):
+        """Extract readings from report text and store them; needs a patient ID (given or in the text)"""
+        patient_id = patient_id or find_patient_id(text)
+        if not patient_id:
+            return 0
+        values = readings_to_tests(ClinicalInsightEngine.extract_readings(text))
+        return self.record(patient_id, values, report_date(text, measured_at), source)
+
+    def summary(self, patient_id):
+        """One row per test: n, latest, min/max and slope (per day and per year)"""
+        conn = self._connect()
+        df = pd.read_sql_query(
+            "SELECT test, n, latest_value, latest_at, min_value, max_value, sum_x, sum_y, sum_xx, sum_xy "
+            "FROM lab_summary WHERE patient_id = ? ORDER BY test",
+            conn, params=(patient_id,)
+        )
+        conn.close()
+        denominator = df["n"] * df["sum_xx"] - df["sum_x"] ** 2
+        slope = (df["n"] * df["sum_xy"] - df["sum_x"] * df["sum_y"]) / denominator.where(denominator > 0)
+        df["slope_per_day"] = slope.fillna(0.0)
+        df["slope_per_year"] = df["slope_per_day"] * 365.25
+        df["unit"] = df["test"].map(lambda test: LAB_TESTS[test][0])
+        return df.drop(columns=["sum_x", "sum_y", "sum_xx", "sum_xy"])
+
+    def history(self, patient_id, test):
+        conn = self._connect()
+        df = pd.read_sql_query(
+            "SELECT measured_at, value, source FROM lab_results WHERE patient_id = ? AND test = ? ORDER BY measured_at",
+            conn, params=(patient_id, test)
+        )
+        conn.close()
+        df["measured_at"] = pd.to_datetime(df["measured_at"])
+        return df
+
+    def trend_insights(self, patient_id):
+        """Flags for tests rising faster than their LAB_TESTS threshold per year"""
+        insights = []
+        for row in self.summary(patient_id).itertuples():
+            unit, threshold = LAB_TESTS[row.test]
+            if row.n >= 2 and row.slope_per_year >= threshold:
+                insights.append(
+                    f"📈 **{TEST_LABELS[row.test]} rising**: {row.slope_per_year:+.1f} {unit}/year "
+                    f"over {row.n} results (latest {row.latest_value:g} {unit} on {row.latest_at})"
+                )
+        return insights
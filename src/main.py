@@ -13,7 +13,6 @@ if "HOSTNAME" in os.environ and "streamlit" in os.environ["HOSTNAME"]:
 import streamlit as st
 import json
 import pandas as pd
-from nlp_processor import MedicalNLPProcessor
 from drug_interaction_db import check_interactions, get_drug_info, get_drug_safety_notes
 import base64
 from io import BytesIO
@@ -22,14 +21,23 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
 from reportlab.lib.styles import getSampleStyleSheet
 import re
 from openai import OpenAI # Assuming OpenAI is installed as a top-level package
-from patient_database import encrypt_data, decrypt_data, check_prescription_safety
+from patient_database import encrypt_data, decrypt_data, decrypt_many, phone_blind_index, check_prescription_safety
 from clinical_insights import ClinicalInsightEngine
-import sqlite3
 from datetime import datetime, timedelta
 from security import authenticate
 import uuid
 from cryptography.fernet import Fernet
 from drug_interaction_engine import DrugInteractionEngine, EnhancedDrugInteractionEngine
+from vitals_analytics import VitalsAnalytics
+from analysis_queue import AnalysisQueue, start_workers, supervise
+from entity_spans import EntitySpans
+from lab_timeline import LabTimeline
+from appointment_scheduler import AppointmentScheduler, SchedulingConflict
+from reminder_dispatcher import ReminderDispatcher
+from metrics import configure as configure_metrics, get_collector
+from instrumentation import timed_connect
+import threading
+import time
 # Set Streamlit page config at the very top of main.py
 st.set_page_config(
     page_title="WeCare Medical Assistant",
@@ -37,14 +45,9 @@ st.set_page_config(
     layout="centered"
 )
 
-# Initialize NLP processor
-@st.cache_resource
-def load_processor():
-    return MedicalNLPProcessor()
-
 def init_db():
     """Initializes the SQLite database by creating tables if they don't exist."""
-    conn = sqlite3.connect('patient_db.db')
+    conn = timed_connect('patient_db.db')
     c = conn.cursor()
 
     # Create patients table
@@ -58,7 +61,8 @@ def init_db():
             address TEXT,
             area TEXT,
             preferred_hospital TEXT,
-            insurance TEXT
+            insurance TEXT,
+            phone_index TEXT -- HMAC blind index of the normalized phone
         )
     """)
 
@@ -107,6 +111,7 @@ def init_db():
             FOREIGN KEY (patient_id) REFERENCES patients (id)
         )
     """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_vitals_patient_date ON patient_vitals (patient_id, date)")
 
     # Create prescriptions table
     c.execute("""
@@ -150,8 +155,6 @@ def init_db():
     conn.commit()
     conn.close()
 
-processor = load_processor()
-
 # Initialize OpenAI client (add your API key)
 if "OPENAI_API_KEY" not in st.secrets:
     st.error("OpenAI API key not found. Please add it to your .streamlit/secrets.toml file.")
@@ -175,6 +178,50 @@ def load_interaction_engine():
 
 interaction_engine = load_interaction_engine()
 
+# Usage and stage timings for the monitoring page (metrics.db in the project root)
+configure_metrics()
+
+# Per-patient vitals analytics, shared across sessions
+@st.cache_resource
+def load_vitals_analytics():
+    return VitalsAnalytics()
+
+vitals_analytics = load_vitals_analytics()
+
+# Report analysis runs in a separate worker service (python src/analysis_queue.py);
+# ANALYSIS_WORKERS > 0 also spawns that many workers from the app
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "0"))
+# Seconds after which a pending job is reported as slow
+ANALYSIS_TIMEOUT = 300
+
+@st.cache_resource
+def load_analysis_queue():
+    return AnalysisQueue()
+
+@st.cache_resource
+def load_analysis_workers():
+    workers = start_workers(ANALYSIS_WORKERS) if ANALYSIS_WORKERS > 0 else []
+    if workers:
+        threading.Thread(target=supervise, args=(workers,), name="analysis-supervisor", daemon=True).start()
+    return workers
+
+analysis_queue = load_analysis_queue()
+load_analysis_workers()
+
+# Lab values extracted from reports, with per-patient trend summaries
+@st.cache_resource
+def load_lab_timeline():
+    return LabTimeline()
+
+lab_timeline = load_lab_timeline()
+
+# Initialize appointment scheduler
+@st.cache_resource
+def load_appointment_scheduler():
+    return AppointmentScheduler()
+
+appointment_scheduler = load_appointment_scheduler()
+
 # Placeholder for monitoring plan function
 def generate_monitoring_plan(med_list):
     return []
@@ -223,6 +270,124 @@ def home_page():
     All final decisions should be made by qualified healthcare professionals.
     """)
 
+def render_report_analysis(input_text, entities, insights, spans=None):
+    """Display entities and clinical insights produced by an analysis worker"""
+    # Results from older jobs have no offsets; fall back to term search for those
+    spans = EntitySpans.from_dict(spans) if spans else None
+    # Enhanced clinical analysis
+    st.subheader("🩺 Clinical Interpretation") # This line is fine
+    if insights["flags"] or insights["recommendations"]:
+        st.markdown("\n".join(insights["flags"]))
+        st.markdown("\n".join(insights["recommendations"]))
+
+    # Display results in tabs
+    tab1, tab2, tab3 = st.tabs(["Key Findings", "Highlighted Text", "Clinical Summary"])
+
+    with tab1:
+        st.subheader("Medical Entities Identified")
+        # Create summary table
+        summary_data = []
+        for category, items in entities.items():
+            if isinstance(items, list) and items:  # Only show categories with findings
+                summary_data.append({
+                    "Category": category,
+                    "Count": len(items),
+                    "Mentions": sum(1 for c in spans.category if c == category) if spans else len(items),
+                    "Items": ", ".join(items)
+                })
+
+        if summary_data:
+            st.dataframe(
+                pd.DataFrame(summary_data),
+                column_config={
+                    "Items": st.column_config.ListColumn(
+                        width="large",
+                        help="Identified medical concepts"
+                    )
+                },
+                hide_index=True
+            )
+        else:
+            st.warning("No medical entities identified in the text")
+
+    with tab2:
+        st.subheader("Original Text with Highlights")
+        # Color code entities
+        color_map = {
+            "CONDITIONS": "#FF6B6B",
+            "MEDICATIONS": "#4D96FF",
+            "DOSAGES": "#6BCB77",
+            "BODY_PARTS": "#FFD93D",
+            "PROCEDURES": "#9C51E0"
+        }
+
+        # Create HTML with highlights
+        if spans is not None:
+            # One pass over the stored offsets
+            highlighted_html = spans.highlight_html(input_text, color_map)
+        else:
+            highlighted_html = input_text
+            for category, items in entities.items():
+                if isinstance(items, list):
+                    for item in items:
+                        # Escape special regex characters
+                        escaped_item = re.escape(item)
+                        highlighted_html = re.sub(
+                            f"({escaped_item})", 
+                            f"<span style='background-color: {color_map[category]}; padding: 2px; border-radius: 4px; font-weight: bold'>\\1</span>", 
+                            highlighted_html, 
+                            flags=re.IGNORECASE
+                        )
+
+        st.markdown(f"<div style='border: 1px solid #e0e0e0; padding: 20px; border-radius: 10px;'>{highlighted_html}</div>", 
+                    unsafe_allow_html=True)
+
+    with tab3:
+        st.subheader("Clinical Summary")
+
+        # Generate readable summary
+        summary_points = []
+        if entities.get("CONDITIONS"):
+            summary_points.append(f"**Conditions identified**: {', '.join(entities['CONDITIONS'])}")
+        if entities.get("MEDICATIONS"):
+            summary_points.append(f"**Medications mentioned**: {', '.join(entities['MEDICATIONS'])}")
+        if entities.get("DOSAGES"):
+            summary_points.append(f"**Dosages noted**: {', '.join(entities['DOSAGES'])}")
+
+        if summary_points:
+            st.write("\n\n".join(summary_points))
+        else:
+            st.info("No significant medical concepts identified")
+
+        # Condition-specific protocols
+        if entities.get("CONDITIONS"):
+            if "diabetes" in [c.lower() for c in entities["CONDITIONS"]]:
+                with st.expander("Diabetes Management Protocol"):
+                    st.markdown("""
+                    **Initial Management**:
+                    - Lifestyle: 150 min/week exercise, carb-controlled diet
+                    - Medication: Metformin 500mg BD with meals
+                    - Targets: Fasting &lt;130 mg/dL, HbA1c &lt;7%
+
+                    **Monitoring**:
+                    - HbA1c every 3 months
+                    - Annual retinal exam
+                    - Foot examination at every visit
+                    """)
+
+            if "hypertension" in [c.lower() for c in entities["CONDITIONS"]]:
+                with st.expander("Hypertension Protocol"):
+                    st.markdown("""
+                    **Management Goals**:
+                    - Target BP: &lt;140/90 mmHg (&lt;130/80 if diabetic)
+                    - Lifestyle: DASH diet, &lt;5g salt/day, regular exercise
+
+                    **First-line Medications**:
+                    - Age &lt;60: ACEI/ARB (Ramipril 5mg OD)
+                    - Age ≥60: CCB (Amlodipine 5mg OD)
+                    - Black patients: CCB or thiazide diuretic
+                    """)
+
 def report_analysis_page():
     st.title("Medical Report Analyzer")
     st.caption("Upload medical reports or enter text for instant analysis")
@@ -242,145 +407,47 @@ def report_analysis_page():
                 height=200,
                 placeholder="e.g., Patient with diabetes prescribed metformin 500mg twice daily..."
             )
+        link_patient = st.text_input("Patient ID (optional)", help="Lab values found in the report are added to this patient's timeline")
     
-    # Process input
-    input_text = ""
-    if uploaded_file:
-        if uploaded_file.type == "application/pdf":
-            try:
-                import PyPDF2
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                for page in pdf_reader.pages:
-                    input_text += page.extract_text() + "\n"
-            except:
-                st.error("PDF processing requires PyPDF2. Install with: pip install pypdf2")
-                st.stop()
-        else:  # Text file
-            input_text = uploaded_file.getvalue().decode("utf-8")
-    elif manual_text:
-        input_text = manual_text
+    # Queue input for the background analysis workers
+    if st.button("Analyze Report", type="primary") and (uploaded_file or manual_text):
+        if uploaded_file:
+            job_id = analysis_queue.enqueue(uploaded_file.getvalue(), uploaded_file.name, uploaded_file.type,
+                                            patient_id=link_patient or None)
+        else:
+            job_id = analysis_queue.enqueue(manual_text.encode("utf-8"), patient_id=link_patient or None)
+        st.session_state.analysis_job_id = job_id
+        st.session_state.analysis_job_since = time.time()
     
-    # Analysis section
-    if st.button("Analyze Report", type="primary") and input_text:
-        with st.spinner("Analyzing medical content..."):
-            # Process with NLP
-            results = processor.extract_entities(input_text)
-            entities = json.loads(results)
-            
-            # Error handling for NLP processing
-            if "error" in entities:
-                st.error(f"Analysis failed: {entities['error']}")
-                return
-            
-            # Enhanced clinical analysis
-            st.subheader("🩺 Clinical Interpretation") # This line is fine
-            insights = engines["clinical"].analyze_vitals(input_text)
-            if insights["flags"] or insights["recommendations"]:
-                st.markdown("\n".join(insights["flags"]))
-                st.markdown("\n".join(insights["recommendations"]))
-            
-            # Display results in tabs
-            tab1, tab2, tab3 = st.tabs(["Key Findings", "Highlighted Text", "Clinical Summary"])
-            
-            with tab1:
-                st.subheader("Medical Entities Identified")
-                # Create summary table
-                summary_data = []
-                for category, items in entities.items():
-                    if isinstance(items, list) and items:  # Only show categories with findings
-                        summary_data.append({
-                            "Category": category,
-                            "Count": len(items),
-                            "Items": ", ".join(items)
-                        })
-                
-                if summary_data:
-                    st.dataframe(
-                        pd.DataFrame(summary_data),
-                        column_config={
-                            "Items": st.column_config.ListColumn(
-                                width="large",
-                                help="Identified medical concepts"
-                            )
-                        },
-                        hide_index=True
-                    )
-                else:
-                    st.warning("No medical entities identified in the text")
-            
-            with tab2:
-                st.subheader("Original Text with Highlights")
-                # Color code entities
-                color_map = {
-                    "CONDITIONS": "#FF6B6B",
-                    "MEDICATIONS": "#4D96FF",
-                    "DOSAGES": "#6BCB77",
-                    "BODY_PARTS": "#FFD93D",
-                    "PROCEDURES": "#9C51E0"
-                }
-                
-                # Create HTML with highlights
-                highlighted_html = input_text
-                for category, items in entities.items():
-                    if isinstance(items, list):
-                        for item in items:
-                            # Escape special regex characters
-                            escaped_item = re.escape(item)
-                            highlighted_html = re.sub(
-                                f"({escaped_item})", 
-                                f"<span style='background-color: {color_map[category]}; padding: 2px; border-radius: 4px; font-weight: bold'>\\1</span>", 
-                                highlighted_html, 
-                                flags=re.IGNORECASE
-                            )
-                
-                st.markdown(f"<div style='border: 1px solid #e0e0e0; padding: 20px; border-radius: 10px;'>{highlighted_html}</div>", 
-                            unsafe_allow_html=True)
-            
-            with tab3:
-                st.subheader("Clinical Summary")
-                
-                # Generate readable summary
-                summary_points = []
-                if entities.get("CONDITIONS"):
-                    summary_points.append(f"**Conditions identified**: {', '.join(entities['CONDITIONS'])}")
-                if entities.get("MEDICATIONS"):
-                    summary_points.append(f"**Medications mentioned**: {', '.join(entities['MEDICATIONS'])}")
-                if entities.get("DOSAGES"):
-                    summary_points.append(f"**Dosages noted**: {', '.join(entities['DOSAGES'])}")
-                
-                if summary_points:
-                    st.write("\n\n".join(summary_points))
-                else:
-                    st.info("No significant medical concepts identified")
-                
-                # Condition-specific protocols
-                if entities.get("CONDITIONS"):
-                    if "diabetes" in [c.lower() for c in entities["CONDITIONS"]]:
-                        with st.expander("Diabetes Management Protocol"):
-                            st.markdown("""
-                            **Initial Management**:
-                            - Lifestyle: 150 min/week exercise, carb-controlled diet
-                            - Medication: Metformin 500mg BD with meals
-                            - Targets: Fasting &lt;130 mg/dL, HbA1c &lt;7%
-                            
-                            **Monitoring**:
-                            - HbA1c every 3 months
-                            - Annual retinal exam
-                            - Foot examination at every visit
-                            """)
-                    
-                    if "hypertension" in [c.lower() for c in entities["CONDITIONS"]]:
-                        with st.expander("Hypertension Protocol"):
-                            st.markdown("""
-                            **Management Goals**:
-                            - Target BP: &lt;140/90 mmHg (&lt;130/80 if diabetic)
-                            - Lifestyle: DASH diet, &lt;5g salt/day, regular exercise
-                            
-                            **First-line Medications**:
-                            - Age &lt;60: ACEI/ARB (Ramipril 5mg OD)
-                            - Age ≥60: CCB (Amlodipine 5mg OD)
-                            - Black patients: CCB or thiazide diuretic
-                            """)
+    job_id = st.session_state.get("analysis_job_id")
+    if job_id:
+        job = analysis_queue.get(job_id)
+        if job is None:
+            st.session_state.analysis_job_id = None
+        elif job["status"] in ("queued", "running"):
+            waited = time.time() - st.session_state.get("analysis_job_since", time.time())
+            if not analysis_queue.live_workers():
+                st.error("No analysis worker available. Start one with `python src/analysis_queue.py`; "
+                         "the report stays queued until then.")
+            elif job["status"] == "queued":
+                st.info(f"Report queued for analysis ({job['position']} ahead in queue)")
+            else:
+                st.info("Analyzing medical content...")
+            if waited > ANALYSIS_TIMEOUT:
+                st.warning(f"Analysis is taking longer than {ANALYSIS_TIMEOUT // 60} minutes")
+            # The job survives reruns; refreshing just reads its status again
+            st.button("Refresh Status")
+        elif job["status"] == "failed":
+            st.error(f"Analysis failed: {job['error']}")
+        else:
+            result = job["result"]
+            if result.get("paragraphs"):
+                reused = result["paragraphs"]["total"] - result["paragraphs"]["analyzed"]
+                st.caption(f"Reused cached analysis for {reused} of {result['paragraphs']['total']} unchanged paragraphs")
+            render_report_analysis(result["text"], result["entities"], result["insights"], result.get("spans"))
+            if result.get("trace"):
+                with st.expander(f"Stage timings ({result['trace']['total_ms']:.0f} ms)"):
+                    st.dataframe(pd.DataFrame(result["trace"]["stages"]), hide_index=True)
     
     # Back button
     st.divider()
@@ -411,7 +478,7 @@ def drug_interaction_page():
             # Get patient conditions from medical history
             conditions = []
             if patient_id:
-                conn = sqlite3.connect('patient_db.db')
+                conn = timed_connect('patient_db.db')
                 c = conn.cursor()
                 c.execute("SELECT condition FROM medical_history WHERE patient_id=?", (patient_id,))
                 conditions = [row[0] for row in c.fetchall()]
@@ -530,12 +597,13 @@ def patient_records_page():
                 if not all([name, age, phone]):
                     st.error("Please fill required fields (*)")
                 else:
-                    conn = sqlite3.connect('patient_db.db')
+                    conn = timed_connect('patient_db.db')
                     c = conn.cursor()
                     patient_id = f"CHN-{datetime.now().strftime('%Y%m')}-{str(uuid.uuid4())[:8]}"
-                    c.execute("""INSERT INTO patients (id, name, age, gender, phone, address, area, preferred_hospital, insurance) 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                        (patient_id, name, age, gender, encrypt_data(phone), address, area, preferred_hospital, insurance)
+                    c.execute("""INSERT INTO patients (id, name, age, gender, phone, address, area, preferred_hospital, insurance, phone_index) 
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                        (patient_id, name, age, gender, encrypt_data(phone), address, area, preferred_hospital, insurance,
+                         phone_blind_index(phone))
                     )
                     conn.commit()
                     conn.close()
@@ -543,25 +611,27 @@ def patient_records_page():
     
     with tabs[1]:  # Search Records
         st.subheader("Search Patient Records")
-        search_term = st.text_input("Search by Name or Patient ID")
+        search_term = st.text_input("Search by Name, Patient ID or Phone")
         
         if search_term:
-            conn = sqlite3.connect('patient_db.db')
+            conn = timed_connect('patient_db.db')
             c = conn.cursor()
             
-            # Search patients
+            # Search patients (phone numbers match exactly via the blind index)
             c.execute("""SELECT id, name, age, gender, phone, address, area, preferred_hospital, insurance 
-                         FROM patients WHERE name LIKE ? OR id LIKE ?""",
-                (f"%{search_term}%", f"%{search_term}%")
+                         FROM patients WHERE name LIKE ? OR id LIKE ? OR phone_index = ?""",
+                (f"%{search_term}%", f"%{search_term}%", phone_blind_index(search_term))
             )
             patients = c.fetchall()
             
             if patients:
-                for patient in patients:
+                # Decrypt the phone column once for the whole listing
+                phones = decrypt_many([p[4] for p in patients])
+                for patient, phone in zip(patients, phones):
                     # patient[0]=id, patient[1]=name, patient[2]=age, patient[3]=gender, patient[4]=phone, patient[5]=address, patient[6]=area, patient[7]=preferred_hospital, patient[8]=insurance
                     with st.expander(f"{patient[1]} (ID: {patient[0]})"):
                         st.write(f"**Age**: {patient[2]} | **Gender**: {patient[3]}")
-                        st.write(f"**Phone**: {decrypt_data(patient[4])}")
+                        st.write(f"**Phone**: {phone}")
                         st.write(f"**Address**: {patient[5]}")
                         
                         # Medical history
@@ -605,7 +675,7 @@ def patient_records_page():
         patient_id = st.text_input("Enter Patient ID", key="med_profile_id")
         
         if patient_id:
-            conn = sqlite3.connect('patient_db.db')
+            conn = timed_connect('patient_db.db')
             c = conn.cursor()
             
             # Check if profile exists
@@ -749,7 +819,7 @@ def patient_records_page():
         patient_id = st.text_input("Enter Patient ID", key="vitals_id")
         
         if patient_id:
-            conn = sqlite3.connect('patient_db.db')
+            conn = timed_connect('patient_db.db')
             c = conn.cursor()
             
             # Get patient info
@@ -779,52 +849,21 @@ def patient_records_page():
                 notes = st.text_area("Clinical Notes")
                 
                 if st.form_submit_button("Save Vitals"):
-                    # Calculate BMI
-                    bmi = weight / ((height/100) ** 2) if height > 0 else 0
-                    
-                    c.execute("""INSERT INTO patient_vitals 
-                        (patient_id, date, bp_systolic, bp_diastolic, heart_rate, 
-                        temperature, weight, height, bmi, notes)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                        (patient_id, date.strftime("%Y-%m-%d"), bp_systolic, bp_diastolic, 
-                         heart_rate, temperature, weight, height, round(bmi, 1), notes)
+                    # Saves with BMI and invalidates this patient's cached analytics
+                    vitals_analytics.record(
+                        conn, patient_id, date.strftime("%Y-%m-%d"), bp_systolic, bp_diastolic,
+                        heart_rate, temperature, weight, height, notes
                     )
-                    conn.commit()
                     st.success("Vitals recorded!")
                     st.rerun() # Rerun to display updated vitals history
             
             # Vitals history
             st.divider()
             st.subheader("Vitals History")
-            c.execute("SELECT date, bp_systolic, bp_diastolic, heart_rate, temperature, weight, bmi FROM patient_vitals WHERE patient_id = ? ORDER BY date DESC", (patient_id,))
-            vitals = c.fetchall()
+            analytics = vitals_analytics.get(patient_id)
+            vitals_df = analytics["vitals"]
             
-            if vitals:
-                vitals_df = pd.DataFrame(vitals, columns=["Date", "BP Sys", "BP Dia", "HR", "Temp", "Weight", "BMI"])
-                vitals_df["Date"] = pd.to_datetime(vitals_df["Date"]) # Convert to datetime for plotting
-                
-                # Add status indicators
-                def bp_status(row):
-                    if row["BP Sys"] > 140 or row["BP Dia"] > 90:
-                        return "🟥 Hypertension"
-                    elif row["BP Sys"] < 90 or row["BP Dia"] < 60:
-                        return "🟦 Hypotension"
-                    return "🟩 Normal"
-                
-                def bmi_status(row):
-                    if row["BMI"] == 0:
-                        return ""
-                    elif row["BMI"] < 18.5:
-                        return "Underweight"
-                    elif row["BMI"] < 25:
-                        return "Normal"
-                    elif row["BMI"] < 30:
-                        return "Overweight"
-                    return "Obese"
-                
-                vitals_df["BP Status"] = vitals_df.apply(bp_status, axis=1)
-                vitals_df["Weight Status"] = vitals_df.apply(bmi_status, axis=1)
-                
+            if len(vitals_df):
                 st.dataframe(
                     vitals_df,
                     column_config={
@@ -837,13 +876,30 @@ def patient_records_page():
                 )
                 
                 # Show trends
-                if len(vitals) > 1:
+                if len(vitals_df) > 1:
                     st.subheader("Trend Analysis")
                     trend_col = st.selectbox("Select parameter to visualize", ["BP Sys", "BP Dia", "Weight", "BMI"])
-                    st.line_chart(vitals_df.set_index("Date")[trend_col])
+                    trend_df = vitals_df[["Date", trend_col]].assign(**{
+                        f"{trend_col} ({vitals_analytics.window}-reading avg)": analytics["rolling"][trend_col]
+                    })
+                    st.line_chart(trend_df.set_index("Date"))
+                    st.caption(f"Trend: {analytics['slopes'][trend_col]:+.2f} per day")
             else:
                 st.info("No vitals recorded yet")
             
+            # Lab values extracted from analyzed reports
+            lab_summary = lab_timeline.summary(patient_id)
+            if len(lab_summary):
+                st.subheader("Lab Trends")
+                for insight in lab_timeline.trend_insights(patient_id):
+                    st.warning(insight)
+                st.dataframe(
+                    lab_summary[["test", "n", "latest_value", "unit", "latest_at", "min_value", "max_value", "slope_per_year"]],
+                    hide_index=True
+                )
+                lab_test = st.selectbox("Lab history", lab_summary["test"].tolist())
+                st.line_chart(lab_timeline.history(patient_id, lab_test).set_index("measured_at")["value"])
+            
             conn.close()
     
     with tabs[4]:  # Prescriptions
@@ -851,7 +907,7 @@ def patient_records_page():
         patient_id = st.text_input("Patient ID")
         
         if patient_id:
-            conn = sqlite3.connect('patient_db.db')
+            conn = timed_connect('patient_db.db')
             c = conn.cursor()
             
             # Verify patient exists
@@ -914,120 +970,126 @@ def patient_records_page():
     with tabs[5]:  # Appointments
         st.subheader("Appointment Scheduling")
         
+        hospitals = ["Apollo", "Kauvery", "MIOT", "Fortis", "Global", "SIMS", "Government Hospital"]
+        
         # New appointment
         with st.expander("Schedule New Appointment"):
             patient_id = st.text_input("Patient ID*")
             purpose = st.text_input("Purpose*")
-            appt_date = st.date_input("Date*")
-            appt_time = st.time_input("Time*")
+            col1, col2 = st.columns(2)
+            with col1:
+                appt_hospital = st.selectbox("Hospital", hospitals, key="appt_hospital")
+                appt_date = st.date_input("Date*")
+            with col2:
+                appt_doctor = st.text_input("Doctor", key="appt_doctor")
+                appt_duration = st.selectbox("Duration (minutes)", [10, 15, 20, 30, 45, 60], index=1)
+            
+            free_slots = appointment_scheduler.available_slots(appt_date, appt_hospital, appt_doctor, appt_duration)
+            if free_slots:
+                appt_time = st.selectbox("Time*", free_slots, format_func=lambda slot: slot.strftime("%H:%M"))
+            else:
+                appt_time = None
+                st.warning("No free slots for this doctor on the selected date")
             
             if st.button("Schedule Appointment"):
-                if not all([patient_id, purpose]):
+                if not all([patient_id, purpose, appt_time]):
                     st.error("Please fill required fields (*)")
                 else:
-                    conn = sqlite3.connect('patient_db.db')
+                    conn = timed_connect('patient_db.db')
                     c = conn.cursor()
                     
                     # Verify patient exists
                     c.execute("SELECT name FROM patients WHERE id = ?", (patient_id,))
                     patient = c.fetchone()
+                    conn.close()
                     
                     if patient:
-                        appt_datetime = f"{appt_date.strftime('%Y-%m-%d')} {appt_time.strftime('%H:%M')}"
-                        c.execute(
-                            "INSERT INTO appointments (patient_id, date, purpose) VALUES (?, ?, ?)",
-                            (patient_id, appt_datetime, purpose)
-                        )
-                        conn.commit()
-                        st.success(f"Appointment scheduled for {patient[0]} on {appt_datetime}")
+                        try:
+                            appointment_scheduler.book(patient_id, appt_time, appt_duration,
+                                                       appt_hospital, appt_doctor, purpose)
+                            st.success(f"Appointment scheduled for {patient[0]} on {appt_time.strftime('%Y-%m-%d %H:%M')}")
+                            st.rerun() # Rerun to display updated appointments
+                        except SchedulingConflict as e:
+                            st.error(f"{e}. Please pick another slot.")
                     else:
                         st.error("Invalid Patient ID")
-                    
-                    st.rerun() # Rerun to display updated appointments
-                    
-                    conn.close()
+        
+        # Screening camps book many patients back to back
+        with st.expander("Bulk Booking (Screening Camp)"):
+            camp_ids = st.text_area("Patient IDs (one per line)")
+            col1, col2 = st.columns(2)
+            with col1:
+                camp_hospital = st.selectbox("Hospital", hospitals, key="camp_hospital")
+                camp_date = st.date_input("Camp Date", key="camp_date")
+                camp_start = st.time_input("First Slot", value=datetime.strptime("09:00", "%H:%M").time())
+            with col2:
+                camp_doctor = st.text_input("Doctor / Station", key="camp_doctor")
+                camp_duration = st.number_input("Minutes per patient", min_value=5, max_value=60, value=5, step=5)
+                camp_purpose = st.text_input("Purpose", value="Screening camp")
+            
+            if st.button("Book Camp Slots"):
+                ids = [line.strip() for line in camp_ids.splitlines() if line.strip()]
+                first = datetime.combine(camp_date, camp_start)
+                requests = [(pid, first + timedelta(minutes=camp_duration * i), camp_purpose) for i, pid in enumerate(ids)]
+                booked = appointment_scheduler.book_many(requests, camp_duration, camp_hospital, camp_doctor,
+                                                         skip_conflicts=True)
+                skipped = [req[1].strftime("%H:%M") for req, appt_id in zip(requests, booked) if appt_id is None]
+                st.success(f"Booked {len(booked) - len(skipped)} of {len(requests)} slots")
+                if skipped:
+                    st.warning(f"Already taken, not booked: {', '.join(skipped)}")
         
         # View appointments
         st.subheader("Upcoming Appointments")
-        conn = sqlite3.connect('patient_db.db')
-        c = conn.cursor()
         
         # Today and next 7 days
-        start_date = datetime.now().strftime("%Y-%m-%d")
-        end_date = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
-        
-        c.execute(
-            """SELECT a.id, p.name, a.date, a.purpose, a.status 
-            FROM appointments a
-            JOIN patients p ON a.patient_id = p.id
-            WHERE date BETWEEN ? AND ?
-            ORDER BY a.date""",
-            (start_date, end_date)
-        )
-        appointments = c.fetchall()
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        appointments = appointment_scheduler.upcoming(today, today + timedelta(days=8))
         
         if appointments:
-            appt_df = pd.DataFrame(appointments, columns=["ID", "Patient", "Date", "Purpose", "Status"])
-            
-            # Add action buttons
-            appt_df["Actions"] = "Update"
-            
-            # Display as editable dataframe
-            edited_df = st.data_editor(
-                appt_df,
-                column_definitions={
-                    "Date": st.column_definitions.DateColumn(
-                        "Date",
-                        min_value=datetime.now().date(),
-                        max_value=(datetime.now() + timedelta(days=30)).date(),
-                        default=datetime.now().date()
-                    ),
-                    "Status": st.column_definitions.SelectColumn(
-                        "Status",
-                        options=["Scheduled", "Completed", "Cancelled"],
-                        default="Scheduled"
-                    ),
-                    "Actions": st.column_definitions.ButtonColumn(
-                        "Actions",
-                        text="Update",
-                        key="update_btn",
-                        disabled=False
-                    )
-                },
-                hide_index=True,
-                editable=True
-            )
+            appt_df = pd.DataFrame(appointments, columns=["ID", "Patient", "Date", "Purpose", "Status", "Hospital", "Doctor"])
+            st.dataframe(appt_df, hide_index=True)
             
             # Handle updates
-            for i, row in edited_df.iterrows():
-                if row["Actions"] == "Update":
-                    with st.expander(f"Update Appointment {row['ID']}"):
-                        new_status = st.selectbox("Status", ["Scheduled", "Completed", "Cancelled"], index=["Scheduled", "Completed", "Cancelled"].index(row["Status"]))
-                        new_date = st.date_input("Date", value=datetime.strptime(row["Date"], "%Y-%m-%d").date(), min_value=datetime.now().date(), max_value=(datetime.now() + timedelta(days=30)).date())
-                        new_purpose = st.text_input("Purpose", value=row["Purpose"])
-                        
-                        if st.button("Save Changes"):
-                            # Update database
-                            c.execute(
-                                "UPDATE appointments SET date = ?, purpose = ?, status = ? WHERE id = ?",
-                                (new_date.strftime("%Y-%m-%d"), new_purpose, new_status, row["ID"])
-                            )
-                            conn.commit()
-                            st.success("Appointment updated!")
+            with st.expander("Update Appointment"):
+                selected = st.selectbox("Appointment", appointments,
+                                        format_func=lambda a: f"#{a[0]} {a[1]} - {a[2]} ({a[3]})")
+                current = datetime.strptime(selected[2], "%Y-%m-%d %H:%M")
+                statuses = ["Scheduled", "Completed", "Cancelled"]
+                new_status = st.selectbox("Status", statuses,
+                                          index=statuses.index(selected[4]) if selected[4] in statuses else 0)
+                new_date = st.date_input("Date", value=current.date(), min_value=datetime.now().date(), max_value=(datetime.now() + timedelta(days=30)).date())
+                new_time = st.time_input("Time", value=current.time())
+                new_purpose = st.text_input("Purpose", value=selected[3])
+                
+                if st.button("Save Changes"):
+                    try:
+                        appointment_scheduler.reschedule(selected[0], datetime.combine(new_date, new_time),
+                                                         new_purpose, new_status)
+                        st.success("Appointment updated!")
+                    except SchedulingConflict as e:
+                        st.error(str(e))
+                    except KeyError as e:
+                        st.error(e.args[0])  # Removed by another session
         
         else:
             st.info("No upcoming appointments")
         
-        if st.button("Send SMS Reminder"):
-            st.success("Appointment reminder sent to patient's phone")
-        conn.close()
+        if st.button("Send SMS Reminders (next 24 hours)"):
+            with st.spinner("Sending reminders..."):
+                stats = ReminderDispatcher().dispatch()
+            if stats["failed"]:
+                st.warning(f"Sent {stats['sent']} of {stats['due']} reminders; {stats['failed']} failed and will be retried next run")
+            elif stats["due"]:
+                st.success(f"Sent {stats['sent']} appointment reminders")
+            else:
+                st.info("No reminders due")
     
     with tabs[6]:  # Documents
         st.subheader("Medical Document Management")
         patient_id = st.text_input("Enter Patient ID", key="docs_id")
         
         if patient_id:
-            conn = sqlite3.connect('patient_db.db')
+            conn = timed_connect('patient_db.db')
             c = conn.cursor()
             
             # Check if patient exists
@@ -1096,6 +1158,10 @@ def main():
     # Initialize session state
     if "current_page" not in st.session_state:
         st.session_state.current_page = "home"
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
+    get_collector().session_seen(st.session_state.session_id)
+    get_collector().inc(f"page.{st.session_state.current_page}")
     
     # Page routing
     if st.session_state.current_page == "home":
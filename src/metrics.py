@@ -0,0 +1,324 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:  # System gauges are skipped without psutil
+    psutil = None
+
+# Histogram upper bounds in milliseconds; the last bucket is everything above
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Seconds covered by one ring slot, and slots kept per metric (one week)
+RESOLUTION = 60
+RING_SLOTS = 7 * 24 * 60
+# A session counts as active if it rendered a page this recently
+SESSION_TIMEOUT = 300
+# Next to patient_db.db in the project root, wherever the process was started
+METRICS_DB = os.getenv("METRICS_DB", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "metrics.db"))
+
+
+class _Series:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self, histogram):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1) if histogram else None
+
+    def add(self, value, n=1):
+        self.count += n
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if self.buckets is not None:
+            self.buckets[bisect_left(LATENCY_BUCKETS_MS, value)] += 1
+
+
+class MetricsStore:
+    """Per-minute metric aggregates in a fixed-size SQLite ring buffer.
+
+    Each metric has RING_SLOTS rows keyed by minute modulo RING_SLOTS, so
+    the file never grows past a week of data; a slot holding an older
+    period is overwritten on the next flush. Processes flushing the same
+    minute merge into the same row.
+    """
+
+    def __init__(self, db_path=METRICS_DB):
+        self.db_path = db_path
+        self._init_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_tables(self):
+        conn = self._connect()
+        conn.execute("""CREATE TABLE IF NOT EXISTS metrics_ring (
+            name TEXT NOT NULL,
+            slot INTEGER NOT NULL,
+            period INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            min_value REAL,
+            max_value REAL,
+            buckets TEXT,
+            PRIMARY KEY (name, slot)
+        )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_ring_period ON metrics_ring (period)")
+        conn.execute("""CREATE TABLE IF NOT EXISTS metrics_sessions (
+            session_id TEXT PRIMARY KEY,
+            last_seen REAL NOT NULL
+        )""")
+        conn.commit()
+        conn.close()
+
+    def write(self, series, sessions=None):
+        """Merge {(name, period): _Series} and {session_id: last_seen} into the ring"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for (name, period), s in series.items():
+                slot = period % RING_SLOTS
+                row = conn.execute(
+                    "SELECT period, count, total, min_value, max_value, buckets FROM metrics_ring "
+                    "WHERE name = ? AND slot = ?", (name, slot)
+                ).fetchone()
+                count, total, low, high, buckets = s.count, s.total, s.min, s.max, s.buckets
+                if row and row[0] == period:
+                    count, total = count + row[1], total + row[2]
+                    low, high = min(low, row[3]), max(high, row[4])
+                    if buckets is not None and row[5]:
+                        buckets = [a + b for a, b in zip(buckets, json.loads(row[5]))]
+                elif row and row[0] > period:
+                    continue  # Slot already reused for a newer period
+                conn.execute(
+                    "INSERT OR REPLACE INTO metrics_ring VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (name, slot, period, count, total, low, high, json.dumps(buckets) if buckets else None)
+                )
+            if sessions:
+                conn.executemany(
+                    "INSERT INTO metrics_sessions VALUES (?, ?) "
+                    "ON CONFLICT (session_id) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                    list(sessions.items())
+                )
+                conn.execute("DELETE FROM metrics_sessions WHERE last_seen < ?", (time.time() - SESSION_TIMEOUT,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _rows(self, seconds, name=None):
+        since = int((time.time() - seconds) // RESOLUTION)
+        query = "SELECT name, period, count, total, min_value, max_value, buckets FROM metrics_ring WHERE period >= ?"
+        params = [since]
+        if name:
+            query += " AND name = ?"
+            params.append(name)
+        conn = self._connect()
+        df = pd.read_sql_query(query + " ORDER BY period", conn, params=params)
+        conn.close()
+        return df
+
+    def summary(self, seconds=3600):
+        """One row per metric over the last `seconds`: count, rate, mean, max and p50/p95/p99"""
+        df = self._rows(seconds)
+        rows = []
+        for name, group in df.groupby("name", sort=True):
+            count, total = int(group["count"].sum()), float(group["total"].sum())
+            row = {"metric": name, "count": count, "per_minute": count * RESOLUTION / seconds,
+                   "mean": total / count if count else None, "max": group["max_value"].max()}
+            buckets = [json.loads(b) for b in group["buckets"].dropna()]
+            if buckets:
+                merged = [sum(column) for column in zip(*buckets)]
+                for q in (0.5, 0.95, 0.99):
+                    row[f"p{int(q * 100)}"] = _quantile(merged, q, row["max"])
+            rows.append(row)
+        return pd.DataFrame(rows, columns=["metric", "count", "per_minute", "mean", "p50", "p95", "p99", "max"])
+
+    def series(self, name, seconds=3600):
+        """Per-minute count and mean of one metric, indexed by time"""
+        df = self._rows(seconds, name)
+        df["time"] = pd.to_datetime(df["period"] * RESOLUTION, unit="s")
+        df["mean"] = df["total"] / df["count"].where(df["count"] > 0)
+        return df.set_index("time")[["count", "mean", "max_value"]]
+
+    def active_sessions(self, timeout=SESSION_TIMEOUT):
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM metrics_sessions WHERE last_seen >= ?",
+                             (time.time() - timeout,)).fetchone()[0]
+        conn.close()
+        return count
+
+
+def _quantile(buckets, q, maximum):
+    """Upper bound of the histogram bucket holding quantile q (max for the overflow bucket)"""
+    target = q * sum(buckets)
+    cumulative = 0
+    for i, n in enumerate(buckets):
+        cumulative += n
+        if n and cumulative >= target:
+            return min(LATENCY_BUCKETS_MS[i], maximum) if i < len(LATENCY_BUCKETS_MS) else maximum
+    return maximum
+
+
+class MetricsCollector:
+    """In-process counters and latency histograms, flushed to a MetricsStore.
+
+    Recording only touches a dict under a lock; a daemon thread merges the
+    accumulated minute buckets into the store every flush_interval seconds
+    (and once more at exit).
+    """
+
+    enabled = True
+
+    def __init__(self, store=None, flush_interval=10.0):
+        self.store = store or MetricsStore()
+        self.flush_interval = flush_interval
+        self._series = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _get(self, name, histogram):
+        key = (name, int(time.time() // RESOLUTION))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(histogram)
+        return series
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self._get(name, False).add(n, n)
+
+    def observe(self, name, value_ms):
+        with self._lock:
+            self._get(name, True).add(value_ms)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def session_seen(self, session_id):
+        with self._lock:
+            self._sessions[session_id] = time.time()
+
+    def flush(self):
+        if psutil is not None:
+            self.observe("system.cpu_percent", psutil.cpu_percent())
+            self.observe("system.memory_percent", psutil.virtual_memory().percent)
+        with self._lock:
+            series, self._series = self._series, {}
+            sessions, self._sessions = self._sessions, {}
+        if series or sessions:
+            self.store.write(series, sessions)
+
+    def start(self):
+        """Begin background flushing (idempotent)"""
+        if self._thread is None:
+            atexit.register(self.flush)
+            os.register_at_fork(after_in_child=self._after_fork)
+            self._start_thread()
+        return self
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        # Forked analysis workers inherit the collector but not its thread
+        self._series, self._sessions = {}, {}
+        self._lock = threading.Lock()
+        self._start_thread()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # Best effort: a failed flush drops one interval of samples
+
+
+class NullCollector:
+    """Stands in until configure() is called: records nothing, starts no thread, writes no file"""
+
+    enabled = False
+
+    def inc(self, name, n=1):
+        pass
+
+    def observe(self, name, value_ms):
+        pass
+
+    @contextmanager
+    def timer(self, name):
+        yield
+
+    def session_seen(self, session_id):
+        pass
+
+    def flush(self):
+        pass
+
+
+_NULL_COLLECTOR = NullCollector()
+_collector = None
+
+
+def configure(db_path=None, flush_interval=10.0):
+    """Start collecting into db_path (default METRICS_DB); idempotent.
+
+    Called by the entry points (Streamlit app, API server, analysis
+    workers); library code used from scripts and tests stays side-effect free.
+    """
+    global _collector
+    if _collector is None:
+        _collector = MetricsCollector(MetricsStore(db_path or METRICS_DB), flush_interval).start()
+    return _collector
+
+
+def get_collector():
+    """The process-wide collector, or a no-op one if metrics were not configured"""
+    return _collector or _NULL_COLLECTOR
+
+
+def tail_log(path, page=0, page_size=200, block_size=65536):
+    """Lines of a log file, newest page first, read backwards from the end.
+
+    Returns (lines in file order, has_older). Only the blocks covering the
+    requested page are read, however large the file is.
+    """
+    needed = (page + 1) * page_size + 1
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return [], False
+    with f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= needed:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    if position > 0:
+        lines = lines[1:]  # First line is cut mid-way
+    end = len(lines) - page * page_size
+    start = max(0, end - page_size)
+    return lines[start:max(end, 0)], start > 0 or position > 0
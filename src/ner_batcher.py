@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item calls into batched calls.
+
+    Callers submit() one item and get a Future. A background thread
+    collects items for at most max_wait_ms (or until max_batch_size is
+    reached) and hands the whole batch to run_batch, which returns either
+    a list of results in order or a Future resolving to one. Returning a
+    Future lets several batches be in flight at once, e.g. on a process
+    pool.
+    """
+
+    def __init__(self, run_batch: Callable, max_batch_size=16, max_wait_ms=5.0):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        if self._closed:
+            raise RuntimeError("Batcher is closed")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # Flush what we have, then stop on the next loop
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                result = self.run_batch(items)
+            except Exception as e:
+                self._fail(futures, e)
+                continue
+            if isinstance(result, Future):
+                result.add_done_callback(lambda done, futures=futures: self._resolve(futures, done))
+            else:
+                self._deliver(futures, result)
+
+    def _resolve(self, futures: List[Future], done: Future):
+        if done.exception() is not None:
+            self._fail(futures, done.exception())
+        else:
+            self._deliver(futures, done.result())
+
+    @staticmethod
+    def _deliver(futures: List[Future], results):
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    @staticmethod
+    def _fail(futures: List[Future], error):
+        for future in futures:
+            future.set_exception(error)
+
+
+class NERBatcher(MicroBatcher):
+    """Drop-in for MedicalNLPProcessor.extract_entities shared by many threads"""
+
+    def __init__(self, processor, max_batch_size=16, max_wait_ms=5.0):
+        super().__init__(processor.extract_entities_batch, max_batch_size, max_wait_ms)
+        self.processor = processor
+
+    def extract_entities(self, text):
+        return self.submit(text).result()
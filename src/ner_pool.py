@@ -0,0 +1,283 @@
+import gc
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+HEARTBEAT_INTERVAL = 1.0
+
+# Loaded in the parent before forking so workers share the model pages
+_processor = None
+_parser = None
+
+
+def _load_models():
+    global _processor, _parser
+    if _processor is None:
+        from nlp_processor import MedicalNLPProcessor
+        from report_parser import MedicalReportParser
+        _processor = MedicalNLPProcessor()
+        _parser = MedicalReportParser(_processor)
+
+
+def _op_entities(texts):
+    return _processor.extract_entities_batch(texts)
+
+
+def _op_parse(texts):
+    results = []
+    for text in texts:
+        try:
+            results.append({"sections": _parser.parse_text(text)})
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+OPERATIONS = {"entities": _op_entities, "parse": _op_parse}
+
+
+def _worker_main(index, conn, heartbeats, ready, load_in_child):
+    if load_in_child:
+        _load_models()
+    ready[index] = 1
+    while True:
+        heartbeats[index] = time.time()
+        if not conn.poll(HEARTBEAT_INTERVAL):
+            continue
+        try:
+            task = conn.recv()
+        except EOFError:
+            return  # Pool went away
+        if task is None:
+            return
+        task_id, op, payload = task
+        try:
+            result = (task_id, "ok", OPERATIONS[op](payload))
+        except Exception as e:
+            result = (task_id, "error", str(e))
+        conn.send(result)
+
+
+class NERWorkerPool:
+    """Forked NER workers sharing one copy of the scispaCy model.
+
+    The model is loaded once in the parent and the first workers are
+    forked from it before any pool thread starts, so its memory is shared
+    copy-on-write (gc.freeze keeps the collector from touching and
+    un-sharing those pages). Each worker has its own pipe and gets one
+    task at a time, so killing a worker cannot leave a lock held that the
+    others need. A supervisor thread restarts workers that die, hang
+    while idle, or exceed task_timeout, and retries their task once on
+    another worker. Replacements come from a fork server (or spawn), never
+    from a fork of the threaded parent, and load their own model within
+    load_timeout seconds. On platforms without fork every worker does.
+    """
+
+    def __init__(self, workers=None, task_timeout=120.0, idle_timeout=10.0, max_retries=1, load_timeout=300.0):
+        self.size = workers or os.cpu_count() or 1
+        self.task_timeout = task_timeout
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.load_timeout = load_timeout
+        self.restarts = 0
+
+        methods = multiprocessing.get_all_start_methods()
+        fork = "fork" in methods
+        self._ctx = multiprocessing.get_context("fork" if fork else "spawn")
+        self._restart_ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if fork:
+            _load_models()
+            gc.freeze()
+
+        self._heartbeats = self._ctx.Array('d', self.size, lock=False)
+        self._ready = self._ctx.Array('b', self.size, lock=False)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {}        # task_id -> [future, op, payload, attempts, submitted_at]
+        self._backlog = deque()   # task ids waiting for an idle worker
+        self._workers = [None] * self.size
+        self._conns = [None] * self.size
+        self._assigned = [None] * self.size   # task id each worker is running
+        self._started = [0.0] * self.size
+        self._closed = False
+
+        for index in range(self.size):
+            self._spawn(index, self._ctx, load_in_child=not fork)
+        self._supervisor = threading.Thread(target=self._run, name="ner-pool-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def _spawn(self, index, ctx, load_in_child):
+        parent_conn, child_conn = ctx.Pipe()
+        self._heartbeats[index] = time.time()
+        self._ready[index] = 0
+        worker = ctx.Process(
+            target=_worker_main,
+            args=(index, child_conn, self._heartbeats, self._ready, load_in_child),
+            name=f"ner-worker-{index}", daemon=True
+        )
+        worker.start()
+        child_conn.close()
+        self._workers[index] = worker
+        self._conns[index] = parent_conn
+        self._assigned[index] = None
+
+    # Public API
+    def submit(self, texts, op="entities") -> Future:
+        """Run an operation on a list of texts in a worker; resolves to a list"""
+        if self._closed:
+            raise RuntimeError("Pool is closed")
+        future = Future()
+        task_id = next(self._ids)
+        with self._lock:
+            self._pending[task_id] = [future, op, list(texts), 0, time.time()]
+            self._backlog.append(task_id)
+            self._dispatch()
+        return future
+
+    def extract_entities_batch(self, texts):
+        return self.submit(texts).result()
+
+    def extract_entities(self, text):
+        return self.extract_entities_batch([text])[0]
+
+    def parse_texts(self, texts):
+        return self.submit(texts, op="parse").result()
+
+    def health(self):
+        now = time.time()
+        return {
+            "workers": [
+                {
+                    "worker": i,
+                    "pid": w.pid,
+                    "alive": w.is_alive(),
+                    "ready": bool(self._ready[i]),
+                    "busy": self._assigned[i] is not None,
+                    "heartbeat_age": round(now - self._heartbeats[i], 2)
+                }
+                for i, w in enumerate(self._workers)
+            ],
+            "pending": len(self._pending),
+            "queued": len(self._backlog),
+            "restarts": self.restarts
+        }
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            for conn in self._conns:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self._supervisor.join(timeout=HEARTBEAT_INTERVAL * 2)
+        for conn in self._conns:
+            conn.close()
+
+    # Parent side
+    def _dispatch(self):
+        """Hand queued tasks to idle, ready workers (caller holds the lock)"""
+        for index in range(self.size):
+            if self._assigned[index] is not None or not self._ready[index] or not self._workers[index].is_alive():
+                continue
+            while self._backlog:
+                task_id = self._backlog.popleft()
+                entry = self._pending.get(task_id)
+                if entry is None:
+                    continue  # Expired while queued
+                try:
+                    self._conns[index].send((task_id, entry[1], entry[2]))
+                except OSError:
+                    self._backlog.appendleft(task_id)  # Worker died; the supervisor restarts it
+                    break
+                self._assigned[index] = task_id
+                self._started[index] = time.time()
+                break
+            if not self._backlog:
+                return
+
+    def _resolve(self, index, task_id, kind, payload):
+        with self._lock:
+            entry = self._pending.pop(task_id, None)
+            if self._assigned[index] == task_id:
+                self._assigned[index] = None
+            self._dispatch()
+        if entry is None:
+            return  # Already failed over or expired
+        if kind == "ok":
+            entry[0].set_result(payload)
+        else:
+            entry[0].set_exception(RuntimeError(payload))
+
+    def _run(self):
+        # Results, health checks and restarts all happen on this thread,
+        # so a worker's connection is never replaced while being read
+        while not self._closed:
+            conns = {conn: index for index, conn in enumerate(self._conns)}
+            for conn in wait(list(conns), timeout=HEARTBEAT_INTERVAL):
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    continue  # Worker died; restarted below
+                self._resolve(conns[conn], *message)
+            if self._closed:
+                return
+            now = time.time()
+            for index, worker in enumerate(self._workers):
+                if self._assigned[index] is not None:
+                    stuck = now - self._started[index] > self.task_timeout
+                    hung = False
+                else:
+                    stuck = False
+                    # Until ready the heartbeat holds the spawn time (model still loading)
+                    age = now - self._heartbeats[index]
+                    hung = age > (self.idle_timeout if self._ready[index] else self.load_timeout)
+                if not worker.is_alive() or stuck or hung:
+                    self._restart(index)
+            self._expire(now)
+            with self._lock:
+                self._dispatch()  # Workers that just finished loading
+
+    def _expire(self, now):
+        """Safety net for tasks that kept failing over or waited too long for a worker"""
+        deadline = self.task_timeout * (self.max_retries + 2)
+        with self._lock:
+            expired = [task_id for task_id, entry in self._pending.items() if now - entry[4] > deadline]
+            entries = [self._pending.pop(task_id) for task_id in expired]
+        for entry in entries:
+            entry[0].set_exception(TimeoutError("NER request timed out"))
+
+    def _restart(self, index):
+        worker, conn = self._workers[index], self._conns[index]
+        if worker.is_alive():
+            worker.terminate()
+        worker.join(timeout=5)
+        self.restarts += 1
+        # A result sent just before the worker died still counts
+        try:
+            while conn.poll():
+                self._resolve(index, *conn.recv())
+        except (EOFError, OSError):
+            pass
+        conn.close()
+        with self._lock:
+            task_id = self._assigned[index]
+            entry = self._pending.get(task_id) if task_id is not None else None
+            retry = entry is not None and entry[3] < self.max_retries
+            if retry:
+                entry[3] += 1
+                self._backlog.appendleft(task_id)
+            elif entry is not None:
+                del self._pending[task_id]
+            self._spawn(index, self._restart_ctx, load_in_child=True)
+        if entry is not None and not retry:
+            entry[0].set_exception(RuntimeError(f"NER worker {index} crashed or timed out on this request"))
@@ -1,81 +1,96 @@
 import spacy
 import json
 import re
+from text_chunker import chunk_spans, DEFAULT_CHUNK_CHARS, DEFAULT_OVERLAP_CHARS
+from entity_spans import EntitySpans
+from dosage_extraction import DOSAGE_PATTERN
+from term_matcher import get_tamil_matcher
+from instrumentation import timed
+import vocabulary  # Registers the "medical_vocabulary" pipeline component
+
+# Tamil glossary category -> entity label
+TAMIL_LABELS = {"conditions": "DISEASE", "symptoms": "DISEASE", "medications": "CHEMICAL", "body_parts": "BODY_PART"}
 
 class MedicalNLPProcessor:
-    def __init__(self):
+    def __init__(self, chunk_chars=DEFAULT_CHUNK_CHARS, overlap_chars=DEFAULT_OVERLAP_CHARS):
+        # Long documents are processed in windows so memory is bounded by chunk size
+        self.chunk_chars = chunk_chars
+        self.overlap_chars = overlap_chars
         try:
             # Load clinical model
             self.nlp = spacy.load("en_ner_bc5cdr_md")
             
-            # Add missing entity types
-            self.ruler = self.nlp.add_pipe("entity_ruler")
-            self._add_custom_patterns()
+            # Add missing entity types (body parts, procedures, local brands)
+            # from the precompiled vocabulary in data/vocabulary
+            self.vocabulary = self.nlp.add_pipe("medical_vocabulary")
             
-            # Configure processing
-            self.nlp.max_length = 1000000
+            # Configure processing (chunks stay well under this)
+            self.nlp.max_length = max(1000000, 2 * chunk_chars)
         except Exception as e:
             raise RuntimeError(f"Model loading failed: {str(e)}")
 
-    def _add_custom_patterns(self):
-        # Add Chennai-specific terms
-        patterns = []
-        
-        # Body parts
-        body_parts = ["heart", "liver", "kidney", "lung", "brain", "stomach", 
-                      "intestine", "spine", "arm", "leg", "head", "chest",
-                      "இதயம்", "கல்லீரல்", "சிறுநீரகம்"]  # Heart, Liver, Kidney in Tamil
-        for part in body_parts:
-            patterns.append({"label": "BODY_PART", "pattern": part})
-        
-        # Procedures
-        procedures = ["biopsy", "MRI", "CT scan", "X-ray", "surgery", "endoscopy",
-                     "colonoscopy", "angioplasty", "dialysis", "chemotherapy"]
-        for proc in procedures:
-            patterns.append({"label": "PROCEDURE", "pattern": proc})
-        
-        # Chennai medications
-        chennai_meds = ["dolo", "crocin", "calpol", "combiflam", "limcee", "revital", "thyronorm"]
-        for med in chennai_meds:
-            patterns.append({"label": "MEDICATION", "pattern": med})
+    def _dosage_mentions(self, text):
+        return [(m.start(), m.end(), "DOSAGE", m.group()) for m in DOSAGE_PATTERN.finditer(text)]
+
+    @timed("ner")
+    def _ents_from_chunks(self, texts, batch_size=32):
+        """Entity tuples (start, end, label, text) per input text, with global offsets"""
+        windows = []
+        for i, text in enumerate(texts):
+            for start, end, own_start, own_end in chunk_spans(text, self.chunk_chars, self.overlap_chars):
+                windows.append((i, start, end, own_start, own_end))
         
-        self.ruler.add_patterns(patterns)
+        results = [[] for _ in texts]
+        docs = self.nlp.pipe((texts[i][start:end] for i, start, end, _, _ in windows), batch_size=batch_size)
+        for (i, start, end, own_start, own_end), doc in zip(windows, docs):
+            for ent in doc.ents:
+                # Keep each entity once: in the window that owns its start
+                if own_start <= start + ent.start_char < own_end:
+                    results[i].append((start + ent.start_char, start + ent.end_char, ent.label_, ent.text))
+        return results
+
+    def _tamil_mentions(self, text):
+        return [(start, end, TAMIL_LABELS[category], tamil)
+                for start, end, category, tamil, _ in get_tamil_matcher().annotate(text, TAMIL_LABELS)]
+
+    def _build_spans(self, ents, text):
+        return EntitySpans.from_tuples(ents + self._dosage_mentions(text) + self._tamil_mentions(text))
+
+    def extract_entity_spans(self, text):
+        """All mentions with offsets, categories and normalized forms"""
+        return self.extract_entity_spans_batch([text])[0]
 
-    def _extract_dosages(self, text):
-        dosage_pattern = r'\b\d+\s*(?:mg|g|ml|mcg|IU|tablets?|drops|puffs|doses?)\b'
-        return list(set(re.findall(dosage_pattern, text, flags=re.IGNORECASE)))
+    def extract_entity_spans_batch(self, texts, batch_size=32):
+        ents = self._ents_from_chunks(texts, batch_size)
+        return [self._build_spans(doc_ents, text) for doc_ents, text in zip(ents, texts)]
 
     def extract_entities(self, text):
         if not text.strip():
             return json.dumps({"error": "Empty input text"})
         
         try:
-            doc = self.nlp(text)
-            entities = {
-                "CONDITIONS": [],
-                "MEDICATIONS": [],
-                "DOSAGES": self._extract_dosages(text),
-                "BODY_PARTS": [],
-                "PROCEDURES": []
-            }
-            
-            # Process entities
-            for ent in doc.ents:
-                if ent.label_ == "DISEASE":
-                    entities["CONDITIONS"].append(ent.text)
-                elif ent.label_ == "CHEMICAL":
-                    entities["MEDICATIONS"].append(ent.text)
-                elif ent.label_ == "BODY_PART":
-                    entities["BODY_PARTS"].append(ent.text)
-                elif ent.label_ == "PROCEDURE":
-                    entities["PROCEDURES"].append(ent.text)
-            
-            # Deduplicate and clean
-            for key in entities:
-                if isinstance(entities[key], list):
-                    entities[key] = list(set(entities[key]))
-            
-            return json.dumps(entities, indent=2)
-        
+            return json.dumps(self.extract_entity_spans(text).by_category(), indent=2)
         except Exception as e:
-            return json.dumps({"error": str(e)})
\ No newline at end of file
+            return json.dumps({"error": str(e)})
+
+    def extract_entities_batch(self, texts, batch_size=32):
+        """Same output as extract_entities for each text, run through nlp.pipe"""
+        results = [None] * len(texts)
+        todo = []
+        for i, text in enumerate(texts):
+            if text.strip():
+                todo.append(i)
+            else:
+                results[i] = json.dumps({"error": "Empty input text"})
+        
+        try:
+            spans = self.extract_entity_spans_batch([texts[i] for i in todo], batch_size)
+            for i, doc_spans in zip(todo, spans):
+                results[i] = json.dumps(doc_spans.by_category(), indent=2)
+        except Exception:
+            # Isolate the failing document instead of failing the whole batch
+            for i in todo:
+                if results[i] is None:
+                    results[i] = self.extract_entities(texts[i])
+        
+        return results
@@ -0,0 +1,90 @@
+# Real-time monitoring for Chennai hospitals (a page of: streamlit run src/main.py)
+from datetime import datetime, timedelta
+import pandas as pd
+import streamlit as st
+from instrumentation import timed_connect
+from metrics import MetricsStore, tail_log
+
+WINDOWS = {"Last 15 minutes": 900, "Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 604800}
+LOG_PAGE_SIZE = 200
+
+@st.cache_resource
+def load_metrics_store():
+    return MetricsStore()
+
+def hospital_usage(days=30):
+    """Appointments per hospital over the last `days`"""
+    conn = timed_connect('patient_db.db')
+    try:
+        df = pd.read_sql_query(
+            "SELECT COALESCE(NULLIF(hospital, ''), 'Unassigned') AS hospital, COUNT(*) AS appointments "
+            "FROM appointments WHERE start_at >= ? GROUP BY 1 ORDER BY 2 DESC",
+            conn, params=((datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M"),)
+        )
+    except pd.errors.DatabaseError:
+        df = pd.DataFrame(columns=["hospital", "appointments"])  # Scheduler has not migrated the table yet
+    finally:
+        conn.close()
+    return df.set_index("hospital")
+
+def main():
+    st.set_page_config(page_title="System Monitor", page_icon="📈")
+    st.title("📈 Chennai AI Health Monitor")
+    store = load_metrics_store()
+    window_label = st.selectbox("Window", list(WINDOWS), index=1)
+    seconds = WINDOWS[window_label]
+    summary = store.summary(seconds).set_index("metric")
+
+    def latest_mean(name):
+        return f"{summary.at[name, 'mean']:.0f}%" if name in summary.index else "n/a"
+
+    # System health
+    col1, col2, col3 = st.columns(3)
+    col1.metric("CPU (avg)", latest_mean("system.cpu_percent"))
+    col2.metric("Memory (avg)", latest_mean("system.memory_percent"))
+    col3.metric("Active Sessions", store.active_sessions())
+
+    # Hot paths
+    st.subheader("Latency")
+    col1, col2, col3 = st.columns(3)
+    for col, name, label in ((col1, "stage.ner_ms", "NER p95"), (col2, "analysis.job_ms", "Report Analysis p95")):
+        col.metric(label, f"{summary.at[name, 'p95']:.0f} ms" if name in summary.index else "n/a")
+    db_stages = summary[summary.index.str.startswith("stage.db.")]
+    if db_stages.empty:
+        col3.metric("Slowest DB Query p95", "n/a")
+    else:
+        slowest = db_stages["p95"].idxmax()
+        col3.metric("Slowest DB Query p95", f"{db_stages.at[slowest, 'p95']:.0f} ms",
+                    slowest[len("stage."):-len("_ms")], delta_color="off")
+    hits = summary["count"].get("cache.paragraph.hit", 0)
+    misses = summary["count"].get("cache.paragraph.miss", 0)
+    if hits + misses:
+        st.caption(f"Paragraph cache hit rate: {hits / (hits + misses):.0%} of {hits + misses} paragraphs")
+
+    latency_metrics = [name for name in summary.index if name.endswith("_ms")]
+    if latency_metrics:
+        chosen = st.selectbox("Metric", latency_metrics)
+        st.line_chart(store.series(chosen, seconds)[["mean", "max_value"]])
+    st.dataframe(summary, use_container_width=True)
+
+    # Usage analytics
+    st.subheader("Chennai Hospital Usage (appointments, last 30 days)")
+    usage = hospital_usage()
+    if usage.empty:
+        st.info("No appointments booked in the last 30 days")
+    else:
+        st.bar_chart(usage)
+
+    # Error logs, newest first, read from the end of the file
+    st.subheader("System Logs")
+    page = st.number_input("Page (0 = newest)", min_value=0, value=0, step=1)
+    lines, has_older = tail_log("error_log.txt", page, LOG_PAGE_SIZE)
+    if lines:
+        st.code("\n".join(lines))
+        if has_older:
+            st.caption(f"Older entries on page {page + 1}")
+    else:
+        st.info("No log entries")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import streamlit as st
+from population_vitals import PopulationVitalsAggregator
+
+def main():
+    st.set_page_config(page_title="Population Health", page_icon="🏙️")
+    st.title("🏙️ Chennai Population Vitals")
+    st.caption("Area-level summaries refreshed incrementally from patient vitals")
+
+    aggregator = PopulationVitalsAggregator()
+    if st.button("Refresh Summaries"):
+        processed = aggregator.refresh()
+        st.success(f"Processed {processed} new readings")
+
+    st.subheader("Hypertension Prevalence by Area")
+    prevalence = aggregator.hypertension_by_area()
+    if prevalence.empty:
+        st.info("No summaries yet - click Refresh Summaries")
+        return
+    st.dataframe(prevalence, hide_index=True)
+    st.bar_chart(prevalence.set_index("Area")["Prevalence %"])
+
+    st.subheader("BMI Distribution by Hospital")
+    st.dataframe(aggregator.bmi_by_hospital())
+
+    st.subheader("Monthly Trends")
+    area = st.selectbox("Area", ["All areas"] + prevalence["Area"].tolist())
+    trends = aggregator.monthly_trends(None if area == "All areas" else area)
+    st.line_chart(trends.set_index("Month")[["Hypertension %", "Mean Systolic", "Mean Diastolic"]])
+
+if __name__ == "__main__":
+    main()
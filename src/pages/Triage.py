@@ -0,0 +1,36 @@
+import os
+import streamlit as st
+from triage_watcher import TriageQueue
+
+URGENCY_ICONS = {"emergency": "🚨", "urgent": "🟧", "review": "🟨", "routine": "🟩"}
+
+def main():
+    st.set_page_config(page_title="Report Triage", page_icon="🚨")
+    st.title("🚨 Incoming Report Triage")
+    st.caption("Reports landing in data/reports, most urgent first (run triage_watcher.py to process them)")
+
+    queue = TriageQueue()
+    if st.button("Refresh"):
+        st.rerun()
+
+    pending = queue.pending()
+    if not pending:
+        st.info("No unacknowledged reports")
+        return
+
+    for item in pending:
+        label = f"{URGENCY_ICONS.get(item['urgency'], '')} {item['urgency'].title()} - {os.path.basename(item['path'])}"
+        with st.expander(label, expanded=item["urgency"] == "emergency"):
+            if item["error"]:
+                st.error(item["error"])
+            for finding in item["findings"]:
+                st.markdown(f"- **{finding.get('condition') or finding['type']}**: {finding.get('value', '')} "
+                            f"→ {finding.get('action', '')}")
+            st.markdown("\n".join(item["insights"].get("flags", [])))
+            st.caption(f"Received {item['created_at']}")
+            if st.button("Acknowledge", key=f"ack_{item['id']}"):
+                queue.acknowledge(item["id"])
+                st.rerun()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import re
+import sqlite3
+from datetime import datetime
+from clinical_insights import ClinicalInsightEngine
+from dosage_extraction import extract_dosages
+from entity_spans import EntitySpans
+from metrics import get_collector
+
+# Bump when extraction logic changes so stale cached results are ignored
+CACHE_VERSION = 2
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def split_paragraphs(text):
+    """(start, end) of each blank-line separated paragraph, covering the whole text"""
+    bounds = []
+    start = 0
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        bounds.append((start, match.end()))
+        start = match.end()
+    if start < len(text):
+        bounds.append((start, len(text)))
+    return bounds
+
+
+class ParagraphCache:
+    """Per-paragraph NER and vitals results keyed by content hash.
+
+    Stored in SQLite next to the analysis queue so every worker shares it;
+    least recently used rows are pruned beyond max_entries.
+    """
+
+    def __init__(self, db_path='patient_db.db', max_entries=50000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute("""CREATE TABLE IF NOT EXISTS paragraph_analysis (
+            hash TEXT PRIMARY KEY,
+            spans TEXT,
+            readings TEXT,
+            last_used TEXT
+        )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_paragraph_analysis_used ON paragraph_analysis (last_used)")
+        conn.commit()
+        conn.close()
+
+    def get_many(self, keys):
+        """{hash: (EntitySpans, readings)} for the keys that are cached"""
+        if not keys:
+            return {}
+        conn = self._connect()
+        unique = list(set(keys))
+        found = {}
+        for i in range(0, len(unique), 500):
+            part = unique[i:i + 500]
+            rows = conn.execute(
+                f"SELECT hash, spans, readings FROM paragraph_analysis WHERE hash IN ({','.join('?' * len(part))})",
+                part
+            ).fetchall()
+            for key, spans, readings in rows:
+                found[key] = (EntitySpans.from_dict(json.loads(spans)), json.loads(readings))
+        if found:
+            now = datetime.now().isoformat(timespec="seconds")
+            conn.executemany("UPDATE paragraph_analysis SET last_used = ? WHERE hash = ?",
+                             [(now, key) for key in found])
+            conn.commit()
+        conn.close()
+        return found
+
+    def put_many(self, entries):
+        """entries: {hash: (EntitySpans, readings)}"""
+        if not entries:
+            return
+        now = datetime.now().isoformat(timespec="seconds")
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO paragraph_analysis (hash, spans, readings, last_used) VALUES (?, ?, ?, ?)",
+            [(key, json.dumps(spans.to_dict()), json.dumps(readings), now)
+             for key, (spans, readings) in entries.items()]
+        )
+        count = conn.execute("SELECT COUNT(*) FROM paragraph_analysis").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM paragraph_analysis WHERE hash IN "
+                "(SELECT hash FROM paragraph_analysis ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        conn.commit()
+        conn.close()
+
+
+class IncrementalAnalyzer:
+    """Re-analyze only the paragraphs of a report that changed since last time.
+
+    Paragraphs are hashed; cached entity spans (paragraph-relative) and
+    vitals readings are reused for unchanged ones, the rest go through
+    one batched NER call, and everything is shifted back to document
+    offsets and merged.
+    """
+
+    def __init__(self, processor, cache: ParagraphCache, parser=None):
+        self.processor = processor
+        self.cache = cache
+        self.parser = parser
+        model_version = processor.nlp.meta.get("version", "") if hasattr(processor, "nlp") else ""
+        self._salt = f"{CACHE_VERSION}:{model_version}:".encode()
+
+    def _key(self, paragraph):
+        return hashlib.sha256(self._salt + paragraph.encode("utf-8")).hexdigest()
+
+    def analyze(self, text):
+        bounds = split_paragraphs(text)
+        paragraphs = [text[start:end] for start, end in bounds]
+        keys = [self._key(p) for p in paragraphs]
+        results = self.cache.get_many(keys)
+        metrics = get_collector()
+
+        # Each distinct changed paragraph is processed once
+        todo = {}
+        for key, paragraph in zip(keys, paragraphs):
+            if key not in results and key not in todo:
+                todo[key] = paragraph
+        metrics.inc("cache.paragraph.hit", len(keys) - len(todo))
+        metrics.inc("cache.paragraph.miss", len(todo))
+        if todo:
+            spans = self.processor.extract_entity_spans_batch(list(todo.values()))
+            fresh = {
+                key: (doc_spans, ClinicalInsightEngine.extract_readings(paragraph))
+                for (key, paragraph), doc_spans in zip(todo.items(), spans)
+            }
+            self.cache.put_many(fresh)
+            results.update(fresh)
+
+        spans = EntitySpans.concat([results[key][0].shifted(start) for key, (start, _) in zip(keys, bounds)])
+        if self.parser is not None:
+            spans.assign_sections(self.parser.section_boundaries(text))
+        readings = ClinicalInsightEngine.merge_readings(results[key][1] for key in keys)
+        return {
+            "text": text,
+            "entities": spans.by_category(),
+            "spans": spans.to_dict(),
+            "dosages": extract_dosages(text, spans),
+            "insights": ClinicalInsightEngine.insights_from_readings(readings),
+            "paragraphs": {"total": len(keys), "analyzed": len(todo)}
+        }
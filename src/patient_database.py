@@ -4,15 +4,15 @@ from datetime import datetime, timedelta
 import uuid
 import json
 import pandas as pd
-from cryptography.fernet import Fernet
 import os # Import os module to access environment variables
+from crypto_service import get_crypto_service, normalize_phone
 
 # Initialize encryption
 # Load encryption key from environment
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
 if not ENCRYPTION_KEY:
     raise RuntimeError("ENCRYPTION_KEY not set in environment for patient_database.py")
-cipher_suite = Fernet(ENCRYPTION_KEY)
+crypto = get_crypto_service()
 
 # Database setup
 def init_db():
@@ -112,16 +112,69 @@ def init_db():
     except sqlite3.OperationalError:
         pass  # Columns already exist
     
+    # Blind index for phone search (phone itself is randomized ciphertext)
+    try:
+        c.execute("ALTER TABLE patients ADD COLUMN phone_index TEXT")
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+    c.execute("CREATE INDEX IF NOT EXISTS idx_patients_phone_index ON patients(phone_index)")
+    
     conn.commit()
     conn.close()
 
 # Encrypt sensitive data
 def encrypt_data(data):
-    return cipher_suite.encrypt(data.encode()).decode()
+    return crypto.encrypt(data)
 
 # Decrypt data
 def decrypt_data(encrypted_data):
-    return cipher_suite.decrypt(encrypted_data.encode()).decode()
+    return crypto.decrypt(encrypted_data)
+
+# Bulk variants for exports and listings
+def encrypt_many(values, parallel=None):
+    return crypto.encrypt_many(values, parallel)
+
+def decrypt_many(encrypted_values, parallel=None):
+    return crypto.decrypt_many(encrypted_values, parallel)
+
+# Keyed HMAC of the normalized phone number, stored in patients.phone_index
+def phone_blind_index(phone):
+    return crypto.blind_index(phone, normalize_phone)
+
+def find_patients_by_phone(phone, columns="id, name, age, gender, phone, address, area, preferred_hospital, insurance"):
+    """Equality lookup on the phone blind index"""
+    conn = sqlite3.connect('patient_db.db')
+    c = conn.cursor()
+    c.execute(f"SELECT {columns} FROM patients WHERE phone_index = ?", (phone_blind_index(phone),))
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+def backfill_phone_index(batch_size=1000):
+    """Populate phone_index for rows written before the column existed"""
+    conn = sqlite3.connect('patient_db.db')
+    c = conn.cursor()
+    updated = 0
+    last_rowid = 0
+    while True:
+        c.execute(
+            "SELECT rowid, phone FROM patients WHERE rowid > ? AND phone_index IS NULL AND phone IS NOT NULL ORDER BY rowid LIMIT ?",
+            (last_rowid, batch_size)
+        )
+        rows = c.fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        # Rows under an unknown key are left NULL rather than aborting the job
+        phones = crypto.decrypt_many([row[1] for row in rows], skip_invalid=True)
+        c.executemany(
+            "UPDATE patients SET phone_index = ? WHERE rowid = ?",
+            [(phone_blind_index(phone), row[0]) for phone, row in zip(phones, rows) if phone is not None]
+        )
+        conn.commit()
+        updated += sum(phone is not None for phone in phones)
+    conn.close()
+    return updated
 
 # Initialize database on import
 init_db()
@@ -151,4 +204,7 @@ def check_prescription_safety(patient_id, medication):
         warnings.append("⚠️ **Asthma Alert**: Beta-blockers may exacerbate asthma")
     
     conn.close()
-    return warnings
\ No newline at end of file
+    return warnings
+
+if __name__ == "__main__":
+    print(f"Backfilled phone index for {backfill_phone_index()} patients")
\ No newline at end of file
@@ -0,0 +1,192 @@
+import sqlite3
+import pandas as pd
+from vitals_analytics import classify_bp, classify_bmi
+
+STATE_KEY = "population_vitals.last_vital_id"
+
+
+class PopulationVitalsAggregator:
+    """Incrementally maintained population summaries over patient_vitals.
+
+    Counts and sums are additive, so each refresh only reads readings with
+    an id above the last processed one and folds them into the summary
+    tables. Readings are attributed to the patient's area/hospital at the
+    time they are processed; call rebuild() after bulk patient edits.
+    """
+
+    def __init__(self, db_path='patient_db.db', chunk_size=50000):
+        self.db_path = db_path
+        self.chunk_size = chunk_size
+        self._init_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def _init_tables(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute("""CREATE TABLE IF NOT EXISTS aggregation_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )""")
+        c.execute("""CREATE TABLE IF NOT EXISTS vitals_area_summary (
+            area TEXT PRIMARY KEY,
+            readings INTEGER DEFAULT 0,
+            hypertensive INTEGER DEFAULT 0,
+            hypotensive INTEGER DEFAULT 0
+        )""")
+        c.execute("""CREATE TABLE IF NOT EXISTS vitals_bmi_summary (
+            hospital TEXT,
+            category TEXT,
+            readings INTEGER DEFAULT 0,
+            PRIMARY KEY (hospital, category)
+        )""")
+        c.execute("""CREATE TABLE IF NOT EXISTS vitals_monthly_summary (
+            month TEXT,
+            area TEXT,
+            readings INTEGER DEFAULT 0,
+            hypertensive INTEGER DEFAULT 0,
+            bp_readings INTEGER DEFAULT 0,
+            sum_systolic REAL DEFAULT 0,
+            sum_diastolic REAL DEFAULT 0,
+            bmi_readings INTEGER DEFAULT 0,
+            sum_bmi REAL DEFAULT 0,
+            PRIMARY KEY (month, area)
+        )""")
+        conn.commit()
+        conn.close()
+
+    def last_processed_id(self, conn):
+        row = conn.execute("SELECT value FROM aggregation_state WHERE key = ?", (STATE_KEY,)).fetchone()
+        return row[0] if row else 0
+
+    def refresh(self):
+        """Fold readings added since the last run into the summaries; returns rows processed"""
+        conn = self._connect()
+        last_id = self.last_processed_id(conn)
+        query = """SELECT v.id, v.date, v.bp_systolic, v.bp_diastolic, v.bmi,
+                          COALESCE(p.area, 'Unknown') AS area,
+                          COALESCE(p.preferred_hospital, 'Unknown') AS hospital
+                   FROM patient_vitals v
+                   LEFT JOIN patients p ON v.patient_id = p.id
+                   WHERE v.id > ?
+                   ORDER BY v.id"""
+        processed = 0
+        # Materialize chunk by chunk so memory stays bounded by chunk_size
+        for chunk in pd.read_sql_query(query, conn, params=(last_id,), chunksize=self.chunk_size):
+            if chunk.empty:
+                continue
+            self._apply_chunk(conn, chunk)
+            processed += len(chunk)
+        conn.close()
+        return processed
+
+    def _apply_chunk(self, conn, chunk):
+        status = classify_bp(chunk["bp_systolic"], chunk["bp_diastolic"])
+        chunk = chunk.assign(
+            hypertensive=(status == "🟥 Hypertension").astype(int),
+            hypotensive=(status == "🟦 Hypotension").astype(int),
+            category=classify_bmi(chunk["bmi"]),
+            month=pd.to_datetime(chunk["date"], errors="coerce").dt.strftime("%Y-%m").fillna("Unknown"),
+            has_bp=(chunk["bp_systolic"].notna() & chunk["bp_diastolic"].notna()).astype(int),
+            has_bmi=(chunk["bmi"].fillna(0) > 0).astype(int),
+            bmi_value=chunk["bmi"].where(chunk["bmi"].fillna(0) > 0, 0.0)
+        )
+
+        by_area = chunk.groupby("area").agg(
+            readings=("id", "size"), hypertensive=("hypertensive", "sum"), hypotensive=("hypotensive", "sum")
+        )
+        by_bmi = chunk[chunk["category"] != ""].groupby(["hospital", "category"]).size()
+        by_month = chunk.groupby(["month", "area"]).agg(
+            readings=("id", "size"), hypertensive=("hypertensive", "sum"), bp_readings=("has_bp", "sum"),
+            sum_systolic=("bp_systolic", "sum"), sum_diastolic=("bp_diastolic", "sum"),
+            bmi_readings=("has_bmi", "sum"), sum_bmi=("bmi_value", "sum")
+        )
+
+        c = conn.cursor()
+        # One transaction per chunk: summaries and high-water mark move together
+        c.executemany("""INSERT INTO vitals_area_summary (area, readings, hypertensive, hypotensive)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(area) DO UPDATE SET
+                readings = readings + excluded.readings,
+                hypertensive = hypertensive + excluded.hypertensive,
+                hypotensive = hypotensive + excluded.hypotensive""",
+            [(area, int(r.readings), int(r.hypertensive), int(r.hypotensive)) for area, r in by_area.iterrows()]
+        )
+        c.executemany("""INSERT INTO vitals_bmi_summary (hospital, category, readings)
+            VALUES (?, ?, ?)
+            ON CONFLICT(hospital, category) DO UPDATE SET readings = readings + excluded.readings""",
+            [(hospital, category, int(n)) for (hospital, category), n in by_bmi.items()]
+        )
+        c.executemany("""INSERT INTO vitals_monthly_summary
+            (month, area, readings, hypertensive, bp_readings, sum_systolic, sum_diastolic, bmi_readings, sum_bmi)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(month, area) DO UPDATE SET
+                readings = readings + excluded.readings,
+                hypertensive = hypertensive + excluded.hypertensive,
+                bp_readings = bp_readings + excluded.bp_readings,
+                sum_systolic = sum_systolic + excluded.sum_systolic,
+                sum_diastolic = sum_diastolic + excluded.sum_diastolic,
+                bmi_readings = bmi_readings + excluded.bmi_readings,
+                sum_bmi = sum_bmi + excluded.sum_bmi""",
+            [(month, area, int(r.readings), int(r.hypertensive), int(r.bp_readings), float(r.sum_systolic),
+              float(r.sum_diastolic), int(r.bmi_readings), float(r.sum_bmi))
+             for (month, area), r in by_month.iterrows()]
+        )
+        c.execute("""INSERT INTO aggregation_state (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value""",
+            (STATE_KEY, int(chunk["id"].max()))
+        )
+        conn.commit()
+
+    def rebuild(self):
+        """Drop all summaries and reprocess patient_vitals from the start"""
+        conn = self._connect()
+        c = conn.cursor()
+        for table in ("vitals_area_summary", "vitals_bmi_summary", "vitals_monthly_summary"):
+            c.execute(f"DELETE FROM {table}")
+        c.execute("DELETE FROM aggregation_state WHERE key = ?", (STATE_KEY,))
+        conn.commit()
+        conn.close()
+        return self.refresh()
+
+    # Read side: small summary tables only, never the raw readings
+    def hypertension_by_area(self):
+        conn = self._connect()
+        df = pd.read_sql_query(
+            """SELECT area AS Area, readings AS Readings, hypertensive AS Hypertensive,
+                      ROUND(100.0 * hypertensive / readings, 1) AS "Prevalence %"
+               FROM vitals_area_summary WHERE readings > 0 ORDER BY "Prevalence %" DESC""",
+            conn
+        )
+        conn.close()
+        return df
+
+    def bmi_by_hospital(self):
+        conn = self._connect()
+        df = pd.read_sql_query("SELECT hospital, category, readings FROM vitals_bmi_summary", conn)
+        conn.close()
+        if df.empty:
+            return df
+        return df.pivot_table(index="hospital", columns="category", values="readings", fill_value=0)
+
+    def monthly_trends(self, area=None):
+        conn = self._connect()
+        where, params = ("WHERE area = ?", (area,)) if area else ("", ())
+        df = pd.read_sql_query(
+            f"""SELECT month AS Month, SUM(readings) AS Readings,
+                       ROUND(100.0 * SUM(hypertensive) / SUM(readings), 1) AS "Hypertension %",
+                       ROUND(SUM(sum_systolic) / NULLIF(SUM(bp_readings), 0), 1) AS "Mean Systolic",
+                       ROUND(SUM(sum_diastolic) / NULLIF(SUM(bp_readings), 0), 1) AS "Mean Diastolic",
+                       ROUND(SUM(sum_bmi) / NULLIF(SUM(bmi_readings), 0), 1) AS "Mean BMI"
+                FROM vitals_monthly_summary {where}
+                GROUP BY month ORDER BY month""",
+            conn, params=params
+        )
+        conn.close()
+        return df
+
+
+if __name__ == "__main__":
+    aggregator = PopulationVitalsAggregator()
+    print(f"Processed {aggregator.refresh()} new vitals readings")
@@ -0,0 +1,123 @@
+import re
+from functools import lru_cache
+from data.red_flags import RED_FLAG_CATALOGUE
+
+URGENCY_RANK = {"emergency": 0, "urgent": 1}
+_VALUE = r"(?P<c{i}>[<>]=?)?\s*(?P<v{i}>\d(?:[\d,]*\d)?(?:\.\d+)?)"
+# A phrase is negated by one of these cues earlier in its clause
+_NEGATION = re.compile(r"\b(?:no|not|denies|denied|deny|without|negative\s+for|absence\s+of|free\s+of|ruled\s+out)\b",
+                       re.IGNORECASE)
+_CLAUSE_BREAK = re.compile(r"[.;:!?\n]|\bbut\b|\bhowever\b", re.IGNORECASE)
+NEGATION_WINDOW = 60
+
+
+def _phrase_pattern(phrase):
+    return r"\s+".join(re.escape(word) for word in phrase.split())
+
+
+def _unit_pattern(rule, i):
+    units = "|".join(f"(?P<u{i}_{j}>{unit['pattern']})" for j, unit in enumerate(rule.get("units", [])))
+    return rf"(?:\s*(?:{units}))?" if units else ""
+
+
+def _negated(text, start):
+    """True if a negation cue precedes position start within the same clause"""
+    window = text[max(0, start - NEGATION_WINDOW):start]
+    breaks = list(_CLAUSE_BREAK.finditer(window))
+    if breaks:
+        window = window[breaks[-1].end():]
+    return _NEGATION.search(window) is not None
+
+
+def _exceeds(rule, value, comparator):
+    """True if a reading (possibly written as '<x' or '>x') is outside the rule's bounds"""
+    above, below = rule.get("above"), rule.get("below")
+    if above is not None and (value > above or (comparator.startswith(">") and value >= above)):
+        return True
+    if below is not None and (value < below or (comparator.startswith("<") and value <= below)):
+        return True
+    return False
+
+
+def _unit_factor(rule, i, match, value):
+    """Factor converting a reading to the unit of the rule's bounds"""
+    for j, unit in enumerate(rule.get("units", [])):
+        if match.group(f"u{i}_{j}") is not None:
+            return unit["factor"]
+    for bare in rule.get("unitless", []):
+        if value < bare["below"]:
+            return bare["factor"]
+    return 1
+
+
+class RedFlagDetector:
+    """Red-flag catalogue compiled into a single case-insensitive regex.
+
+    Every phrase and numeric pattern is an alternative of one pattern, so
+    a report is scanned once no matter how many flags are defined.
+    Numeric hits are converted to the rule's unit and compared against
+    its bounds after matching; negated phrases are skipped.
+    """
+
+    def __init__(self, catalogue=None):
+        self.catalogue = catalogue or RED_FLAG_CATALOGUE
+        self._phrases = {}    # normalized phrase -> flag
+        self._numeric = []    # rule index -> (flag, rule)
+        alternatives = []
+        for flag in self.catalogue:
+            for phrase in flag.get("phrases", []):
+                self._phrases[" ".join(phrase.lower().split())] = flag
+            for rule in flag.get("numeric", []):
+                i = len(self._numeric)
+                self._numeric.append((flag, rule))
+                body = rule["pattern"].replace("{value}", _VALUE.format(i=i)).replace("{unit}", _unit_pattern(rule, i))
+                alternatives.append(f"(?P<n{i}>{body})")
+        if self._phrases:
+            # Longest first so "crushing chest pain" wins over "chest pain"
+            phrases = sorted(self._phrases, key=len, reverse=True)
+            alternatives.insert(0, r"\b(?P<phrase>" + "|".join(map(_phrase_pattern, phrases)) + r")\b")
+        self._pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+
+    def scan(self, text):
+        """Every red-flag hit in text order: {condition, urgency, action, evidence, start, end, measure, value}"""
+        hits = []
+        if self._pattern is None:
+            return hits
+        for match in self._pattern.finditer(text):
+            group = match.lastgroup
+            if group == "phrase":
+                if _negated(text, match.start()):
+                    continue
+                flag = self._phrases[" ".join(match.group().lower().split())]
+                measure, value = None, None
+            else:
+                i = int(group[1:])
+                flag, rule = self._numeric[i]
+                measure = rule.get("measure")
+                value = float(match.group(f"v{i}").replace(",", ""))
+                value *= _unit_factor(rule, i, match, value)
+                if not _exceeds(rule, value, match.group(f"c{i}") or ""):
+                    continue
+            hits.append({
+                "condition": flag["condition"],
+                "urgency": flag["urgency"],
+                "action": flag["action"],
+                "evidence": match.group(),
+                "start": match.start(),
+                "end": match.end(),
+                "measure": measure,
+                "value": value
+            })
+        return hits
+
+    def detect(self, text):
+        """One hit per condition (its first evidence), most urgent first"""
+        first = {}
+        for hit in self.scan(text):
+            first.setdefault(hit["condition"], hit)
+        return sorted(first.values(), key=lambda hit: (URGENCY_RANK.get(hit["urgency"], len(URGENCY_RANK)), hit["start"]))
+
+
+@lru_cache(maxsize=1)
+def get_red_flag_detector():
+    return RedFlagDetector()
@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from crypto_service import get_crypto_service, normalize_phone
+from appointment_scheduler import TIME_FORMAT, AppointmentScheduler
+
+REMINDER_TEMPLATE = ("Reminder: {name}, your appointment{with_doctor} at {hospital} is on {when}. "
+                     "Reply C to cancel.")
+OUTBOX_PATH = os.path.join("data", "outbox", "sms.jsonl")
+# A claim older than this belongs to a run that died; its reminders are due again
+CLAIM_TIMEOUT = 3600
+
+
+class GatewayError(Exception):
+    """A batch the gateway rejected; retryable unless permanent is set"""
+
+    def __init__(self, message, permanent=False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class SMSGateway(ABC):
+    """Interface for SMS providers: send one batch of {"id", "to", "body"} messages"""
+
+    max_batch_size = 100
+
+    @abstractmethod
+    async def send_batch(self, messages):
+        """Send the batch or raise GatewayError"""
+
+
+class FileGateway(SMSGateway):
+    """Local stub: appends each message as a JSON line instead of sending it"""
+
+    def __init__(self, path=OUTBOX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    async def send_batch(self, messages):
+        await asyncio.to_thread(self._write, messages)
+
+    def _write(self, messages):
+        sent_at = datetime.now().isoformat(timespec="seconds")
+        with open(self.path, "a", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps({**message, "sent_at": sent_at}, ensure_ascii=False) + "\n")
+
+
+class HTTPGateway(SMSGateway):
+    """POSTs {"messages": [...]} as JSON; 5xx and network errors are retried, 4xx are not"""
+
+    def __init__(self, url, token=None, timeout=10.0):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+
+    async def send_batch(self, messages):
+        await asyncio.to_thread(self._post, messages)
+
+    def _post(self, messages):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.url, data=json.dumps({"messages": messages}).encode(),
+                                         headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            raise GatewayError(f"Gateway returned {e.code}", permanent=400 <= e.code < 500 and e.code != 429)
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise GatewayError(f"Gateway unreachable: {e}")
+
+
+def gateway_from_env():
+    """HTTPGateway when SMS_GATEWAY_URL is set, otherwise the local file outbox"""
+    url = os.getenv("SMS_GATEWAY_URL")
+    if url:
+        return HTTPGateway(url, os.getenv("SMS_GATEWAY_TOKEN"))
+    return FileGateway(os.getenv("SMS_OUTBOX", OUTBOX_PATH))
+
+
+class RateLimiter:
+    """Token bucket shared by all send tasks; acquire(n) waits for n message credits"""
+
+    def __init__(self, rate_per_second, burst=None):
+        self.rate = float(rate_per_second)
+        self.capacity = float(burst or rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, n=1):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+
+class ReminderDispatcher:
+    """Sends reminders for upcoming appointments through an SMSGateway.
+
+    Due appointments come from one query on the start_at index, phones are
+    decrypted in one bulk call, and batches go out concurrently under a
+    shared rate limit. Failed batches are retried with backoff; every
+    outcome is written to reminder_log so reruns skip what was sent.
+    Due reminders are claimed ('sending') in one transaction before any
+    is sent, so overlapping runs never pick up the same appointment.
+    """
+
+    def __init__(self, db_path='patient_db.db', gateway=None, batch_size=None, concurrency=8,
+                 rate_per_second=50, max_retries=3, retry_delay=1.0):
+        self.db_path = db_path
+        self.gateway = gateway or gateway_from_env()
+        self.batch_size = min(batch_size or self.gateway.max_batch_size, self.gateway.max_batch_size)
+        self.concurrency = concurrency
+        self.rate_per_second = rate_per_second
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        AppointmentScheduler(db_path)  # Ensures start_at and its index exist
+        self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute("""CREATE TABLE IF NOT EXISTS reminder_log (
+            appointment_id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            error TEXT,
+            sent_at TEXT
+        )""")
+        try:
+            conn.execute("ALTER TABLE reminder_log ADD COLUMN claimed_at TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        conn.commit()
+        conn.close()
+
+    def due(self, start, end):
+        """Claim scheduled appointments in [start, end) without a sent reminder; returns them as messages"""
+        now = datetime.now()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                """SELECT a.id, p.name, p.phone, a.start_at, a.hospital, a.doctor
+                   FROM appointments a
+                   JOIN patients p ON a.patient_id = p.id
+                   LEFT JOIN reminder_log r ON r.appointment_id = a.id
+                   WHERE a.start_at >= ? AND a.start_at < ? AND a.status = 'Scheduled'
+                     AND (r.status IS NULL OR r.status NOT IN ('sent', 'sending')
+                          OR (r.status = 'sending' AND r.claimed_at < ?))
+                   ORDER BY a.start_at""",
+                (start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT),
+                 (now - timedelta(seconds=CLAIM_TIMEOUT)).isoformat(timespec="seconds"))
+            ).fetchall()
+            conn.executemany(
+                """INSERT INTO reminder_log (appointment_id, status, claimed_at) VALUES (?, 'sending', ?)
+                   ON CONFLICT (appointment_id) DO UPDATE SET status = 'sending', claimed_at = excluded.claimed_at""",
+                [(row[0], now.isoformat(timespec="seconds")) for row in rows]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        phones = get_crypto_service().decrypt_many([row[2] for row in rows], skip_invalid=True)
+        messages, skipped = [], []
+        for (appointment_id, name, _, start_at, hospital, doctor), phone in zip(rows, phones):
+            if not phone:
+                skipped.append(appointment_id)
+                continue
+            when = datetime.strptime(start_at, TIME_FORMAT).strftime("%d %b %Y, %I:%M %p")
+            messages.append({
+                "id": appointment_id,
+                "to": normalize_phone(phone),
+                "body": REMINDER_TEMPLATE.format(name=name, when=when, hospital=hospital or "the clinic",
+                                                 with_doctor=f" with {doctor}" if doctor else "")
+            })
+        if skipped:
+            self._log([(appointment_id, "skipped", 0, "No decryptable phone number") for appointment_id in skipped])
+        return messages
+
+    def _log(self, outcomes):
+        sent_at = datetime.now().isoformat(timespec="seconds")
+        conn = self._connect()
+        conn.executemany(
+            """INSERT INTO reminder_log (appointment_id, status, attempts, error, sent_at) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (appointment_id) DO UPDATE SET status = excluded.status,
+               attempts = reminder_log.attempts + excluded.attempts, error = excluded.error, sent_at = excluded.sent_at""",
+            [(appointment_id, status, attempts, error, sent_at) for appointment_id, status, attempts, error in outcomes]
+        )
+        conn.commit()
+        conn.close()
+
+    async def _send(self, batch, limiter, semaphore):
+        """Send one batch with retries; returns (status, attempts, error)"""
+        async with semaphore:
+            for attempt in range(1, self.max_retries + 2):
+                await limiter.acquire(len(batch))
+                try:
+                    await self.gateway.send_batch(batch)
+                    return "sent", attempt, None
+                except GatewayError as e:
+                    if e.permanent or attempt > self.max_retries:
+                        return "failed", attempt, str(e)
+                    await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+                except Exception as e:
+                    # A bug or unexpected gateway error fails this batch only, so
+                    # every other batch's outcome is still logged (no resends)
+                    return "failed", attempt, f"{type(e).__name__}: {e}"
+
+    async def dispatch_async(self, start, end):
+        messages = await asyncio.to_thread(self.due, start, end)
+        batches = [messages[i:i + self.batch_size] for i in range(0, len(messages), self.batch_size)]
+        limiter = RateLimiter(self.rate_per_second, max(self.rate_per_second, self.batch_size))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*[self._send(batch, limiter, semaphore) for batch in batches])
+
+        outcomes = [(message["id"], status, attempts, error)
+                    for batch, (status, attempts, error) in zip(batches, results) for message in batch]
+        if outcomes:
+            await asyncio.to_thread(self._log, outcomes)
+        sent = sum(1 for outcome in outcomes if outcome[1] == "sent")
+        return {"due": len(messages), "sent": sent, "failed": len(outcomes) - sent}
+
+    def dispatch(self, start=None, end=None):
+        """Send reminders for appointments in [start, end); defaults to the next 24 hours"""
+        start = start or datetime.now()
+        end = end or start + timedelta(days=1)
+        return asyncio.run(self.dispatch_async(start, end))
+
+
+def serve_stub(port=8025, path=OUTBOX_PATH):
+    """Local HTTP gateway for testing HTTPGateway; received messages go to path"""
+    outbox = FileGateway(path)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                outbox._write(json.loads(body)["messages"])
+            except (ValueError, KeyError):
+                self.send_response(400)
+            else:
+                self.send_response(202)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    print(f"SMS gateway stub on http://127.0.0.1:{port}/, writing to {path}")
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send SMS reminders for upcoming appointments")
+    parser.add_argument("--db", default="patient_db.db")
+    parser.add_argument("--hours", type=float, default=24, help="Remind appointments starting within this many hours")
+    parser.add_argument("--rate", type=float, default=50, help="Messages per second")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--serve-stub", type=int, metavar="PORT", help="Run the local HTTP gateway stub instead")
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        serve_stub(args.serve_stub)
+    else:
+        dispatcher = ReminderDispatcher(args.db, concurrency=args.concurrency, rate_per_second=args.rate)
+        now = datetime.now()
+        stats = dispatcher.dispatch(now, now + timedelta(hours=args.hours))
+        print(f"{stats['sent']}/{stats['due']} reminders sent, {stats['failed']} failed")
@@ -3,10 +3,12 @@ import json
 from PyPDF2 import PdfReader
 import os # Added import for os module
 from nlp_processor import MedicalNLPProcessor  # Import our NLP processor
+from instrumentation import timed
 
 class MedicalReportParser:
-    def __init__(self):
-        self.nlp_processor = MedicalNLPProcessor()
+    def __init__(self, nlp_processor=None):
+        # Share an already loaded processor instead of loading the model again
+        self.nlp_processor = nlp_processor or MedicalNLPProcessor()
         self.section_patterns = {
             "patient_info": r"(PATIENT DETAILS|PATIENT INFORMATION|பொதுவான விவரங்கள்)",
             "clinical_history": r"(CLINICAL HISTORY|HISTORY OF PRESENT ILLNESS|நோய் வரலாறு)",
@@ -19,6 +21,7 @@ class MedicalReportParser:
             r"Page \d+ of \d+"
         ]
 
+    @timed("extract_text")
     def extract_text(self, file_path):
         """Extract text from PDF or text files"""
         if file_path.lower().endswith('.pdf'):
@@ -32,6 +35,7 @@ class MedicalReportParser:
             with open(file_path, 'r', encoding='utf-8') as file:
                 return file.read()
 
+    @timed("preprocess")
     def preprocess_text(self, text):
         """Clean text with Chennai-specific optimizations"""
         # Remove headers/footers common in Chennai hospitals
@@ -70,28 +74,43 @@ class MedicalReportParser:
         
         return sections
 
+    def section_boundaries(self, text):
+        """[(offset, section)] for each section header line in the given text"""
+        boundaries = []
+        offset = 0
+        for line in text.split('\n'):
+            for section, pattern in self.section_patterns.items():
+                if re.search(pattern, line, re.IGNORECASE):
+                    boundaries.append((offset, section))
+                    break
+            offset += len(line) + 1
+        return boundaries
+
+    def parse_text(self, raw_text):
+        """Preprocess, split into sections and run NLP on each section"""
+        # Step 2: Preprocess text
+        cleaned_text = self.preprocess_text(raw_text)
+        
+        # Step 3: Identify sections
+        sections = self.identify_sections(cleaned_text)
+        
+        # Step 4: Process sections with NLP
+        results = {}
+        for section, content in sections.items():
+            if content.strip():
+                extracted_data = self.nlp_processor.extract_entities(content)
+                results[section] = json.loads(extracted_data)
+        return results
+
     def parse_report(self, file_path):
         """Main function to parse medical reports"""
         try:
             # Step 1: Extract raw text
             raw_text = self.extract_text(file_path)
             
-            # Step 2: Preprocess text
-            cleaned_text = self.preprocess_text(raw_text)
-            
-            # Step 3: Identify sections
-            sections = self.identify_sections(cleaned_text)
-            
-            # Step 4: Process sections with NLP
-            results = {}
-            for section, content in sections.items():
-                if content.strip():
-                    extracted_data = self.nlp_processor.extract_entities(content)
-                    results[section] = json.loads(extracted_data)
-            
             return json.dumps({
                 "file": file_path,
-                "sections": results
+                "sections": self.parse_text(raw_text)
             }, indent=2)
             
         except Exception as e:
@@ -0,0 +1,207 @@
+import argparse
+import os
+import random
+import sqlite3
+from datetime import date, timedelta
+from data.tamil_medical_terms import TAMIL_MEDICAL_TERMS
+
+# Everything here is generated from a seed, so the same arguments always
+# give the same corpus and benchmark runs stay comparable.
+HOSPITALS = ["APOLLO HOSPITALS, CHENNAI", "KAUVERY HOSPITAL", "MIOT INTERNATIONAL", "FORTIS MALAR",
+             "GLOBAL HOSPITALS", "SIMS HOSPITAL", "RAJIV GANDHI GOVERNMENT GENERAL HOSPITAL"]
+AREAS = ["Adyar", "Anna Nagar", "T. Nagar", "Velachery", "Mylapore", "Tambaram", "Porur", "Perambur",
+         "Chromepet", "Guindy", "Nungambakkam", "Kodambakkam"]
+INSURANCE = ["CMCHIS", "Star Health", "ICICI Lombard", "HDFC Ergo", "None"]
+FIRST_NAMES = ["Rajesh", "Lakshmi", "Murugan", "Priya", "Karthik", "Meena", "Senthil", "Kavitha",
+               "Arun", "Deepa", "Vijay", "Anitha", "Suresh", "Revathi", "Ganesh", "Divya"]
+LAST_NAMES = ["Kumar", "Subramanian", "Raman", "Krishnan", "Sundaram", "Natarajan", "Pillai", "Iyer"]
+# (name, dose, frequency)
+MEDICATIONS = [
+    ("Metformin", "500mg", "BD"), ("Glyciphage", "850mg", "OD"), ("Glimepiride", "2mg", "OD"),
+    ("Amlodipine", "5mg", "OD"), ("Telmisartan", "40mg", "OD"), ("Atorvastatin", "10mg", "HS"),
+    ("Aspirin", "75mg", "OD"), ("Warfarin", "5mg", "OD"), ("Dolo", "650mg", "TDS"),
+    ("Crocin", "500mg", "SOS"), ("Combiflam", "400mg", "BD"), ("Ibuprofen", "400mg", "TDS"),
+    ("Thyronorm", "50mcg", "OD"), ("Amoxicillin", "500mg", "TDS"), ("Limcee", "500mg", "OD"),
+]
+CONDITIONS = ["type 2 diabetes", "hypertension", "dyslipidemia", "hypothyroidism", "dengue fever",
+              "acute gastritis", "fatty liver disease", "asthma", "chronic kidney disease"]
+FINDINGS = ["ECG: Normal sinus rhythm.", "USG abdomen shows fatty changes in the liver.",
+            "Chest X-ray: No active lung lesion.", "Mild left ventricular hypertrophy on echo.",
+            "Platelet count 1,40,000/cumm.", "Serum creatinine 1.1 mg/dL."]
+
+
+def patient_id(rng, registered=None):
+    registered = registered or date(2024, 1, 1) + timedelta(days=rng.randrange(700))
+    return f"CHN-{registered:%Y%m}-{rng.getrandbits(32):08x}"
+
+
+def generate_patients(n, seed=0):
+    """Patient dicts with the columns of the patients table (phone in clear)"""
+    rng = random.Random(seed)
+    for _ in range(n):
+        area = rng.choice(AREAS)
+        yield {
+            "id": patient_id(rng),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "age": rng.randint(18, 85),
+            "gender": rng.choice(["Male", "Female"]),
+            "phone": f"9{rng.randrange(10 ** 9):09d}",
+            "address": f"{rng.randint(1, 120)}, {area} Main Road, Chennai",
+            "area": area,
+            "preferred_hospital": rng.choice(HOSPITALS).split(",")[0].title(),
+            "insurance": rng.choice(INSURANCE),
+        }
+
+
+def _tamil_phrase(rng):
+    category = rng.choice(["conditions", "symptoms", "body_parts", "medications"])
+    tamil, english = rng.choice(list(TAMIL_MEDICAL_TERMS[category].items()))
+    return f"{tamil} ({english})"
+
+
+def generate_report(rng, patient=None, paragraphs=1):
+    """One mixed Tamil/English report with vitals, labs and medications.
+
+    paragraphs repeats the history/findings block to make longer documents.
+    """
+    pid = patient["id"] if patient else patient_id(rng)
+    name = patient["name"] if patient else f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    dated = date(2025, 1, 1) + timedelta(days=rng.randrange(600))
+    medications = rng.sample(MEDICATIONS, rng.randint(1, 4))
+    lines = [
+        rng.choice(HOSPITALS),
+        f"Ref. No: {rng.randrange(10 ** 6)}  Dated: {dated:%d/%m/%Y}",
+        "",
+        "PATIENT INFORMATION",
+        f"Name: {name}",
+        f"Patient ID: {pid}",
+        f"Age: {patient['age'] if patient else rng.randint(18, 85)}",
+        "",
+    ]
+    for _ in range(paragraphs):
+        lines += [
+            "CLINICAL HISTORY",
+            f"Patient presented with {_tamil_phrase(rng)} and {_tamil_phrase(rng)} for {rng.randint(1, 10)} days. "
+            f"Known case of {rng.choice(CONDITIONS)} on {medications[0][0]} {medications[0][1]} {medications[0][2]}.",
+            "",
+            "FINDINGS",
+            f"BP: {rng.randint(100, 190)}/{rng.randint(60, 120)} mmHg. Pulse {rng.randint(60, 110)}/min. "
+            f"SpO2: {rng.randint(88, 100)}%",
+            f"Fasting glucose: {rng.randint(70, 320)} mg/dL",
+            f"HbA1c: {rng.uniform(4.8, 11.5):.1f}%",
+            f"Cholesterol: {rng.randint(140, 290)} mg/dL",
+            rng.choice(FINDINGS),
+            "",
+        ]
+    lines += ["IMPRESSION"]
+    lines += [f"{i}. {condition.capitalize()}" for i, condition in enumerate(rng.sample(CONDITIONS, 2), 1)]
+    lines += ["", "Rx:"] + [f"- {drug} {dose} {frequency} x {rng.choice([5, 7, 30])} days"
+                            for drug, dose, frequency in medications]
+    return "\n".join(lines) + "\n"
+
+
+def generate_reports(n, seed=0, patients=None, paragraphs=1):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield generate_report(rng, rng.choice(patients) if patients else None, paragraphs)
+
+
+def generate_prescriptions(patients, per_patient=5, seed=0):
+    """(patient_id, date, medication, dosage, duration, refills) rows"""
+    rng = random.Random(seed)
+    for patient in patients:
+        for _ in range(rng.randint(max(1, per_patient // 2), per_patient * 2 - 1)):
+            drug, dose, frequency = rng.choice(MEDICATIONS)
+            issued = date(2024, 1, 1) + timedelta(days=rng.randrange(900))
+            yield (patient["id"], issued.isoformat(), drug, f"{dose} {frequency}",
+                   f"{rng.choice([5, 7, 14, 30, 90])} days", rng.randint(0, 3))
+
+
+def generate_vitals(patients, per_patient=10, seed=0):
+    """patient_vitals rows with a per-patient baseline and drift over time"""
+    rng = random.Random(seed)
+    for patient in patients:
+        systolic, diastolic, weight = rng.gauss(130, 15), rng.gauss(84, 8), rng.gauss(68, 12)
+        height = rng.gauss(1.62, 0.08)
+        day = date(2024, 1, 1) + timedelta(days=rng.randrange(200))
+        for _ in range(per_patient):
+            day += timedelta(days=rng.randint(7, 60))
+            weight += rng.gauss(0.1, 0.8)
+            yield (patient["id"], day.isoformat(), int(systolic + rng.gauss(0, 8)), int(diastolic + rng.gauss(0, 5)),
+                   rng.randint(60, 105), round(rng.uniform(36.4, 38.6), 1), round(weight, 1), round(height * 100, 1),
+                   round(weight / height ** 2, 1), None)
+
+
+def build_database(db_path, patients=1000, prescriptions_per_patient=5, vitals_per_patient=10, seed=0):
+    """SQLite database with the app's patient tables filled with synthetic data.
+
+    Phones are encrypted and blind-indexed with the configured keys, as
+    the app stores them. Returns the patient dicts (phones in clear).
+    """
+    from crypto_service import get_crypto_service, normalize_phone
+    crypto = get_crypto_service()
+    people = list(generate_patients(patients, seed))
+    phones = crypto.encrypt_many([p["phone"] for p in people])
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS patients (
+            id TEXT PRIMARY KEY, name TEXT, age INTEGER, gender TEXT, phone TEXT, address TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP, area TEXT, allergies TEXT,
+            preferred_hospital TEXT, insurance TEXT, phone_index TEXT);
+        CREATE INDEX IF NOT EXISTS idx_patients_phone_index ON patients(phone_index);
+        CREATE TABLE IF NOT EXISTS prescriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT, date DATE, medication TEXT,
+            dosage TEXT, duration TEXT, refills INTEGER);
+        CREATE TABLE IF NOT EXISTS patient_vitals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT, date DATE, bp_systolic INTEGER,
+            bp_diastolic INTEGER, heart_rate INTEGER, temperature REAL, weight REAL, height REAL,
+            bmi REAL, notes TEXT);
+        CREATE INDEX IF NOT EXISTS idx_vitals_patient_date ON patient_vitals (patient_id, date);
+    """)
+    conn.executemany(
+        "INSERT OR REPLACE INTO patients (id, name, age, gender, phone, address, area, preferred_hospital, insurance, phone_index) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(p["id"], p["name"], p["age"], p["gender"], phone, p["address"], p["area"], p["preferred_hospital"],
+          p["insurance"], crypto.blind_index(p["phone"], normalize_phone)) for p, phone in zip(people, phones)]
+    )
+    conn.executemany(
+        "INSERT INTO prescriptions (patient_id, date, medication, dosage, duration, refills) VALUES (?, ?, ?, ?, ?, ?)",
+        generate_prescriptions(people, prescriptions_per_patient, seed)
+    )
+    conn.executemany(
+        "INSERT INTO patient_vitals (patient_id, date, bp_systolic, bp_diastolic, heart_rate, temperature, "
+        "weight, height, bmi, notes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        generate_vitals(people, vitals_per_patient, seed)
+    )
+    conn.commit()
+    conn.close()
+    return people
+
+
+def write_reports(folder, n, seed=0, paragraphs=1):
+    """Write n synthetic reports as .txt files; returns their paths"""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i, text in enumerate(generate_reports(n, seed, paragraphs=paragraphs)):
+        path = os.path.join(folder, f"synthetic_{seed}_{i:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Chennai reports and patient data")
+    parser.add_argument("--reports", type=int, default=100, help="Report files to write")
+    parser.add_argument("--report-dir", default="data/synthetic/reports")
+    parser.add_argument("--patients", type=int, default=0, help="Patients to add to --db")
+    parser.add_argument("--db", default="data/synthetic/synthetic.db")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.reports:
+        print(f"Wrote {len(write_reports(args.report_dir, args.reports, args.seed))} reports to {args.report_dir}")
+    if args.patients:
+        os.makedirs(os.path.dirname(args.db) or ".", exist_ok=True)
+        build_database(args.db, args.patients, seed=args.seed)
+        print(f"Added {args.patients} synthetic patients to {args.db}")
@@ -0,0 +1,133 @@
+from collections import deque
+from functools import lru_cache
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; one pass over the text for any number of terms"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._own = [[]]   # per node: (term length, value) for terms added ending here
+        self._out = [[]]   # _own plus outputs inherited along failure links (set by build)
+        self._built = False
+
+    def add(self, term, value):
+        node = 0
+        for ch in term:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+                self._out.append([])
+            node = nxt
+        self._own[node].append((len(term), value))
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth-first and inherit their outputs.
+
+        Starts from each node's own terms, so building again after more
+        add() calls does not inherit the previous build's outputs twice.
+        """
+        self._fail = [0] * len(self._goto)
+        self._out = [list(own) for own in self._own]
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+        self._built = True
+        return self
+
+    def iter_all(self, text):
+        """Every (start, end, value) occurrence, including overlapping ones"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield i + 1 - length, i + 1, value
+
+    def finditer(self, text):
+        """Leftmost-longest, non-overlapping matches in text order"""
+        matches = sorted(self.iter_all(text), key=lambda m: (m[0], m[0] - m[1]))
+        cursor = 0
+        for start, end, value in matches:
+            if start >= cursor:
+                yield start, end, value
+                cursor = end
+
+
+class TamilTermMatcher:
+    """Tamil glossary compiled into one automaton.
+
+    Shared by the clinical reasoner (translation), the drug engine (name
+    normalization) and the NLP processor (entity annotation) so each text
+    is scanned once regardless of glossary size. Lookups restricted to
+    some categories use their own automaton (built on first use), so a
+    longer term from an excluded category cannot hide a shorter match.
+    """
+
+    def __init__(self, glossary):
+        self.glossary = glossary
+        self.automaton = self._compile(glossary)
+        self._automata = {None: self.automaton}   # frozenset of categories -> automaton
+
+    @staticmethod
+    def _compile(glossary, categories=None):
+        automaton = AhoCorasick()
+        for category, terms in glossary.items():
+            if categories is None or category in categories:
+                for tamil, english in terms.items():
+                    automaton.add(tamil, (category, tamil, english))
+        return automaton.build()
+
+    def _automaton_for(self, categories):
+        key = frozenset(categories) if categories is not None else None
+        automaton = self._automata.get(key)
+        if automaton is None:
+            automaton = self._automata[key] = self._compile(self.glossary, key)
+        return automaton
+
+    def annotate(self, text, categories=None):
+        """[(start, end, category, tamil, english)] for glossary terms in text"""
+        return [
+            (start, end, category, tamil, english)
+            for start, end, (category, tamil, english) in self._automaton_for(categories).finditer(text)
+        ]
+
+    def translate(self, text, categories=None):
+        """Replace Tamil terms with their English equivalents in a single pass"""
+        out = []
+        cursor = 0
+        for start, end, _, _, english in self.annotate(text, categories):
+            out.append(text[cursor:start])
+            out.append(english)
+            cursor = end
+        out.append(text[cursor:])
+        return "".join(out)
+
+    def first(self, text, category):
+        """English term for the first glossary term of a category found in text"""
+        for _, _, _, _, english in self.annotate(text, (category,)):
+            return english
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_tamil_matcher():
+    from data.tamil_medical_terms import TAMIL_MEDICAL_TERMS
+    return TamilTermMatcher(TAMIL_MEDICAL_TERMS)
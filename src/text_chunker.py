@@ -0,0 +1,51 @@
+import re
+
+DEFAULT_CHUNK_CHARS = 20000
+DEFAULT_OVERLAP_CHARS = 300
+
+# Preferred break points, strongest first
+_BREAKS = [re.compile(r"\n\s*\n"), re.compile(r"(?<=[.!?])\s+|\n"), re.compile(r"\s+")]
+
+
+def _find_break(text, start, end):
+    """Last paragraph/sentence/word boundary in the back half of [start, end)"""
+    floor = start + (end - start) // 2
+    for pattern in _BREAKS:
+        last = None
+        for match in pattern.finditer(text, floor, end):
+            last = match.end()
+        if last is not None and last > floor:
+            return last
+    return end
+
+
+def chunk_spans(text, max_chars=DEFAULT_CHUNK_CHARS, overlap=DEFAULT_OVERLAP_CHARS):
+    """Split text into (start, end, own_start, own_end) windows.
+
+    Windows are at most max_chars long, end on a paragraph or sentence
+    boundary where possible and overlap their neighbours by about
+    `overlap` characters. Each window owns the span between the midpoints
+    of its overlaps, so an entity is reported by exactly one window.
+    """
+    if len(text) <= max_chars:
+        return [(0, len(text), 0, len(text))]
+
+    windows = []
+    start = 0
+    while start < len(text):
+        end = len(text) if start + max_chars >= len(text) else _find_break(text, start, start + max_chars)
+        windows.append([start, end])
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        # Begin the next window on a word boundary inside the overlap
+        space = text.find(" ", start, end)
+        if space != -1:
+            start = space + 1
+
+    spans = []
+    for i, (start, end) in enumerate(windows):
+        own_start = 0 if i == 0 else (start + windows[i - 1][1]) // 2
+        own_end = len(text) if i == len(windows) - 1 else (windows[i + 1][0] + end) // 2
+        spans.append((start, end, own_start, own_end))
+    return spans
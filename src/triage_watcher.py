@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from analysis_queue import extract_payload_text
+
+REPORT_TYPES = {".txt": "text/plain", ".pdf": "application/pdf"}
+# Lower sorts first in the triage queue
+PRIORITY = {"emergency": 0, "urgent": 1, "review": 2, "routine": 3}
+
+
+class TriageQueue:
+    """Prioritized triage results for incoming reports, read by the Triage page"""
+
+    def __init__(self, db_path='patient_db.db'):
+        self.db_path = db_path
+        self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute("""CREATE TABLE IF NOT EXISTS triage_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            priority INTEGER,
+            urgency TEXT,
+            conditions TEXT,
+            findings TEXT,
+            insights TEXT,
+            error TEXT,
+            status TEXT DEFAULT 'new',
+            created_at TEXT,
+            acknowledged_by TEXT,
+            UNIQUE (path, mtime)
+        )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_triage_queue_status ON triage_queue (status, priority, id)")
+        conn.commit()
+        conn.close()
+
+    def processed(self):
+        """(path, mtime) of every report already triaged, so restarts skip them"""
+        conn = self._connect()
+        rows = conn.execute("SELECT path, mtime FROM triage_queue").fetchall()
+        conn.close()
+        return set(rows)
+
+    def push(self, result):
+        conn = self._connect()
+        conn.execute(
+            """INSERT OR IGNORE INTO triage_queue
+               (path, mtime, priority, urgency, conditions, findings, insights, error, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (result["path"], result["mtime"], PRIORITY[result["urgency"]], result["urgency"],
+             ", ".join(result.get("conditions", [])), json.dumps(result.get("findings", [])),
+             json.dumps(result.get("insights", {})), result.get("error"),
+             datetime.now().isoformat(timespec="seconds"))
+        )
+        conn.commit()
+        conn.close()
+
+    def pending(self, limit=50):
+        """Unacknowledged results, most urgent first"""
+        conn = self._connect()
+        rows = conn.execute(
+            """SELECT id, path, urgency, conditions, findings, insights, error, created_at
+               FROM triage_queue WHERE status = 'new' ORDER BY priority, id LIMIT ?""",
+            (limit,)
+        ).fetchall()
+        conn.close()
+        return [
+            {"id": r[0], "path": r[1], "urgency": r[2], "conditions": r[3], "findings": json.loads(r[4] or "[]"),
+             "insights": json.loads(r[5] or "{}"), "error": r[6], "created_at": r[7]}
+            for r in rows
+        ]
+
+    def acknowledge(self, triage_id, user=None):
+        conn = self._connect()
+        conn.execute("UPDATE triage_queue SET status = 'acknowledged', acknowledged_by = ? WHERE id = ?",
+                     (user, triage_id))
+        conn.commit()
+        conn.close()
+
+
+# Pipeline stages. Each one is a generator pulling from the previous, so
+# the folder is only scanned when the sink is ready for more work.
+def poll_reports(folder, seen, poll_interval=1.0, settle_seconds=1.0, max_batch=32):
+    """Yield (path, mtime) for new reports, oldest first, as they land in folder.
+
+    A file is picked up once it has not been modified for settle_seconds,
+    so half-copied reports are left for the next scan.
+    """
+    while True:
+        ready = []
+        now = time.time()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in REPORT_TYPES:
+                    continue
+                stat = entry.stat()
+                if (entry.path, stat.st_mtime) not in seen and now - stat.st_mtime >= settle_seconds:
+                    ready.append((stat.st_mtime, entry.path))
+        for mtime, path in sorted(ready)[:max_batch]:
+            seen.add((path, mtime))
+            yield path, mtime
+        if not ready:
+            time.sleep(poll_interval)
+
+
+def extract_reports(items):
+    for path, mtime in items:
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+            text = extract_payload_text(payload, REPORT_TYPES[os.path.splitext(path)[1].lower()])
+            yield {"path": path, "mtime": mtime, "text": text}
+        except Exception as e:
+            yield {"path": path, "mtime": mtime, "text": None, "error": f"Text extraction failed: {e}"}
+
+
+def record_labs(reports, timeline):
+    """Add lab values from reports that name a patient to their timeline"""
+    for report in reports:
+        if report["text"]:
+            measured_at = datetime.fromtimestamp(report["mtime"]).date().isoformat()
+            report["labs_recorded"] = timeline.record_text(report["text"], measured_at=measured_at,
+                                                           source=f"report:{os.path.basename(report['path'])}")
+        yield report
+
+
+def assess_reports(reports, reasoner=None):
+    """Red flags and vitals findings; sets urgency to the most severe one"""
+    from clinical_insights import ClinicalInsightEngine
+    from clinical_reasoning import ChennaiClinicalReasoner
+    reasoner = reasoner or ChennaiClinicalReasoner()
+    for report in reports:
+        text = report.pop("text")
+        if text is None:
+            report["urgency"] = "review"
+            yield report
+            continue
+        findings = reasoner.assess(text)
+        insights = ClinicalInsightEngine.analyze_vitals(text)
+        red_flags = [f for f in findings if f["type"] == "red_flag"]
+        if red_flags:
+            urgency = min((f["urgency"] for f in red_flags), key=lambda u: PRIORITY.get(u, PRIORITY["urgent"]))
+        elif findings or insights["flags"]:
+            urgency = "review"
+        else:
+            urgency = "routine"
+        report.update({
+            "urgency": urgency if urgency in PRIORITY else "urgent",
+            "conditions": [f.get("condition") or f["type"] for f in findings],
+            "findings": findings,
+            "insights": insights
+        })
+        yield report
+
+
+def store_results(results, queue: TriageQueue):
+    for result in results:
+        queue.push(result)
+        yield result
+
+
+def triage_pipeline(folder='data/reports', db_path='patient_db.db', poll_interval=1.0):
+    """Endless generator of triage results for reports landing in folder"""
+    from lab_timeline import LabTimeline
+    queue = TriageQueue(db_path)
+    os.makedirs(folder, exist_ok=True)
+    paths = poll_reports(folder, queue.processed(), poll_interval)
+    reports = record_labs(extract_reports(paths), LabTimeline(db_path))
+    return store_results(assess_reports(reports), queue)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Triage reports as they arrive in a folder")
+    parser.add_argument("--folder", default="data/reports")
+    parser.add_argument("--db", default="patient_db.db")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"Watching {args.folder} for new reports")
+    for result in triage_pipeline(args.folder, args.db, args.poll_interval):
+        print(f"[{result['urgency'].upper()}] {os.path.basename(result['path'])}: "
+              f"{', '.join(result.get('conditions', [])) or result.get('error') or 'no findings'}")
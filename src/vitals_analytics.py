@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+VITALS_COLUMNS = ["Date", "BP Sys", "BP Dia", "HR", "Temp", "Weight", "BMI"]
+
+BMI_BINS = [0, 18.5, 25, 30, np.inf]
+BMI_LABELS = ["Underweight", "Normal", "Overweight", "Obese"]
+
+
+def classify_bp(systolic, diastolic):
+    """Vectorized BP status (same cut-offs as the Vitals Tracker tab)"""
+    systolic = np.asarray(systolic, dtype=float)
+    diastolic = np.asarray(diastolic, dtype=float)
+    return np.select(
+        [(systolic > 140) | (diastolic > 90), (systolic < 90) | (diastolic < 60)],
+        ["🟥 Hypertension", "🟦 Hypotension"],
+        default="🟩 Normal"
+    )
+
+
+def classify_bmi(bmi):
+    """Vectorized BMI category; missing or zero BMI gives an empty label"""
+    bmi = pd.Series(bmi, dtype=float)
+    status = pd.cut(bmi, bins=BMI_BINS, labels=BMI_LABELS, right=False)
+    return status.astype(object).where((bmi > 0) & status.notna(), "").to_numpy()
+
+
+def add_status_columns(df):
+    df["BP Status"] = classify_bp(df["BP Sys"], df["BP Dia"])
+    df["Weight Status"] = classify_bmi(df["BMI"])
+    return df
+
+
+def rolling_averages(df, columns=("BP Sys", "BP Dia", "Weight", "BMI"), window=7):
+    """Rolling mean over the last `window` readings, aligned to the rows of df"""
+    ordered = df.sort_values("Date", kind="stable")
+    return ordered[list(columns)].rolling(window, min_periods=1).mean().reindex(df.index)
+
+
+def trend_slopes(df, columns=("BP Sys", "BP Dia", "Weight", "BMI")):
+    """Least-squares slope per day for each column"""
+    days = (df["Date"] - df["Date"].min()).dt.total_seconds().to_numpy() / 86400.0
+    slopes = {}
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)
+        mask = ~np.isnan(values)
+        x, y = days[mask], values[mask]
+        if len(x) < 2 or np.ptp(x) == 0:
+            slopes[column] = 0.0
+            continue
+        x_centered = x - x.mean()
+        slopes[column] = float((x_centered * (y - y.mean())).sum() / (x_centered ** 2).sum())
+    return slopes
+
+
+class VitalsAnalytics:
+    """Per-patient vitals frames with status columns, cached until the next insert"""
+
+    def __init__(self, db_path='patient_db.db', window=7):
+        self.db_path = db_path
+        self.window = window
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _load(self, patient_id):
+        conn = sqlite3.connect(self.db_path)
+        df = pd.read_sql_query(
+            "SELECT date, bp_systolic, bp_diastolic, heart_rate, temperature, weight, bmi "
+            "FROM patient_vitals WHERE patient_id = ? ORDER BY date DESC",
+            conn, params=(patient_id,)
+        )
+        conn.close()
+        df.columns = VITALS_COLUMNS
+        df["Date"] = pd.to_datetime(df["Date"])
+        return add_status_columns(df)
+
+    def get(self, patient_id):
+        """Return cached {'vitals', 'rolling', 'slopes'} for a patient"""
+        with self._lock:
+            cached = self._cache.get(patient_id)
+        if cached is not None:
+            return cached
+
+        vitals = self._load(patient_id)
+        result = {
+            "vitals": vitals,
+            "rolling": rolling_averages(vitals, window=self.window) if len(vitals) else None,
+            "slopes": trend_slopes(vitals) if len(vitals) > 1 else {}
+        }
+        with self._lock:
+            self._cache[patient_id] = result
+        return result
+
+    def invalidate(self, patient_id=None):
+        with self._lock:
+            if patient_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(patient_id, None)
+
+    def record(self, conn, patient_id, date, bp_systolic, bp_diastolic, heart_rate,
+               temperature, weight, height, notes=""):
+        """Insert a reading on an open connection and drop the patient's cache entry"""
+        bmi = weight / ((height/100) ** 2) if height > 0 else 0
+        conn.execute("""INSERT INTO patient_vitals
+            (patient_id, date, bp_systolic, bp_diastolic, heart_rate,
+            temperature, weight, height, bmi, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (patient_id, date, bp_systolic, bp_diastolic,
+             heart_rate, temperature, weight, height, round(bmi, 1), notes)
+        )
+        conn.commit()
+        self.invalidate(patient_id)
@@ -0,0 +1,137 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import spacy
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import DocBin
+from spacy.util import filter_spans
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+VOCAB_DIR = os.path.join(DATA_DIR, 'vocabulary')
+DEFAULT_CACHE_DIR = os.path.join(VOCAB_DIR, 'compiled')
+
+# One term per line; file name -> entity label
+TERM_FILES = {
+    "body_parts.txt": "BODY_PART",
+    "procedures.txt": "PROCEDURE",
+    "medications.txt": "CHEMICAL",
+}
+DRUGS_FILE = os.path.join(DATA_DIR, 'chennai_drugs.json')
+MATCH_ATTR = "LOWER"
+
+
+def _source_files():
+    return [os.path.join(VOCAB_DIR, name) for name in sorted(TERM_FILES)] + [DRUGS_FILE]
+
+
+def load_terms():
+    """[(label, term)] from the vocabulary files and the Chennai drug database"""
+    terms = []
+    for name, label in TERM_FILES.items():
+        path = os.path.join(VOCAB_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            terms.extend((label, line.strip()) for line in f if line.strip() and not line.startswith('#'))
+    with open(DRUGS_FILE, encoding='utf-8') as f:
+        for drug in json.load(f)['drugs']:
+            terms.append(("CHEMICAL", drug['name']))
+            terms.extend(("CHEMICAL", brand) for brand in drug.get('brands', []))
+    # Case-insensitive matching makes case variants duplicates
+    unique = {}
+    for label, term in terms:
+        unique.setdefault((label, term.lower()), (label, term))
+    return list(unique.values())
+
+
+def fingerprint(nlp):
+    """Changes whenever a source file, the tokenizer or spaCy itself changes"""
+    digest = hashlib.sha256()
+    digest.update(f"{spacy.__version__}:{nlp.meta.get('name')}:{nlp.meta.get('version')}:{MATCH_ATTR}".encode())
+    for path in _source_files():
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compile_vocabulary(nlp, cache_dir=DEFAULT_CACHE_DIR):
+    """Tokenize every term once and store the pattern docs with their labels"""
+    terms = load_terms()
+    docs = DocBin(attrs=["ORTH", "LOWER"], store_user_data=False)
+    for doc in nlp.tokenizer.pipe(term for _, term in terms):
+        docs.add(doc)
+
+    # Build in a temp dir and swap in, so concurrently starting workers never see half a cache
+    parent = os.path.dirname(os.path.abspath(cache_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent)
+    docs.to_disk(os.path.join(tmp, 'patterns.spacy'))
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({"fingerprint": fingerprint(nlp), "labels": [label for label, _ in terms]}, f)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp, cache_dir)
+    return len(terms)
+
+
+def load_compiled(nlp, cache_dir=DEFAULT_CACHE_DIR):
+    """[(label, pattern_doc)] from the compiled cache, or None if missing or stale"""
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("fingerprint") != fingerprint(nlp):
+        return None
+    docs = DocBin().from_disk(os.path.join(cache_dir, 'patterns.spacy')).get_docs(nlp.vocab)
+    return list(zip(meta["labels"], docs))
+
+
+class VocabularyMatcher:
+    """Pipeline component tagging custom vocabulary with a PhraseMatcher.
+
+    Pattern docs are compiled once to disk; later starts only deserialize
+    them, which keeps worker start-up flat as the vocabulary grows. Model
+    entities win over overlapping vocabulary matches.
+    """
+
+    def __init__(self, nlp, cache_dir=DEFAULT_CACHE_DIR):
+        patterns = load_compiled(nlp, cache_dir)
+        if patterns is None:
+            compile_vocabulary(nlp, cache_dir)
+            patterns = load_compiled(nlp, cache_dir)
+        by_label = {}
+        for label, doc in patterns:
+            by_label.setdefault(label, []).append(doc)
+        self.matcher = PhraseMatcher(nlp.vocab, attr=MATCH_ATTR)
+        for label, docs in by_label.items():
+            self.matcher.add(label, docs)
+        self.size = len(patterns)
+
+    def __call__(self, doc):
+        spans = filter_spans(self.matcher(doc, as_spans=True))
+        taken = set()
+        for ent in doc.ents:
+            taken.update(range(ent.start, ent.end))
+        new = [span for span in spans if not taken.intersection(range(span.start, span.end))]
+        if new:
+            doc.ents = sorted(list(doc.ents) + new, key=lambda span: span.start)
+        return doc
+
+
+@Language.factory("medical_vocabulary", default_config={"cache_dir": DEFAULT_CACHE_DIR})
+def create_vocabulary_matcher(nlp, name, cache_dir):
+    return VocabularyMatcher(nlp, cache_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the custom NER vocabulary")
+    parser.add_argument("--model", default="en_ner_bc5cdr_md")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+    count = compile_vocabulary(spacy.load(args.model), args.cache_dir)
+    print(f"Compiled {count} terms into {args.cache_dir}")
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from appointment_scheduler import AppointmentScheduler, SchedulingConflict, SlotIndex
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return AppointmentScheduler(str(tmp_path / "appointments.db"))
+
+
+def test_conflict_finds_overlap_hidden_behind_a_longer_booking():
+    # Legacy double-booking: 09:00-12:00 overlaps 09:30-09:45, so ends are unsorted
+    index = SlotIndex([("2030-01-01 09:00", "2030-01-01 12:00", 1), ("2030-01-01 09:30", "2030-01-01 09:45", 2)])
+    assert index.conflict("2030-01-01 10:00", "2030-01-01 10:15") == 1
+    assert index.conflict("2030-01-01 12:00", "2030-01-01 12:15") is None
+
+
+def test_add_keeps_running_max_end():
+    index = SlotIndex()
+    index.add("2030-01-01 10:00", "2030-01-01 10:15", 2)
+    index.add("2030-01-01 09:00", "2030-01-01 11:00", 1)
+    assert index.conflict("2030-01-01 10:30", "2030-01-01 10:45") == 1
+    assert index.gaps("2030-01-01 08:00", "2030-01-01 12:00") == [
+        ("2030-01-01 08:00", "2030-01-01 09:00"), ("2030-01-01 11:00", "2030-01-01 12:00")
+    ]
+
+
+def test_book_rejects_overlap(scheduler):
+    scheduler.book("P1", datetime(2030, 1, 1, 9, 0), 15, "H", "Dr A")
+    with pytest.raises(SchedulingConflict):
+        scheduler.book("P2", datetime(2030, 1, 1, 9, 10), 15, "H", "Dr A")
+    # Another doctor is free at the same time
+    scheduler.book("P2", datetime(2030, 1, 1, 9, 10), 15, "H", "Dr B")
+
+
+def test_reschedule_checks_bookings_other_than_itself(scheduler):
+    moved = scheduler.book("P1", datetime(2030, 1, 1, 9, 0), 15, "H", "Dr A")
+    other = scheduler.book("P2", datetime(2030, 1, 1, 9, 20), 15, "H", "Dr A")
+    scheduler.reschedule(moved, datetime(2030, 1, 1, 9, 5), "Review", "Scheduled")
+    with pytest.raises(SchedulingConflict) as error:
+        scheduler.reschedule(moved, datetime(2030, 1, 1, 9, 10), "Review", "Scheduled")
+    assert error.value.conflicting_id == other
+
+
+def test_reschedule_unknown_appointment(scheduler):
+    with pytest.raises(KeyError):
+        scheduler.reschedule(12345, datetime(2030, 1, 1, 9, 0), "Review", "Scheduled")
+
+
+def test_available_slots_skip_bookings(scheduler):
+    scheduler.book("P1", datetime(2030, 1, 1, 9, 15), 30, "H", "Dr A")
+    slots = scheduler.available_slots(date(2030, 1, 1), "H", "Dr A", opens="09:00", closes="10:00")
+    assert [s.strftime("%H:%M") for s in slots] == ["09:00", "09:45"]
+
+
+def test_available_slots_never_in_the_past(scheduler):
+    now = datetime.now()
+    assert all(slot > now for slot in scheduler.available_slots(now.date(), opens="00:00", closes="23:59"))
+    assert scheduler.available_slots(now.date() - timedelta(days=1)) == []
+
+
+def test_schema_created_on_empty_database(tmp_path):
+    path = str(tmp_path / "empty.db")
+    AppointmentScheduler(path)
+    columns = {row[1] for row in sqlite3.connect(path).execute("PRAGMA table_info(appointments)")}
+    assert {"patient_id", "date", "doctor", "hospital", "start_at", "end_at"} <= columns
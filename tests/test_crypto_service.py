@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import crypto_service
+from crypto_service import CryptoService
+
+
+@pytest.fixture
+def service():
+    return CryptoService(Fernet.generate_key())
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_bulk_round_trip_keeps_order(service, parallel):
+    values = [f"98765{i:05d}" for i in range(2500)] + [None]
+    tokens = service.encrypt_many(values, parallel=parallel)
+    assert len(set(tokens[:-1])) == 2500
+    assert service.decrypt_many(tokens, parallel=parallel) == values
+
+
+def test_decrypt_many_skip_invalid(service):
+    other = CryptoService(Fernet.generate_key())
+    tokens = [service.encrypt("a"), other.encrypt("b"), None]
+    with pytest.raises(InvalidToken):
+        service.decrypt_many(tokens)
+    assert service.decrypt_many(tokens, skip_invalid=True) == ["a", None, None]
+
+
+def test_rotation_reads_old_keys_and_writes_primary():
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    old_token = CryptoService(old_key).encrypt("secret")
+    rotating = CryptoService(new_key, [old_key])
+    assert rotating.decrypt(old_token) == "secret"
+
+    rotated = rotating.rotate_many([old_token, None])
+    assert rotated[1] is None
+    # Only the new key is needed once tokens are rotated
+    assert CryptoService(new_key).decrypt(rotated[0]) == "secret"
+    with pytest.raises(InvalidToken):
+        CryptoService(new_key).decrypt(old_token)
+
+
+def test_decrypt_columns_leaves_other_columns(service):
+    df = pd.DataFrame({"name": ["A", "B"], "phone": service.encrypt_many(["1", "2"])})
+    out = service.decrypt_columns(df, ["phone"])
+    assert out["phone"].tolist() == ["1", "2"]
+    assert out["name"].tolist() == ["A", "B"]
+    assert df["phone"].tolist() != ["1", "2"]
+
+
+def test_lazy_column_decrypts_on_read(service, monkeypatch):
+    column = service.lazy_column(service.encrypt_many(["x", "y", "z"]))
+    calls = []
+    decrypt = service.decrypt
+    monkeypatch.setattr(service, "decrypt", lambda token: calls.append(token) or decrypt(token))
+    assert column[1] == "y"
+    assert column[1] == "y"
+    assert len(calls) == 1
+    assert column.materialize() == ["x", "y", "z"]
+
+
+def test_from_env(monkeypatch):
+    old_key = Fernet.generate_key()
+    monkeypatch.setenv("ENCRYPTION_KEY", Fernet.generate_key().decode())
+    monkeypatch.setenv("ENCRYPTION_OLD_KEYS", f" {old_key.decode()} ,")
+    service = CryptoService.from_env()
+    assert service.decrypt(CryptoService(old_key).encrypt("v")) == "v"
+
+    monkeypatch.delenv("ENCRYPTION_KEY")
+    crypto_service.get_crypto_service.cache_clear()
+    with pytest.raises(RuntimeError):
+        crypto_service.get_crypto_service()
+    crypto_service.get_crypto_service.cache_clear()
+
+
+@pytest.mark.parametrize("raw", ["9876543210", "09876543210", "+91 98765 43210", "0091-9876543210", "919876543210",
+                                 "(98765) 43210"])
+def test_normalize_phone(raw):
+    assert crypto_service.normalize_phone(raw) == "+919876543210"
+
+
+def test_blind_index_matches_across_phone_formats(service):
+    index = service.blind_index("098765 43210", crypto_service.normalize_phone)
+    assert index == service.blind_index("+919876543210", crypto_service.normalize_phone)
+    assert index != service.blind_index("+919876543211", crypto_service.normalize_phone)
+    assert service.blind_index_many([None, "+919876543210"], crypto_service.normalize_phone) == [None, index]
+
+
+def test_blind_index_survives_key_rotation():
+    index_key, old_key, new_key = "index-key", Fernet.generate_key(), Fernet.generate_key()
+    before = CryptoService(old_key, index_key=index_key).blind_index("+919876543210")
+    assert CryptoService(new_key, [old_key], index_key=index_key).blind_index("+919876543210") == before
+    # Without a dedicated key the index is derived from the primary key
+    assert CryptoService(old_key).blind_index("+919876543210") != CryptoService(new_key).blind_index("+919876543210")
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dosage_extraction import extract_dosages, parse_dosage_lines
+from entity_spans import EntitySpans
+
+REPORT = "Fasting glucose 126 mg/dL on Metformin 500mg BD. Cholesterol 220 mg/dl, creatinine 1.1 mg / dL."
+
+
+def medication_spans(text, *names):
+    mentions = [(text.index(name), text.index(name) + len(name), "CHEMICAL", name) for name in names]
+    return EntitySpans.from_tuples(mentions)
+
+
+def test_lab_values_next_to_a_drug_are_not_doses():
+    records = extract_dosages(REPORT, medication_spans(REPORT, "Metformin"))
+    assert [(r["text"], r["medication"]) for r in records] == [("500mg", "Metformin")]
+
+
+def test_rates_are_not_doses():
+    assert [r["text"] for r in extract_dosages("Normal saline 100 ml/hr, then 500 ml bolus")] == ["500 ml"]
+
+
+def test_prescription_lines_skip_concentrations():
+    parsed = parse_dosage_lines(["Metformin 500mg BD", "Glucose 126 mg/dL"])
+    assert parsed.loc[0, "canonical_value"] == 500
+    assert parsed.loc[1].isna().all()
@@ -0,0 +1,81 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from guideline_rules import GuidelineRuleEngine, compile_guidelines, get_guideline_engine
+
+
+@pytest.fixture
+def engine():
+    return get_guideline_engine()
+
+
+def test_compile_bundled_guidelines(engine):
+    hypertension = engine.conditions["hypertension"]
+    assert hypertension.labels == ["Normal", "Stage 1", "Stage 2"]
+    assert hypertension.tables["systolic"].thresholds == [130.0, 140.0]
+    assert hypertension.tables["diastolic"].thresholds == [80.0, 90.0]
+    assert engine.conditions["diabetes"].tables["hba1c"].thresholds == [6.5]
+
+
+def test_compile_generic_thresholds_rank_by_value():
+    conditions = compile_guidelines({"anaemia": {"thresholds": {"severity": [
+        {"min": 3, "label": "Severe"}, {"min": 1, "label": "Mild"}, {"min": 2, "label": "Moderate"},
+    ]}}})
+    assert conditions["anaemia"].labels == ["Normal", "Mild", "Moderate", "Severe"]
+    # Conditions without any usable threshold are left out
+    assert compile_guidelines({"other": {"diagnosis": {"criteria": [{"test": "ECG", "threshold": 1}]}}}) == {}
+
+
+@pytest.mark.parametrize("systolic, diastolic, label", [
+    (120, 75, "Normal"),
+    (135, 75, "Stage 1"),
+    (125, 85, "Stage 1"),
+    # ≥140/90 is Stage 2, so 140–159 no longer reads as Stage 1
+    (140, 75, "Stage 2"),
+    (159, 85, "Stage 2"),
+    (120, 95, "Stage 2"),
+])
+def test_hypertension_stage(engine, systolic, diastolic, label):
+    assert engine.classify({"systolic": systolic, "diastolic": diastolic})["hypertension"] == label
+
+
+def test_missing_measures_classify_as_none(engine):
+    assert engine.classify({"systolic": 150}) == {"diabetes": None, "hypertension": "Stage 2"}
+
+
+def test_classify_frame_matches_classify(engine):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "systolic": rng.integers(100, 180, 200).astype(float),
+        "diastolic": rng.integers(60, 110, 200).astype(float),
+        "glucose": rng.integers(80, 200, 200).astype(float),
+        "hba1c": rng.uniform(4.5, 9.0, 200),
+    })
+    df.loc[::7, "systolic"] = np.nan
+    df.loc[::5, ["glucose", "hba1c"]] = np.nan
+    frame = engine.classify_frame(df)
+    for i, row in df.iterrows():
+        values = {k: v for k, v in row.items() if not np.isnan(v)}
+        assert frame.loc[i].to_dict() == engine.classify(values)
+
+
+def test_threshold(engine):
+    assert engine.threshold("hypertension", "systolic", "Stage 1") == 130
+    assert engine.threshold("hypertension", "systolic", "Stage 2") == 140
+    assert engine.threshold("hypertension", "diastolic", "Stage 2") == 90
+    assert engine.threshold("diabetes", "glucose", "Diabetes") == 126
+    assert engine.threshold("hypertension", "glucose", "Stage 1") is None
+    assert engine.threshold("unknown", "systolic", "Stage 1") is None
+
+
+def test_add_guidelines_replaces_condition():
+    engine = GuidelineRuleEngine()
+    engine.add_guidelines({"hypertension": {"thresholds": {"systolic": [{"min": 150, "label": "High"}]}}})
+    assert engine.classify({"systolic": 145})["hypertension"] == "Normal"
+    assert engine.classify({"systolic": 150})["hypertension"] == "High"
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from lab_timeline import LabTimeline, report_date
+
+
+@pytest.fixture
+def timeline(tmp_path):
+    return LabTimeline(str(tmp_path / "labs.db"))
+
+
+def _expected_slope(timeline, patient_id, test):
+    history = timeline.history(patient_id, test)
+    days = (history["measured_at"] - history["measured_at"].min()).dt.days.to_numpy(dtype=float)
+    return np.polyfit(days, history["value"].to_numpy(), 1)[0]
+
+
+def _row(timeline, patient_id, test):
+    summary = timeline.summary(patient_id)
+    return summary[summary["test"] == test].iloc[0]
+
+
+def test_running_sums_match_least_squares(timeline):
+    readings = [("2024-03-01", 110), ("2023-01-15", 98), ("2024-11-20", 121), ("2023-08-02", 104)]
+    for measured_at, value in readings:   # out of date order on purpose
+        timeline.record("P1", {"glucose": value}, measured_at)
+    row = _row(timeline, "P1", "glucose")
+    assert row["n"] == 4
+    assert (row["latest_at"], row["latest_value"]) == ("2024-11-20", 121)
+    assert (row["min_value"], row["max_value"]) == (98, 121)
+    assert row["slope_per_day"] == pytest.approx(_expected_slope(timeline, "P1", "glucose"))
+
+
+def test_correction_replaces_point_in_sums_and_range(timeline):
+    timeline.record("P1", {"hba1c": 6.0}, "2023-01-01")
+    timeline.record("P1", {"hba1c": 9.5}, "2023-06-01")
+    timeline.record("P1", {"hba1c": 6.8}, "2024-01-01")
+    # A typo corrected the same day: the old 9.5 must leave the sums and the max
+    assert timeline.record("P1", {"hba1c": 6.4}, "2023-06-01") == 1
+    assert timeline.record("P1", {"hba1c": 6.4}, "2023-06-01") == 0
+
+    row = _row(timeline, "P1", "hba1c")
+    assert row["n"] == 3
+    assert row["max_value"] == 6.8
+    assert row["slope_per_day"] == pytest.approx(_expected_slope(timeline, "P1", "hba1c"))
+    assert timeline.history("P1", "hba1c")["value"].tolist() == [6.0, 6.4, 6.8]
+
+
+def test_single_point_has_zero_slope_and_unknown_tests_are_ignored(timeline):
+    assert timeline.record("P1", {"systolic": 130, "ferritin": 40}, "2024-01-01") == 1
+    row = _row(timeline, "P1", "systolic")
+    assert row["slope_per_day"] == 0.0
+    assert row["unit"] == "mmHg"
+
+
+def test_trend_insights_flag_fast_rise(timeline):
+    timeline.record("P1", {"systolic": 120, "diastolic": 80}, "2023-01-01")
+    timeline.record("P1", {"systolic": 140, "diastolic": 81}, "2024-01-01")
+    insights = timeline.trend_insights("P1")
+    assert len(insights) == 1
+    assert "Systolic BP rising" in insights[0]
+
+
+def test_record_text_reads_patient_and_report_date(timeline):
+    text = "Patient: CHN-123456-deadbeef\nDated: 05/03/2024\nBP: 150/95 mmHg\nHbA1c: 7.2%"
+    assert timeline.record_text(text) == 3
+    assert timeline.history("CHN-123456-deadbeef", "hba1c")["measured_at"].dt.date.astype(str).tolist() == ["2024-03-05"]
+    assert timeline.record_text("BP: 150/95 mmHg") == 0
+    assert report_date("Dated: 31/02/2024", "2024-01-01") == "2024-01-01"
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import metrics
+from metrics import RESOLUTION, RING_SLOTS, MetricsCollector, MetricsStore, _quantile, _Series, tail_log
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MetricsStore(str(tmp_path / "metrics.db"))
+
+
+def _series(*values, histogram=True):
+    s = _Series(histogram)
+    for value in values:
+        s.add(value)
+    return s
+
+
+def _ring(store):
+    conn = sqlite3.connect(store.db_path)
+    rows = conn.execute("SELECT name, slot, period, count, total, min_value, max_value FROM metrics_ring").fetchall()
+    conn.close()
+    return rows
+
+
+def test_same_period_merges_into_one_row(store):
+    store.write({("ner", 100): _series(5, 20)})
+    store.write({("ner", 100): _series(1)})
+    assert _ring(store) == [("ner", 100, 100, 3, 26.0, 1.0, 20.0)]
+
+
+def test_ring_reuses_slot_for_newer_period_only(store):
+    store.write({("ner", 100): _series(5)})
+    store.write({("ner", 100 + RING_SLOTS): _series(7)})
+    assert _ring(store) == [("ner", 100, 100 + RING_SLOTS, 1, 7.0, 7.0, 7.0)]
+    # A late flush for the overwritten period does not clobber the newer one
+    store.write({("ner", 100): _series(9)})
+    assert _ring(store) == [("ner", 100, 100 + RING_SLOTS, 1, 7.0, 7.0, 7.0)]
+
+
+def test_summary_and_series_cover_recent_periods(store):
+    now = int(time.time() // RESOLUTION)
+    store.write({("ner", now): _series(3, 30, 300), ("ner", now - 1): _series(4),
+                 ("ner", now - 120): _series(5000), ("pages", now): _series(1, histogram=False)})
+    summary = store.summary(3600).set_index("metric")
+    assert summary.loc["ner", "count"] == 4
+    assert summary.loc["ner", "max"] == 300
+    assert summary.loc["ner", "p50"] == 5
+    assert summary.loc["ner", "p99"] == 300
+    assert summary.loc["pages", "count"] == 1
+    assert len(store.series("ner", 3600)) == 2
+
+
+def test_quantile_uses_bucket_bounds_and_max_for_overflow():
+    buckets = [0] * (len(metrics.LATENCY_BUCKETS_MS) + 1)
+    buckets[2], buckets[-1] = 9, 1   # nine values <= 5 ms, one above 10 s
+    assert _quantile(buckets, 0.5, 20000) == 5
+    assert _quantile(buckets, 0.99, 20000) == 20000
+    assert _quantile(buckets, 0.5, 3) == 3
+
+
+def test_collector_flushes_counts_and_sessions(store):
+    collector = MetricsCollector(store)
+    collector.inc("pages")
+    collector.inc("pages", 2)
+    with collector.timer("render"):
+        pass
+    collector.session_seen("abc")
+    collector.flush()
+    summary = store.summary(3600).set_index("metric")
+    assert summary.loc["pages", "count"] == 3
+    assert summary.loc["render", "count"] == 1
+    assert store.active_sessions() == 1
+    collector.flush()   # Nothing new: no write
+    assert store.summary(3600).set_index("metric").loc["pages", "count"] == 3
+
+
+def test_unconfigured_collector_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(metrics, "_collector", None)
+    collector = metrics.get_collector()
+    assert not collector.enabled
+    collector.inc("x")
+    with collector.timer("y"):
+        pass
+
+
+def test_tail_log_pages_backwards(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"line {i}\n" for i in range(1000)))
+    lines, has_older = tail_log(str(path), page_size=100, block_size=256)
+    assert lines == [f"line {i}" for i in range(900, 1000)]
+    assert has_older
+    lines, has_older = tail_log(str(path), page=9, page_size=100, block_size=256)
+    assert lines[0] == "line 0" and not has_older
+    assert tail_log(str(tmp_path / "missing.log")) == ([], False)
@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ner_batcher import MicroBatcher, NERBatcher
+
+
+class Recorder:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+def test_concurrent_submits_are_coalesced_in_order():
+    run = Recorder()
+    batcher = MicroBatcher(run, max_batch_size=8, max_wait_ms=50)
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(lambda i: batcher.submit(i).result(timeout=5), range(64)))
+    batcher.close()
+    assert results == [i * 2 for i in range(64)]
+    assert all(len(batch) <= 8 for batch in run.batches)
+    assert len(run.batches) < 64
+    assert sorted(item for batch in run.batches for item in batch) == list(range(64))
+
+
+def test_lone_item_waits_at_most_max_wait():
+    run = Recorder()
+    batcher = MicroBatcher(run, max_wait_ms=1)
+    assert batcher.submit(3).result(timeout=1) == 6
+    batcher.close()
+    assert run.batches == [[3]]
+
+
+def test_batch_error_fails_every_future_in_it():
+    def run(items):
+        raise ValueError("model crashed")
+
+    batcher = MicroBatcher(run, max_wait_ms=20)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=1)
+    batcher.close()
+
+
+def test_run_batch_may_return_a_future():
+    pending = []
+
+    def run(items):
+        future = Future()
+        pending.append((future, items))
+        return future
+
+    batcher = MicroBatcher(run, max_batch_size=2, max_wait_ms=20)
+    futures = [batcher.submit(i) for i in range(4)]
+    # Both batches are in flight before either finishes
+    for _ in range(100):
+        if len(pending) == 2:
+            break
+        time.sleep(0.01)
+    assert len(pending) == 2
+    pending[1][0].set_exception(RuntimeError("worker died"))
+    pending[0][0].set_result([item + 1 for item in pending[0][1]])
+    assert [f.result(timeout=1) for f in futures[:2]] == [1, 2]
+    with pytest.raises(RuntimeError):
+        futures[2].result(timeout=1)
+    batcher.close()
+
+
+def test_close_flushes_pending_and_rejects_new_items():
+    run = Recorder()
+    batcher = MicroBatcher(run, max_wait_ms=1000)
+    future = batcher.submit(1)
+    batcher.close()
+    assert future.result(timeout=1) == 2
+    with pytest.raises(RuntimeError):
+        batcher.submit(2)
+
+
+def test_ner_batcher_delegates_to_processor_batch():
+    class Processor:
+        def extract_entities_batch(self, texts):
+            return [{"text": text} for text in texts]
+
+    batcher = NERBatcher(Processor(), max_wait_ms=1)
+    assert batcher.extract_entities("fever") == {"text": "fever"}
+    batcher.close()
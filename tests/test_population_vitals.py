@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from population_vitals import PopulationVitalsAggregator
+
+PATIENTS = [("P1", "Adyar", "Apollo"), ("P2", "Adyar", "MIOT"), ("P3", "T Nagar", "Apollo")]
+
+
+def _add_vitals(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO patient_vitals (patient_id, date, bp_systolic, bp_diastolic, bmi) VALUES (?, ?, ?, ?, ?)", rows
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "vitals.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE patients (id TEXT PRIMARY KEY, area TEXT, preferred_hospital TEXT)")
+    conn.execute("""CREATE TABLE patient_vitals (id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT, date DATE,
+                    bp_systolic INTEGER, bp_diastolic INTEGER, bmi REAL)""")
+    conn.executemany("INSERT INTO patients VALUES (?, ?, ?)", PATIENTS)
+    conn.commit()
+    conn.close()
+    _add_vitals(path, [
+        ("P1", "2024-01-05", 150, 95, 31.0),
+        ("P1", "2024-02-05", 130, 85, 29.0),
+        ("P2", "2024-01-10", 85, 55, 17.0),
+        ("P3", "2024-01-20", 120, 80, None),
+        ("P9", "2024-02-01", 145, 92, 22.0),   # No patient row
+    ])
+    return path
+
+
+def _summaries(aggregator):
+    return (aggregator.hypertension_by_area(), aggregator.bmi_by_hospital(), aggregator.monthly_trends())
+
+
+def test_refresh_summarizes_readings(db_path):
+    aggregator = PopulationVitalsAggregator(db_path)
+    assert aggregator.refresh() == 5
+
+    by_area = aggregator.hypertension_by_area().set_index("Area")
+    assert by_area.loc["Adyar", ["Readings", "Hypertensive"]].tolist() == [3, 1]
+    assert by_area.loc["Unknown", "Prevalence %"] == 100.0
+
+    bmi = aggregator.bmi_by_hospital()
+    assert bmi.loc["Apollo", "Obese"] == 1 and bmi.loc["Apollo", "Overweight"] == 1
+    assert bmi.loc["MIOT", "Underweight"] == 1
+
+    trends = aggregator.monthly_trends("Adyar").set_index("Month")
+    assert trends.loc["2024-01", "Mean Systolic"] == pytest.approx((150 + 85) / 2)
+    assert trends.loc["2024-01", "Mean BMI"] == pytest.approx((31.0 + 17.0) / 2)
+
+
+def test_refresh_only_reads_new_rows(db_path):
+    aggregator = PopulationVitalsAggregator(db_path)
+    aggregator.refresh()
+    assert aggregator.refresh() == 0
+    _add_vitals(db_path, [("P3", "2024-02-11", 160, 100, 26.0), ("P2", "bad date", 110, 70, 0)])
+    assert aggregator.refresh() == 2
+
+    incremental = _summaries(aggregator)
+    aggregator.rebuild()
+    for got, expected in zip(incremental, _summaries(aggregator)):
+        pd.testing.assert_frame_equal(got, expected)
+    assert "Unknown" in aggregator.monthly_trends()["Month"].tolist()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2])
+def test_chunk_size_does_not_change_results(db_path, chunk_size):
+    aggregator = PopulationVitalsAggregator(db_path)
+    aggregator.refresh()
+    expected = _summaries(aggregator)
+    chunked = PopulationVitalsAggregator(db_path, chunk_size=chunk_size)
+    assert chunked.rebuild() == 5
+    for got, want in zip(_summaries(chunked), expected):
+        pd.testing.assert_frame_equal(got, want)
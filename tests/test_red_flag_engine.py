@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from red_flag_engine import RedFlagDetector
+
+detector = RedFlagDetector()
+
+
+def conditions(text):
+    return {hit["condition"]: hit["value"] for hit in detector.detect(text)}
+
+
+@pytest.mark.parametrize("text, platelets", [
+    ("Platelet count 1.5 lakhs/cumm", None),
+    ("Platelet count 0.8 lakhs/cumm", 80000),
+    ("Platelets: 150 x10^3/uL", None),
+    ("Platelets: 85 x10^3/uL", 85000),
+    ("Platelets 90 x 10^9/L", 90000),
+    ("Platelet count 1,40,000/cumm", None),
+    ("Platelet count 60,000/cumm", 60000),
+    ("Platelets: 1.2", None),
+    ("Platelets: 45", 45000),
+    ("platelets <100,000", 100000),
+])
+def test_platelets_are_normalized_to_cells_per_microlitre(text, platelets):
+    assert conditions(text).get("dengue") == platelets
+
+
+@pytest.mark.parametrize("text", [
+    "Patient denies chest pain.",
+    "No chest pain.",
+    "Negative for facial droop, slurred speech or hemiparesis",
+])
+def test_negated_phrases_are_not_flagged(text):
+    assert conditions(text) == {}
+
+
+def test_negation_ends_at_the_clause():
+    assert set(conditions("No chest pain but slurred speech noted. Complains of petechiae")) == {"stroke", "dengue"}
+
+
+def test_most_urgent_first():
+    hits = detector.detect("Fever for 6 days. SpO2: 86%. Crushing chest pain since morning")
+    assert [hit["condition"] for hit in hits] == ["hypoxia", "mi", "dengue"]
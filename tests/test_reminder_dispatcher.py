@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from cryptography.fernet import Fernet
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import crypto_service
+import synthetic_data
+from appointment_scheduler import AppointmentScheduler
+from reminder_dispatcher import ReminderDispatcher, SMSGateway
+
+
+class RecordingGateway(SMSGateway):
+    def __init__(self):
+        self.sent = []
+
+    async def send_batch(self, messages):
+        await asyncio.sleep(0.05)
+        self.sent.extend(message["id"] for message in messages)
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENCRYPTION_KEY", Fernet.generate_key().decode())
+    crypto_service.get_crypto_service.cache_clear()
+    path = str(tmp_path / "reminders.db")
+    people = synthetic_data.build_database(path, patients=20, prescriptions_per_patient=1, vitals_per_patient=1)
+    scheduler = AppointmentScheduler(path)
+    start = datetime(2030, 1, 1, 9, 0)
+    scheduler.book_many([(p["id"], start + timedelta(minutes=15 * i), None) for i, p in enumerate(people)],
+                        hospital="H", doctor="Dr A")
+    yield path
+    crypto_service.get_crypto_service.cache_clear()
+
+
+def test_gateway_must_implement_send_batch():
+    with pytest.raises(TypeError):
+        SMSGateway()
+
+
+def test_overlapping_runs_send_each_reminder_once(db_path):
+    gateway = RecordingGateway()
+    window = (datetime(2030, 1, 1), datetime(2030, 1, 2))
+
+    async def overlapping():
+        runs = [ReminderDispatcher(db_path, gateway, batch_size=5) for _ in range(3)]
+        return await asyncio.gather(*[run.dispatch_async(*window) for run in runs])
+
+    results = asyncio.run(overlapping())
+    assert sorted(gateway.sent) == list(range(1, 21))
+    assert sum(result["sent"] for result in results) == 20
+    # A later run finds nothing left to send
+    assert ReminderDispatcher(db_path, gateway).dispatch(*window)["due"] == 0
+
+
+def test_stale_claim_is_reclaimed(db_path):
+    gateway = RecordingGateway()
+    dispatcher = ReminderDispatcher(db_path, gateway)
+    window = (datetime(2030, 1, 1), datetime(2030, 1, 2))
+    assert len(dispatcher.due(*window)) == 20
+    assert dispatcher.due(*window) == []
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE reminder_log SET claimed_at = '2000-01-01T00:00:00' WHERE appointment_id = 3")
+    conn.commit()
+    conn.close()
+    assert [message["id"] for message in dispatcher.due(*window)] == [3]
@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from term_matcher import AhoCorasick, TamilTermMatcher, get_tamil_matcher
+
+
+def test_iter_all_finds_overlapping_terms():
+    automaton = AhoCorasick()
+    for term in ("he", "she", "his", "hers"):
+        automaton.add(term, term)
+    assert sorted(automaton.iter_all("ushers")) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_finditer_is_leftmost_longest():
+    automaton = AhoCorasick()
+    for term in ("ab", "abcd", "cde"):
+        automaton.add(term, term)
+    assert list(automaton.finditer("abcde")) == [(0, 4, "abcd")]
+
+
+def test_rebuild_after_add_does_not_duplicate_outputs():
+    automaton = AhoCorasick()
+    automaton.add("he", "he")
+    automaton.add("she", "she")
+    automaton.build()
+    automaton.add("hers", "hers")
+    automaton.build()
+    automaton.build()
+    assert sorted(automaton.iter_all("shers")) == [(0, 3, "she"), (1, 3, "he"), (1, 5, "hers")]
+
+
+def test_category_lookup_not_hidden_by_longer_term_of_other_category():
+    matcher = TamilTermMatcher({
+        "symptoms": {"தலை வலி": "headache"},
+        "body_parts": {"தலை": "head"},
+    })
+    text = "தலை வலி உள்ளது"
+    assert matcher.translate(text) == "headache உள்ளது"
+    # The longer symptom term must not mask the body part it starts with
+    assert matcher.first(text, "body_parts") == "head"
+    assert matcher.annotate(text, ("body_parts",)) == [(0, 3, "body_parts", "தலை", "head")]
+    assert matcher.first(text, "medications") is None
+
+
+def test_bundled_glossary_translates():
+    matcher = get_tamil_matcher()
+    category, terms = next(iter(matcher.glossary.items()))
+    tamil, english = next(iter(terms.items()))
+    assert matcher.translate(f"x {tamil} y") == f"x {english} y"
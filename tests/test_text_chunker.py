@@ -0,0 +1,62 @@
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from text_chunker import chunk_spans
+
+
+def _report():
+    sentences = []
+    for i in range(400):
+        sentences.append(f"Patient {i} was given Metformin 500 mg twice daily.")
+        if i % 7 == 6:
+            sentences.append("\n\n")
+    return " ".join(sentences)
+
+
+def test_short_text_is_one_window():
+    assert chunk_spans("BP 140/90", max_chars=100) == [(0, 9, 0, 9)]
+
+
+@pytest.mark.parametrize("max_chars, overlap", [(500, 50), (1000, 200), (2000, 300)])
+def test_windows_cover_text_and_own_a_partition(max_chars, overlap):
+    text = _report()
+    spans = chunk_spans(text, max_chars, overlap)
+    assert len(spans) > 1
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    for start, end, own_start, own_end in spans:
+        assert end - start <= max_chars
+        assert start <= own_start < own_end <= end
+    # Owned spans tile the text with no gaps or overlaps
+    assert spans[0][2] == 0 and spans[-1][3] == len(text)
+    for previous, following in zip(spans, spans[1:]):
+        assert previous[3] == following[2]
+        # Neighbours overlap, so an entity near a cut is whole in one window
+        assert following[0] < previous[1]
+
+
+def test_each_entity_is_owned_by_exactly_one_window():
+    text = _report()
+    spans = chunk_spans(text, max_chars=700, overlap=100)
+    for match in re.finditer(r"Metformin 500 mg", text):
+        owners = [s for s in spans if s[2] <= match.start() < s[3]]
+        assert len(owners) == 1
+        start, end, _, _ = owners[0]
+        assert start <= match.start() and match.end() <= end
+
+
+def test_windows_end_on_sentence_boundaries():
+    text = _report()
+    for _, end, _, _ in chunk_spans(text, max_chars=1000, overlap=100)[:-1]:
+        assert text[:end].rstrip().endswith(".")
+
+
+def test_unbroken_text_still_advances():
+    text = "x" * 2500
+    spans = chunk_spans(text, max_chars=1000, overlap=100)
+    assert spans[-1][1] == 2500
+    assert all(end - start <= 1000 for start, end, _, _ in spans)